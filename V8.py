@@ -1,77 +1,17 @@
 import streamlit as st
 import pandas as pd
-import math
-import io
-
-# Conversion factors
-FEET_TO_INCHES = 12
-
-# Helper function to calculate volume
-def calculate_volume(length, width, height):
-    return length * width * height
-
-# Helper function to calculate cylinder volume
-def calculate_cylinder_volume(diameter, height):
-    radius = diameter / 2
-    return math.pi * (radius ** 2) * height
-
-# Function to optimize loading
-def optimize_loading(trucks, boxes, rolls):
-    results = []
-    
-    for truck in trucks:
-        truck_volume = calculate_volume(truck['length'] * FEET_TO_INCHES, 
-                                        truck['width'] * FEET_TO_INCHES, 
-                                        truck['height'] * FEET_TO_INCHES)
-        remaining_volume = truck_volume
-        
-        # Initialize counts
-        box_counts = {f"box_type_{i+1}": 0 for i in range(len(boxes))}
-        roll_counts = {f"roll_type_{i+1}": 0 for i in range(len(rolls))}
-        
-        # Sort boxes and rolls by volume (descending)
-        sorted_boxes = sorted(boxes, key=lambda b: b['volume'], reverse=True)
-        sorted_rolls = sorted(rolls, key=lambda r: r['volume'], reverse=True)
-        
-        # Fit boxes
-        for i, box in enumerate(sorted_boxes):
-            box_volume = box['volume']
-            if remaining_volume >= box_volume and box['quantity'] > 0:
-                max_fit = int(remaining_volume // box_volume)
-                actual_fit = min(max_fit, box['quantity'])
-                box_counts[f"box_type_{i+1}"] = actual_fit
-                remaining_volume -= actual_fit * box_volume
-            else:
-                box_counts[f"box_type_{i+1}"] = 0
-        
-        # Fit rolls
-        for i, roll in enumerate(sorted_rolls):
-            roll_volume = roll['volume']
-            if remaining_volume >= roll_volume and roll['quantity'] > 0:
-                max_fit = int(remaining_volume // roll_volume)
-                actual_fit = min(max_fit, roll['quantity'])
-                roll_counts[f"roll_type_{i+1}"] = actual_fit
-                remaining_volume -= actual_fit * roll_volume
-            else:
-                roll_counts[f"roll_type_{i+1}"] = 0
-        
-        # Calculate how many more can be accommodated
-        additional_boxes = {f"box_type_{i+1}": int(remaining_volume // box['volume']) if box['volume'] > 0 else 0 for i, box in enumerate(sorted_boxes)}
-        additional_rolls = {f"roll_type_{i+1}": int(remaining_volume // roll['volume']) if roll['volume'] > 0 else 0 for i, roll in enumerate(sorted_rolls)}
-        
-        results.append({
-            'truck': truck,
-            'box_counts': box_counts,
-            'roll_counts': roll_counts,
-            'remaining_volume': remaining_volume,
-            'additional_boxes': additional_boxes,
-            'additional_rolls': additional_rolls
-        })
-    
-    return results
+
+from load_engine import (LoadingSession, allocate_fleet, improve_loading, items_from_records, split_items,
+                         trucks_from_records, trucks_to_records)
+from load_engine.catalog_io import (MIME_TYPES, PLACEMENT_COLUMNS, SUMMARY_COLUMNS, export_rows, placement_rows,
+                                    read_items, read_trucks, summary_rows)
+from load_engine.instrument import stage
+from diagnostics import diagnostics_panel, diagnostics_sidebar
+
 
 # Streamlit App
 st.title("Truck Load Optimization")
+diagnostics_sidebar()
 
 # Login Section
 st.sidebar.header("Login")
@@ -102,58 +42,84 @@ if username == "admin" and password == "password":
 
     # Input for trucks (in feet)
     num_trucks = st.sidebar.number_input("Number of Truck Types", min_value=1, step=1)
-    trucks = []
+    truck_records = []
     for i in range(num_trucks):
         st.sidebar.subheader(f"Truck Type {i+1}")
         length = st.sidebar.number_input(f"Length (ft) for Truck Type {i+1}", min_value=1.0, step=0.1)
         width = st.sidebar.number_input(f"Width (ft) for Truck Type {i+1}", min_value=1.0, step=0.1)
         height = st.sidebar.number_input(f"Height (ft) for Truck Type {i+1}", min_value=1.0, step=0.1)
         quantity = st.sidebar.number_input(f"Quantity for Truck Type {i+1}", min_value=1, step=1)
-        trucks.append({'length': length, 'width': width, 'height': height, 'quantity': quantity})
+        truck_records.append({'Length (ft)': length, 'Width (ft)': width, 'Height (ft)': height, 'Quantity': quantity})
 
     # Input for boxes (in inches)
     num_boxes = st.sidebar.number_input("Number of Box Types", min_value=1, step=1)
-    boxes = []
+    item_records = []
     for i in range(num_boxes):
         st.sidebar.subheader(f"Box Type {i+1}")
         length = st.sidebar.number_input(f"Length (in) for Box Type {i+1}", min_value=0.1, step=0.1)
         width = st.sidebar.number_input(f"Width (in) for Box Type {i+1}", min_value=0.1, step=0.1)
         height = st.sidebar.number_input(f"Height (in) for Box Type {i+1}", min_value=0.1, step=0.1)
         quantity = st.sidebar.number_input(f"Quantity for Box Type {i+1}", min_value=1, step=1)
-        volume = calculate_volume(length, width, height)
-        boxes.append({'length': length, 'width': width, 'height': height, 'quantity': quantity, 'volume': volume})
+        item_records.append({'Length (in)': length, 'Width (in)': width, 'Height (in)': height, 'Quantity': quantity})
 
     # Input for rolls (in inches)
     num_rolls = st.sidebar.number_input("Number of Roll Types", min_value=1, step=1)
-    rolls = []
     for i in range(num_rolls):
         st.sidebar.subheader(f"Roll Type {i+1}")
         diameter = st.sidebar.number_input(f"Diameter (in) for Roll Type {i+1}", min_value=0.1, step=0.1)
         length = st.sidebar.number_input(f"Length (in) for Roll Type {i+1}", min_value=0.1, step=0.1)
         quantity = st.sidebar.number_input(f"Quantity for Roll Type {i+1}", min_value=1, step=1)
-        volume = calculate_cylinder_volume(diameter, length)
-        rolls.append({'diameter': diameter, 'length': length, 'quantity': quantity, 'volume': volume})
+        item_records.append({'Diameter (in)': diameter, 'Length (in)': length, 'Quantity': quantity})
+
+    # Optional catalog files (CSV, XLSX or Parquet) replace the entries above
+    st.sidebar.header("Catalog Import")
+    truck_file = st.sidebar.file_uploader("Truck Catalog (ft)", type=["csv", "xlsx", "parquet"])
+    item_file = st.sidebar.file_uploader("Box and Roll Catalog (in)", type=["csv", "xlsx", "parquet"])
+    truck_catalog = trucks_from_records(truck_records)
+    item_catalog = items_from_records(item_records)
+    try:
+        if truck_file is not None:
+            truck_catalog = read_trucks(truck_file)
+        if item_file is not None:
+            item_catalog = read_items(item_file)
+    except (KeyError, ValueError) as e:
+        st.sidebar.error(f"Could not read the catalog: {e}")
+    # Loader records from the catalogs (trucks in feet, items in inches)
+    trucks = trucks_to_records(truck_catalog)
+    boxes, rolls = split_items(item_catalog)
+
+    report_format = st.sidebar.selectbox("Report Format", ["csv", "xlsx", "parquet"])
+
+    # Optional improvement search on top of the greedy loading
+    improvement_budget = st.sidebar.number_input("Improvement Time Budget (s)", min_value=0.0, value=0.0, step=0.5)
+
+    # Fleet allocation: every truck of every type, sharing one item inventory
+    allocate_across_fleet = st.sidebar.checkbox("Allocate Across the Fleet (uses truck quantities)")
 
     # Add a run button
     if st.button("Run Optimization"):
-        results = optimize_loading(trucks, boxes, rolls)
+        # Reuse the previous solve: only trucks and items affected by an edit are reloaded
+        if 'loading_session' not in st.session_state:
+            st.session_state['loading_session'] = LoadingSession()
+        results = st.session_state['loading_session'].update(trucks, boxes, rolls)
+
+        if improvement_budget > 0:
+            best_so_far = st.empty()
+
+            def show_best(truck_index, loader):
+                best_so_far.write(f"Truck Type {truck_index + 1}: loaded volume improved by "
+                                  f"{loader.best_value - loader.greedy_value:.0f} cubic inches")
+
+            results = improve_loading(trucks, boxes, rolls, budget=improvement_budget, callback=show_best,
+                                      session=st.session_state['loading_session'])
         
-        report_data = []
         for result in results:
             truck_type = f"Truck Type {results.index(result) + 1}"
-            box_df = pd.DataFrame(result['box_counts'].items(), columns=['Box Type', 'Count'])
-            roll_df = pd.DataFrame(result['roll_counts'].items(), columns=['Roll Type', 'Count'])
-            additional_boxes_df = pd.DataFrame(result['additional_boxes'].items(), columns=['Box Type', 'Additional Count'])
-            additional_rolls_df = pd.DataFrame(result['additional_rolls'].items(), columns=['Roll Type', 'Additional Count'])
-            
-            report_data.append({
-                'Truck Type': truck_type,
-                'Box Counts': box_df.to_dict(orient='records'),
-                'Roll Counts': roll_df.to_dict(orient='records'),
-                'Remaining Volume': result['remaining_volume'],
-                'Additional Boxes': additional_boxes_df.to_dict(orient='records'),
-                'Additional Rolls': additional_rolls_df.to_dict(orient='records')
-            })
+            with stage("v8.dataframes"):
+                box_df = pd.DataFrame(result['box_counts'].items(), columns=['Box Type', 'Count'])
+                roll_df = pd.DataFrame(result['roll_counts'].items(), columns=['Roll Type', 'Count'])
+                additional_boxes_df = pd.DataFrame(result['additional_boxes'].items(), columns=['Box Type', 'Additional Count'])
+                additional_rolls_df = pd.DataFrame(result['additional_rolls'].items(), columns=['Roll Type', 'Additional Count'])
             
             st.write(truck_type)
             st.write("Box Counts:")
@@ -169,5 +135,30 @@ if username == "admin" and password == "password":
             
             st.write("Additional Rolls that can be accommodated:")
             st.table(additional_rolls_df)
+
+            st.write(f"Placements ({len(result['placements'])} items, inches from the front-left floor corner):")
+            with stage("v8.dataframes"):
+                placements_df = pd.DataFrame(result['placements'])
+            st.dataframe(placements_df)
+
+        # Reports are written straight into memory for download
+        st.download_button("Download Load Summary", export_rows(summary_rows(results), SUMMARY_COLUMNS, report_format),
+                           file_name=f"load_summary.{report_format}", mime=MIME_TYPES[report_format], on_click="ignore")
+        st.download_button("Download Placements", export_rows(placement_rows(results), PLACEMENT_COLUMNS, report_format),
+                           file_name=f"placements.{report_format}", mime=MIME_TYPES[report_format], on_click="ignore")
+
+        if allocate_across_fleet:
+            allocation = allocate_fleet(trucks, boxes, rolls, geometry=True)
+            st.subheader("Fleet Allocation")
+            st.write(f"Trucks Used: {allocation['trucks_used']} of {len(allocation['trucks'])}")
+            st.table(pd.DataFrame([{'Truck Type': f"Truck Type {load['truck_type']}", 'Truck': load['unit'],
+                                    **load['box_counts'], **load['roll_counts'],
+                                    'Remaining Volume': load['remaining_volume']}
+                                   for load in allocation['trucks'] if load['box_counts'] or load['roll_counts']]))
+            st.write("Items Left Unallocated:")
+            st.table(pd.DataFrame({**allocation['unallocated_boxes'], **allocation['unallocated_rolls']}.items(),
+                                  columns=['Item Type', 'Count']))
+
+diagnostics_panel()
         
        
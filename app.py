@@ -0,0 +1,16 @@
+import streamlit as st
+
+# Single entry point for all tools: streamlit run app.py
+# Every page is one of the standalone scripts, which still run on their own.
+# Heavy libraries (matplotlib, OR-Tools) are only imported by the pages that
+# draw or solve with them, and shared objects come from shared.py.
+
+st.set_page_config(page_title="Truck Load Optimization")
+
+pages = [
+    st.Page("V8.py", title="Box and Roll Loading", default=True),
+    st.Page("V9.py", title="Roll Loading with Weight Limits"),
+    st.Page("truck_selector_feet.py", title="Truck Selection for Rolls"),
+    st.Page("v11.py", title="Forecasting and Fleet Mix"),
+]
+st.navigation(pages).run()
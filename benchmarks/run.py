@@ -0,0 +1,284 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from load_engine import (FEET_TO_INCHES, CapacityMatrix, LoadingSession, add_truck_volumes, allocate_fleet,
+                         clear_capacity_cache, clear_honeycomb_cache, clear_pattern_cache, items_from_records,
+                         optimize_honeycomb_packing, optimize_loading, optimize_loading_3d, optimize_roll_loading,
+                         pack_circles, plan_roll_loading, trucks_from_records, truck_volume_inches)
+from load_engine import instrument
+from load_engine.capacity import CACHE_DIR_ENV
+from load_engine.orientation import orientation_capacity
+
+from .workloads import WORKLOAD_SIZES, make_workload
+
+# Usage: python -m benchmarks.run [--workloads small large] [--history PATH]
+# Every run is appended to the JSON history (benchmarks/history.json by
+# default, not tracked by git); the newest run is compared with the previous
+# one and slower timings or worse packing quality are flagged. Capacity
+# matrices are saved to a temporary cache directory that every benchmark
+# starts from empty, so cached results never hide the computation.
+
+DEFAULT_HISTORY = os.path.join(os.path.dirname(__file__), "history.json")
+
+
+# Utilization (%) of a truck result from the counts of sorted items
+def _utilization(result, sorted_boxes, sorted_rolls):
+    loaded = sum(result.get('box_counts', {}).get(f"box_type_{i+1}", 0) * box['volume']
+                 for i, box in enumerate(sorted_boxes))
+    loaded += sum(result['roll_counts'].get(f"roll_type_{i+1}", 0) * roll['volume']
+                  for i, roll in enumerate(sorted_rolls))
+    return 100 * loaded / truck_volume_inches(result['truck'])
+
+
+def _loading_quality(results, boxes, rolls):
+    sorted_boxes = sorted(boxes, key=lambda b: b['volume'], reverse=True)
+    sorted_rolls = sorted(rolls, key=lambda r: r['volume'], reverse=True)
+    utilizations = [_utilization(result, sorted_boxes, sorted_rolls) for result in results]
+    loaded = sum(sum(result.get('box_counts', {}).values()) + sum(result['roll_counts'].values())
+                 for result in results)
+    return {'utilization': sum(utilizations) / len(utilizations), 'items_loaded': loaded}
+
+
+def bench_volume(workload):
+    results = optimize_loading(workload['trucks'], workload['boxes'], workload['rolls'])
+    return _loading_quality(results, workload['boxes'], workload['rolls'])
+
+
+def bench_placement(workload):
+    results = optimize_loading_3d(workload['trucks'], workload['boxes'], workload['rolls'])
+    return _loading_quality(results, workload['boxes'], workload['rolls'])
+
+
+def bench_roll_loading(workload):
+    clear_honeycomb_cache()
+    results = optimize_roll_loading(workload['trucks'], workload['rolls'])
+    return _loading_quality(results, [], workload['rolls'])
+
+
+# Floor plan of every roll type at once, as load_truck_rolls packs it
+def bench_circle_packing(workload):
+    clear_honeycomb_cache()
+    rolls = [(roll['diameter'], roll['quantity']) for roll in workload['rolls']]
+    positions = 0
+    for truck in workload['trucks']:
+        centers = pack_circles(truck['width'] * FEET_TO_INCHES, truck['length'] * FEET_TO_INCHES, rolls)
+        positions += sum(len(points) for points in centers)
+    return {'positions': positions}
+
+
+# Stacked honeycomb of each roll type alone in each truck
+def bench_honeycomb(workload):
+    clear_honeycomb_cache()
+    positions = 0
+    for truck in workload['trucks']:
+        for roll in workload['rolls']:
+            count, _ = optimize_honeycomb_packing(truck['width'] * FEET_TO_INCHES, truck['length'] * FEET_TO_INCHES,
+                                                  roll['diameter'], truck['height'] * FEET_TO_INCHES, roll['length'])
+            positions += count
+    return {'positions': positions}
+
+
+# Empty the pattern and capacity caches, in memory and on disk
+def _cold_caches():
+    clear_pattern_cache()
+    clear_capacity_cache()
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if cache_dir:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+# Truck selection as truck_selector_feet.py runs it: patterns with roll orientations
+def bench_truck_selection(workload):
+    _cold_caches()
+    truck_data = add_truck_volumes([dict(truck) for truck in workload['truck_table']])
+    selected = plan_roll_loading(truck_data, workload['roll_types'], geometry=True)
+    return {'trucks_used': len(selected) if selected else None, 'feasible': selected is not None}
+
+
+# A 3D session solve, then re-solves after editing the last box, then the last roll
+def bench_session(workload):
+    boxes = [dict(box) for box in workload['boxes']]
+    rolls = [dict(roll) for roll in workload['rolls']]
+    session = LoadingSession()
+    session.update(workload['trucks'], boxes, rolls)
+    for items in (boxes, rolls):
+        if items:
+            items[-1]['quantity'] += 1
+            results = session.update(workload['trucks'], boxes, rolls)
+    quality = _loading_quality(results, boxes, rolls)
+    quality['items_reloaded'] = session.stats['items_reloaded']
+    return quality
+
+
+def _fleet_quality(allocation):
+    loaded = sum(sum(load['box_counts'].values()) + sum(load['roll_counts'].values())
+                 for load in allocation['trucks'])
+    return {'items_loaded': loaded, 'trucks_used': allocation['trucks_used']}
+
+
+def bench_fleet_first_fit(workload):
+    return _fleet_quality(allocate_fleet(workload['trucks'], workload['boxes'], workload['rolls']))
+
+
+def bench_fleet_best_fit(workload):
+    return _fleet_quality(allocate_fleet(workload['trucks'], workload['boxes'], workload['rolls'],
+                                         strategy="best_fit"))
+
+
+def _catalogs(workload):
+    return trucks_from_records(workload['trucks']), items_from_records(workload['boxes'] + workload['rolls'])
+
+
+def bench_capacity_matrix(workload):
+    trucks, items = _catalogs(workload)
+    matrix = CapacityMatrix.compute(trucks, items)
+    return {'capacity': int(matrix.capacity.sum())}
+
+
+def bench_orientation(workload):
+    trucks, items = _catalogs(workload)
+    counts, _ = orientation_capacity(trucks, items)
+    return {'capacity': int(counts.sum())}
+
+
+# name -> (function, items processed per call)
+BENCHMARKS = {
+    "volume": (bench_volume, lambda w: len(w['trucks']) * _quantity(w['boxes'] + w['rolls'])),
+    "placement": (bench_placement, lambda w: len(w['trucks']) * _quantity(w['boxes'] + w['rolls'])),
+    "roll_loading": (bench_roll_loading, lambda w: len(w['trucks']) * _quantity(w['rolls'])),
+    "circle_packing": (bench_circle_packing, lambda w: len(w['trucks']) * _quantity(w['rolls'])),
+    "honeycomb": (bench_honeycomb, lambda w: len(w['trucks']) * len(w['rolls'])),
+    "truck_selection": (bench_truck_selection, lambda w: sum(roll['Quantity'] for roll in w['roll_types'])),
+    "session": (bench_session, lambda w: 3 * len(w['trucks']) * _quantity(w['boxes'] + w['rolls'])),
+    "fleet_first_fit": (bench_fleet_first_fit, lambda w: _quantity(w['boxes'] + w['rolls'])),
+    "fleet_best_fit": (bench_fleet_best_fit, lambda w: _quantity(w['boxes'] + w['rolls'])),
+    "capacity_matrix": (bench_capacity_matrix, lambda w: len(w['trucks']) * len(w['boxes'] + w['rolls'])),
+    "orientation": (bench_orientation, lambda w: len(w['trucks']) * len(w['rolls'])),
+}
+
+# Quality metrics where a larger value is better; others (trucks_used,
+# items_reloaded) are better smaller
+HIGHER_IS_BETTER = {'utilization', 'items_loaded', 'positions', 'capacity'}
+
+
+def _quantity(items):
+    return sum(item['quantity'] for item in items)
+
+
+# Time one benchmark (best of `repeat`) and measure its peak traced memory
+def run_benchmark(name, workload, repeat):
+    function, count_items = BENCHMARKS[name]
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        quality = function(workload)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(workload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    items = count_items(workload)
+    return {'wall_time': best, 'items': items, 'items_per_sec': items / best if best > 0 else None,
+            'peak_memory_kb': peak / 1024, 'quality': quality}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+# Regressions of `current` against `previous`: slower than `time_tolerance`
+# (a ratio, ignoring differences under `min_delta` seconds) or any quality
+# metric moving the wrong way
+def compare_runs(previous, current, time_tolerance=0.2, min_delta=0.001):
+    regressions = []
+    for key, result in current['results'].items():
+        before = previous['results'].get(key)
+        if before is None:
+            continue
+        slower = result['wall_time'] - before['wall_time']
+        if slower > min_delta and result['wall_time'] > before['wall_time'] * (1 + time_tolerance):
+            regressions.append(f"{key}: wall time {before['wall_time']:.4f}s -> {result['wall_time']:.4f}s")
+        for metric, value in result['quality'].items():
+            old = before['quality'].get(metric)
+            if old is None or value is None or isinstance(value, bool):
+                continue
+            worse = value < old - 1e-9 if metric in HIGHER_IS_BETTER else value > old + 1e-9
+            if worse:
+                regressions.append(f"{key}: {metric} {old} -> {value}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Benchmark the loading engine and record the results.")
+    parser.add_argument("--workloads", nargs="+", default=["small", "large"], choices=sorted(WORKLOAD_SIZES))
+    parser.add_argument("--benchmarks", nargs="+", default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--history", default=DEFAULT_HISTORY)
+    parser.add_argument("--time-tolerance", type=float, default=0.2,
+                        help="allowed slowdown ratio before a timing counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="also collect per-stage timers and counters and write them to PATH as JSON")
+    args = parser.parse_args(argv)
+    if args.profile:
+        instrument.enable()
+    cache_dir = tempfile.mkdtemp(prefix="load_engine_bench_")
+    os.environ[CACHE_DIR_ENV] = cache_dir
+
+    run = {'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"), 'commit': _git_commit(),
+           'python': platform.python_version(), 'seed': args.seed, 'results': {}}
+    for workload_name in args.workloads:
+        workload = make_workload(workload_name, args.seed)
+        for name in args.benchmarks:
+            key = f"{name}/{workload_name}"
+            result = run_benchmark(name, workload, args.repeat)
+            run['results'][key] = result
+            quality = ", ".join(f"{metric}={value:.2f}" if isinstance(value, float) else f"{metric}={value}"
+                                for metric, value in result['quality'].items())
+            print(f"{key:28} {result['wall_time'] * 1000:10.2f} ms {result['items_per_sec'] or 0:14,.0f} items/s "
+                  f"{result['peak_memory_kb']:10.0f} KiB  {quality}")
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    history = load_history(args.history)
+    previous = [old for old in history if old.get('seed') == args.seed]
+    regressions = compare_runs(previous[-1], run, args.time_tolerance) if previous else []
+    history.append(run)
+    with open(args.history, "w") as f:
+        json.dump(history, f, indent=2)
+
+    if args.profile:
+        with open(args.profile, "w") as f:
+            f.write(instrument.to_json())
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Usage: python -m benchmarks.startup [--repeat 3] [--target SECONDS]
+# Cold start of the multipage app (app.py), each sample in a fresh Python
+# process: importing the engine and the first run of the default page. Also
+# checks that the libraries pages import lazily were not loaded.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_TARGET_SECONDS = 1.5
+LAZY_MODULES = ("matplotlib", "ortools", "openpyxl")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+import load_engine
+engine = time.perf_counter()
+app = AppTest.from_file({app!r}, default_timeout=120).run()
+done = time.perf_counter()
+print(json.dumps({{'streamlit_import': imported - start, 'engine_import': engine - imported,
+                  'first_run': done - engine, 'exceptions': [e.value for e in app.exception],
+                  'loaded': [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+# One cold start sample in a fresh interpreter
+def measure(app="app.py"):
+    code = PROBE.format(app=os.path.join(ROOT, app), lazy=LAZY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True,
+                            env={**os.environ, "PYTHONPATH": ROOT}).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup",
+                                     description="Measure the cold start of the multipage app.")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--target", type=float, default=STARTUP_TARGET_SECONDS,
+                        help="allowed engine import + first page run, in seconds")
+    args = parser.parse_args(argv)
+
+    samples = [measure(args.app) for _ in range(args.repeat)]
+    best = min(samples, key=lambda sample: sample['engine_import'] + sample['first_run'])
+    startup = best['engine_import'] + best['first_run']
+    print(f"streamlit import {best['streamlit_import'] * 1000:8.0f} ms")
+    print(f"engine import    {best['engine_import'] * 1000:8.0f} ms")
+    print(f"first page run   {best['first_run'] * 1000:8.0f} ms")
+    print(f"startup          {startup * 1000:8.0f} ms (target {args.target * 1000:.0f} ms)")
+
+    failures = [f"page raised {error}" for sample in samples for error in sample['exceptions']]
+    failures += [f"{module} imported at startup" for module in best['loaded']]
+    if startup > args.target:
+        failures.append(f"startup {startup:.2f}s is over the {args.target:.2f}s target")
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import random
+
+from load_engine import calculate_volume, calculate_cylinder_volume
+
+# Seeded generators for realistic truck, box and roll catalogs. Trucks are in
+# feet, boxes and rolls in inches, weights in kg (the units V8.py / V9.py use).
+
+TRUCK_SIZES = [
+    (20, 8, 8),      # 20 ft container
+    (26, 8.2, 9.8),  # box truck
+    (40, 8, 8.5),    # 40 ft container
+    (48, 8.5, 9),    # 48 ft trailer
+    (53, 8.5, 9.5),  # 53 ft trailer
+]
+TRUCK_MAX_WEIGHTS = {20: 10000, 26: 12000, 40: 20000, 48: 22000, 53: 24000}
+ROLL_DIAMETERS = [4, 6, 8, 10, 12, 16, 20, 24]
+
+
+def make_trucks(rng, count):
+    trucks = []
+    for _ in range(count):
+        length, width, height = rng.choice(TRUCK_SIZES)
+        trucks.append({'length': length, 'width': width, 'height': height,
+                       'max_weight': TRUCK_MAX_WEIGHTS[length], 'quantity': rng.randint(1, 5)})
+    return trucks
+
+
+def make_boxes(rng, skus, total_items):
+    boxes = []
+    for _ in range(skus):
+        length, width, height = (rng.randint(6, 36), rng.randint(6, 30), rng.randint(4, 24))
+        boxes.append({'length': length, 'width': width, 'height': height,
+                      'quantity': max(1, total_items // skus + rng.randint(-5, 5)),
+                      'volume': calculate_volume(length, width, height),
+                      'weight': round(rng.uniform(2, 40), 1)})
+    return boxes
+
+
+def make_rolls(rng, types, total_items, diameters=ROLL_DIAMETERS):
+    rolls = []
+    for _ in range(types):
+        diameter = rng.choice(diameters)
+        length = rng.choice([24, 36, 48, 60, 72])
+        rolls.append({'diameter': diameter, 'length': length,
+                      'quantity': max(1, total_items // types + rng.randint(-5, 5)),
+                      'volume': calculate_cylinder_volume(diameter, length),
+                      'weight': round(rng.uniform(5, 60), 1)})
+    return rolls
+
+
+# Truck table and roll types in the truck_selector_feet.py format (rolls in meters)
+def make_truck_table(rng, count):
+    table = []
+    for i in range(count):
+        length, width, height = rng.choice(TRUCK_SIZES)
+        table.append({"Name": f"Truck {i + 1}", "Length (ft)": length, "Width (ft)": width,
+                      "Height (ft)": height, "Weight Capacity (kg)": TRUCK_MAX_WEIGHTS[length]})
+    return table
+
+
+def make_roll_types(rng, types, total_items):
+    return [{'Diameter': rng.choice([0.1, 0.15, 0.2, 0.3, 0.5]), 'Length': rng.choice([0.6, 1.0, 1.5]),
+             'Weight': round(rng.uniform(5, 60), 1), 'Quantity': max(1, total_items // types)}
+            for _ in range(types)]
+
+
+# Named workloads: (trucks, box SKUs, box items, roll types, roll items)
+WORKLOAD_SIZES = {
+    "small": (3, 5, 200, 3, 60),
+    "large": (10, 50, 5000, 8, 2000),
+    "many_skus": (5, 500, 10000, 20, 1000),
+}
+
+
+# Build one seeded workload with trucks, boxes and rolls
+def make_workload(name, seed=0):
+    rng = random.Random(f"{name}-{seed}")
+    trucks, skus, items, roll_types, rolls = WORKLOAD_SIZES[name]
+    return {
+        'trucks': make_trucks(rng, trucks),
+        'boxes': make_boxes(rng, skus, items),
+        'rolls': make_rolls(rng, roll_types, rolls),
+        'truck_table': make_truck_table(rng, trucks),
+        'roll_types': make_roll_types(rng, roll_types, rolls),
+    }
@@ -0,0 +1,41 @@
+import streamlit as st
+
+from load_engine import instrument
+
+
+# Function to add the profiling switch to the sidebar (call it before solving).
+# Profiling is process-wide, so it covers every session of the app.
+def diagnostics_sidebar():
+    enabled = st.sidebar.checkbox("Collect Diagnostics", value=instrument.is_enabled(), key="collect_diagnostics")
+    if enabled:
+        instrument.enable()
+    else:
+        instrument.disable()
+    return enabled
+
+
+# Function to show the collected stage timers, counters and cache statistics
+def diagnostics_panel():
+    if not instrument.is_enabled():
+        return
+    import pandas as pd
+
+    data = instrument.snapshot()
+    with st.expander("Diagnostics"):
+        st.write("Stage Timers:")
+        st.table(pd.DataFrame([{'Stage': name, 'Calls': timer['calls'],
+                                'Total (ms)': timer['total_seconds'] * 1000,
+                                'Mean (ms)': timer['mean_seconds'] * 1000,
+                                'Max (ms)': timer['max_seconds'] * 1000}
+                               for name, timer in data['timers'].items()]))
+        st.write("Counters:")
+        st.table(pd.DataFrame(data['counters'].items(), columns=['Counter', 'Value']))
+        st.write("Caches:")
+        st.table(pd.DataFrame([dict(stats, Cache=name) for name, stats in data['caches'].items()]))
+
+        st.download_button("Download Diagnostics (JSON)", instrument.to_json(),
+                           file_name="diagnostics.json", mime="application/json")
+        st.download_button("Download Metrics (Prometheus)", instrument.to_prometheus(),
+                           file_name="metrics.prom", mime="text/plain")
+        if st.button("Reset Diagnostics"):
+            instrument.reset()
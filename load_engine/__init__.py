@@ -0,0 +1,23 @@
+# Headless truck loading engine shared by the Streamlit front-ends.
+# Nothing in this package imports Streamlit.
+from .geometry import (FEET_TO_INCHES, LBS_TO_KG, METER_TO_FEET, calculate_volume,
+                       calculate_cylinder_volume, calculate_roll_volume, truck_volume_inches)
+from .honeycomb import optimize_honeycomb_packing, honeycomb_cache_info, clear_honeycomb_cache
+from .circles import CirclePacker, pack_circles
+from .loading import optimize_loading, optimize_roll_loading, load_truck, load_truck_rolls, sort_by_volume
+from .placement import Packer, box_orientations, roll_orientations, load_truck_3d, optimize_loading_3d
+from .session import LoadingSession
+from .balance import LoadBalance, place_balanced, truck_balance
+from .selection import add_truck_volumes, optimize_truck_selection
+from .patterns import enumerate_patterns, pattern_cache_info, clear_pattern_cache, plan_roll_loading
+from .fleet_mix import greedy_fleet_mix, greedy_truck_counts, solve_fleet_mix
+from .batch import BatchCache, solve_batch
+from .catalog import (Item, items_from_records, trucks_from_records, items_to_records, trucks_to_records,
+                      split_items, capacity_by_volume, capacity_by_weight)
+from .catalog_io import read_items, read_trucks, export_rows
+from .orientation import best_roll_configuration
+from .capacity import CapacityMatrix, capacity_matrix, capacity_cache_info, clear_capacity_cache
+from .anytime import AnytimeLoader, improve_loading
+from .fleet import ResidualTree, allocate_fleet
+from .forecast import DemandHistory, forecast_truck_requirements
+from .service import SolveService, BackgroundSolveService, JobCancelled
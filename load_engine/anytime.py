@@ -0,0 +1,250 @@
+import math
+import random
+import time
+
+import numpy as np
+
+from .catalog import as_item_records, as_truck_records
+from .instrument import add_count
+from .loading import sort_by_volume
+from .placement import item_orientations, placement_result, truck_packer
+
+# Anytime improvement of the 3D loader. A solution for one truck is the order
+# in which item types are loaded plus, per type, either all orientations or a
+# single forced one. The search starts from the greedy answer (largest first,
+# boxes before rolls, all orientations) and runs simulated annealing on the
+# loaded volume until its wall-clock budget runs out; the best solution seen
+# so far is always available.
+#
+# Neighbors are generated in batches. A vectorized upper bound on the loaded
+# volume screens out candidates that could not be accepted, and the rest are
+# evaluated by resuming the packer from a checkpoint before the first rank
+# they change.
+# The greedy answer can be taken from a LoadingSession that already holds it,
+# checkpoints included, instead of being packed again.
+
+BATCH_SIZE = 8
+START_TEMPERATURE = 0.01  # As a fraction of the truck volume
+COOLING = 0.97
+MIN_TEMPERATURE = 1e-5
+ALL_ORIENTATIONS = -1
+EPSILON = 1e-9  # Placement tolerance of load_engine.placement
+
+
+# One candidate solution: load order, orientation choice per rank and the
+# first rank that differs from the current solution
+class _Candidate:
+    def __init__(self, order, choices, start):
+        self.order = order
+        self.choices = choices
+        self.start = start
+
+
+# Simulated annealing over load order and orientations for one truck
+class AnytimeLoader:
+    # `greedy` is (checkpoints, counts, placements) of the greedy answer, as
+    # returned by LoadingSession.truck_state
+    def __init__(self, truck, boxes, rolls, seed=0, batch_size=BATCH_SIZE,
+                 temperature=START_TEMPERATURE, cooling=COOLING, greedy=None):
+        self.truck = truck
+        self.sorted_boxes = sort_by_volume(boxes)
+        self.sorted_rolls = sort_by_volume(rolls)
+        self.types = ([("box_type", i, box) for i, box in enumerate(self.sorted_boxes)] +
+                      [("roll_type", i, roll) for i, roll in enumerate(self.sorted_rolls)])
+        self.orientations = [item_orientations(item) for _, _, item in self.types]
+        self.batch_size = batch_size
+        self.temperature = temperature
+        self.cooling = cooling
+        self.rng = random.Random(seed)
+        self.stats = {'batches': 0, 'evaluated': 0, 'screened': 0, 'accepted': 0, 'improved': 0}
+        self._stop = False
+
+        empty = truck_packer(truck)
+        self.truck_volume = empty.length * empty.width * empty.height
+        self._capacity = self._type_capacities(empty)
+        self._volumes = np.array([item['volume'] * item['quantity'] for _, _, item in self.types], dtype=float)
+
+        # Greedy start
+        start = _Candidate(list(range(len(self.types))), [ALL_ORIENTATIONS] * len(self.types), 0)
+        if greedy is not None and len(greedy[0]) == len(self.types) + 1:
+            checkpoints, counts, placements = greedy
+            snapshot, placement_count = checkpoints[-1]
+            packer = snapshot.copy(placements=False)
+            packer.placements = placements[:placement_count]
+            value = packer.used_volume
+            add_count("anytime.greedy_reused")
+        else:
+            self._checkpoints = [(empty, 0)]
+            self._counts = []
+            self._placements = []
+            value, packer, checkpoints, counts = self._evaluate(start)
+        self._accept(start, value, packer, list(checkpoints), list(counts))
+        self.greedy_value = value
+        self.best_value = value
+        self._best = (start.order, start.choices, self._counts, packer)
+
+    # Most volume each type can load, per orientation choice: (types,
+    # orientations + 1), the last column being "all orientations". A forced
+    # orientation loads at most its straight grid in the empty truck (copies
+    # of one box in one orientation never beat the grid); mixed orientations
+    # can, so "all orientations" is only capped by the quantity.
+    def _type_capacities(self, packer):
+        width = max(len(orientations) for orientations in self.orientations) + 1
+        capacity = np.zeros((len(self.types), width))
+        for t, (_, _, item) in enumerate(self.types):
+            fits = [int((packer.width + EPSILON) // dx) * int((packer.height + EPSILON) // dz) *
+                    int((packer.length + EPSILON) // dy) for _, (dx, dy, dz) in self.orientations[t]]
+            capacity[t, :len(fits)] = fits
+            capacity[t, ALL_ORIENTATIONS] = item['quantity']
+            capacity[t] = np.minimum(capacity[t], item['quantity']) * item['volume']
+        return capacity
+
+    # Upper bound on the loaded volume of each candidate, in one NumPy pass.
+    # Ranks before a candidate's first change load exactly what the current
+    # solution loads there; each later type adds at most what it loads alone,
+    # and together no more than the volume the prefix leaves free.
+    def _bounds(self, candidates):
+        ranks = np.array([np.argsort(c.order) for c in candidates])
+        choices = np.take_along_axis(np.array([c.choices for c in candidates]), ranks, axis=1)
+        per_type = np.minimum(np.take_along_axis(self._capacity, choices.T, axis=1).T, self._volumes)
+        starts = np.array([c.start for c in candidates])
+        prefix = np.concatenate([[0.0], np.cumsum(self._rank_volumes)])[starts]
+        rest = np.where(ranks >= starts[:, None], per_type, 0.0).sum(axis=1)
+        return prefix + np.minimum(rest, self.truck_volume - prefix)
+
+    # Pack a candidate from its first changed rank, keeping a checkpoint before each rank
+    def _evaluate(self, candidate):
+        start = candidate.start
+        snapshot, placement_count = self._checkpoints[start]
+        packer = snapshot.copy(placements=False)
+        packer.placements = self._placements[:placement_count]
+        checkpoints = self._checkpoints[:start]
+        counts = self._counts[:start]
+        for rank in range(start, len(candidate.order)):
+            t = candidate.order[rank]
+            prefix, index, item = self.types[t]
+            checkpoints.append((packer.copy(placements=False), len(packer.placements)))
+            choice = candidate.choices[rank]
+            orientations = self.orientations[t] if choice == ALL_ORIENTATIONS else [self.orientations[t][choice]]
+            counts.append(packer.place_many(f"{prefix}_{index+1}", orientations, item['quantity'], item['volume']))
+        checkpoints.append((packer.copy(placements=False), len(packer.placements)))
+        self.stats['evaluated'] += 1
+        add_count("anytime.candidates_evaluated")
+        return packer.used_volume, packer, checkpoints, counts
+
+    def _accept(self, candidate, value, packer, checkpoints, counts):
+        self.order = candidate.order
+        self.choices = candidate.choices
+        self.value = value
+        self._checkpoints = checkpoints
+        self._counts = counts
+        self._placements = packer.placements
+        # Volume loaded at each rank
+        self._rank_volumes = np.array([count * self.types[t][2]['volume']
+                                       for t, count in zip(candidate.order, counts)], dtype=float)
+
+    # A random neighbor: swap two ranks, move one type, or change an orientation choice
+    def _neighbor(self):
+        order = list(self.order)
+        choices = list(self.choices)
+        n = len(order)
+        move = self.rng.random()
+        if n > 1 and move < 0.35:
+            i, j = sorted(self.rng.sample(range(n), 2))
+            order[i], order[j] = order[j], order[i]
+            choices[i], choices[j] = choices[j], choices[i]
+            return _Candidate(order, choices, i)
+        if n > 1 and move < 0.6:
+            i, j = self.rng.sample(range(n), 2)
+            order.insert(j, order.pop(i))
+            choices.insert(j, choices.pop(i))
+            return _Candidate(order, choices, min(i, j))
+        i = self.rng.randrange(n)
+        options = [ALL_ORIENTATIONS] + list(range(len(self.orientations[order[i]])))
+        options.remove(choices[i])
+        choices[i] = self.rng.choice(options)
+        return _Candidate(order, choices, i)
+
+    # One batch of neighbors; returns True when the best solution improved
+    def step(self, deadline=None):
+        if not self.types:
+            return False
+        candidates = [self._neighbor() for _ in range(self.batch_size)]
+        bounds = self._bounds(candidates)
+        # Skip candidates whose bound is too far below the current value to be accepted
+        threshold = self.value - 7 * self.temperature * self.truck_volume
+        improved = False
+        # Checkpoints of the current solution are only shared with a candidate
+        # up to the first rank changed by any move accepted in this batch
+        shared = len(self.order)
+        for candidate, bound in sorted(zip(candidates, bounds), key=lambda pair: pair[0].start):
+            if bound < threshold:
+                self.stats['screened'] += 1
+                add_count("anytime.candidates_screened")
+                continue
+            if self._stop or (deadline is not None and time.perf_counter() >= deadline):
+                break
+            candidate.start = min(candidate.start, shared)
+            value, packer, checkpoints, counts = self._evaluate(candidate)
+            delta = (value - self.value) / self.truck_volume
+            if delta >= 0 or self.rng.random() < math.exp(delta / max(self.temperature, MIN_TEMPERATURE)):
+                self._accept(candidate, value, packer, checkpoints, counts)
+                shared = min(shared, candidate.start)
+                self.stats['accepted'] += 1
+                if value > self.best_value * (1 + 1e-9):
+                    self.best_value = value
+                    self._best = (candidate.order, candidate.choices, counts, packer)
+                    self.stats['improved'] += 1
+                    improved = True
+        self.temperature *= self.cooling
+        self.stats['batches'] += 1
+        return improved
+
+    # Search until `budget` seconds pass or stop() is called. `callback(loader)`
+    # is called whenever the best solution improves. Returns the incumbent.
+    def run(self, budget, callback=None):
+        self._stop = False
+        deadline = time.perf_counter() + budget
+        while not self._stop and time.perf_counter() < deadline and self.types:
+            if self.step(deadline) and callback is not None:
+                callback(self)
+        return self.incumbent
+
+    def stop(self):
+        self._stop = True
+
+    # Best solution so far, as a load_truck_3d result dict
+    @property
+    def incumbent(self):
+        order, choices, counts, packer = self._best
+        box_counts = {f"box_type_{i+1}": 0 for i in range(len(self.sorted_boxes))}
+        roll_counts = {f"roll_type_{i+1}": 0 for i in range(len(self.sorted_rolls))}
+        for t, count in zip(order, counts):
+            prefix, index, _ = self.types[t]
+            (box_counts if prefix == "box_type" else roll_counts)[f"{prefix}_{index+1}"] = count
+        result = placement_result(self.truck, packer, self.sorted_boxes, self.sorted_rolls, box_counts, roll_counts)
+        result['load_order'] = [f"{self.types[t][0]}_{self.types[t][1]+1}" for t in order]
+        return result
+
+
+# Function to improve the greedy 3D loading of every truck within `budget`
+# seconds in total. `callback(truck_index, loader)` reports each improvement
+# and `progress(done, total)` each finished truck. A 3D LoadingSession last
+# updated with the same inputs supplies the greedy starts.
+def improve_loading(trucks, boxes, rolls, budget=1.0, seed=0, callback=None, progress=None, session=None):
+    trucks = as_truck_records(trucks)
+    boxes, rolls = as_item_records(boxes), as_item_records(rolls)
+    results = []
+    deadline = time.perf_counter() + budget
+    if session is not None and (session.sorted_boxes != sort_by_volume(boxes) or
+                                session.sorted_rolls != sort_by_volume(rolls)):
+        session = None
+    for t, truck in enumerate(trucks):
+        greedy = session.truck_state(t, truck) if session is not None else None
+        loader = AnytimeLoader(truck, boxes, rolls, seed=seed + t, greedy=greedy)
+        share = max(0.0, deadline - time.perf_counter()) / (len(trucks) - t)
+        on_improve = None if callback is None else (lambda current, t=t: callback(t, current))
+        results.append(loader.run(share, on_improve))
+        if progress is not None:
+            progress(len(results), len(trucks))
+    return results
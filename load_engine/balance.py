@@ -0,0 +1,189 @@
+import math
+
+import numpy as np
+
+from .geometry import FEET_TO_INCHES
+
+# Load balance of one truck, kept as running sums (total weight and its
+# moments across and along the floor) so adding, removing or checking a roll
+# is O(1) however many rolls are already loaded.
+#
+# Floor coordinates are in inches: x across the width, y along the length
+# from the front of the load space. The truck is a beam on two axles: a load
+# w at y puts w * (y_rear - y) / (y_rear - y_front) on the front axle and the
+# rest on the rear axle. Weights are in kg.
+
+DEFAULT_LATERAL_TOLERANCE = 0.1  # Fraction of the truck width
+MIN_BLOCK = 64  # Positions checked at once by place_balanced after a rejection
+
+
+class LoadBalance:
+    def __init__(self, truck_width, truck_length, front_axle=None, rear_axle=None,
+                 max_front_axle_load=math.inf, max_rear_axle_load=math.inf,
+                 lateral_tolerance=None, longitudinal_range=None):
+        self.truck_width = truck_width
+        self.truck_length = truck_length
+        self.front_axle = 0.0 if front_axle is None else front_axle
+        self.rear_axle = truck_length if rear_axle is None else rear_axle
+        if self.rear_axle <= self.front_axle:
+            raise ValueError("The rear axle must be behind the front axle")
+        self.max_front_axle_load = max_front_axle_load
+        self.max_rear_axle_load = max_rear_axle_load
+        # Allowed distance of the center of gravity from the center line (inches)
+        self.lateral_tolerance = (DEFAULT_LATERAL_TOLERANCE * truck_width if lateral_tolerance is None
+                                  else lateral_tolerance)
+        # Allowed (min_y, max_y) of the center of gravity along the truck
+        self.longitudinal_range = longitudinal_range or (0.0, truck_length)
+        self.weight = 0.0
+        self.moment_x = 0.0
+        self.moment_y = 0.0
+        self.count = 0
+
+    # Axle loads (front, rear) after adding `weight` at y (nothing added by default)
+    def axle_loads(self, weight=0.0, y=0.0):
+        total = self.weight + weight
+        moment = self.moment_y + weight * y
+        rear = (moment - total * self.front_axle) / (self.rear_axle - self.front_axle)
+        return total - rear, rear
+
+    def center_of_gravity(self):
+        if self.weight <= 0:
+            return self.truck_width / 2, self.truck_length / 2
+        return self.moment_x / self.weight, self.moment_y / self.weight
+
+    # Whether a roll of `weight` at (x, y) keeps every limit; O(1)
+    def fits(self, weight, x, y):
+        front, rear = self.axle_loads(weight, y)
+        if front > self.max_front_axle_load + 1e-9 or rear > self.max_rear_axle_load + 1e-9:
+            return False
+        total = self.weight + weight
+        if total <= 0:
+            return True
+        cog_x = (self.moment_x + weight * x) / total
+        cog_y = (self.moment_y + weight * y) / total
+        low, high = self.longitudinal_range
+        return abs(cog_x - self.truck_width / 2) <= self.lateral_tolerance + 1e-9 and low - 1e-9 <= cog_y <= high + 1e-9
+
+    # Whether adding rolls of `weight` at (xs[0], ys[0]), (xs[1], ys[1]), ...
+    # in turn keeps every limit after each addition, for all prefixes at once.
+    # With `alone`, each roll is checked on its own against the current load.
+    def prefix_fits(self, weight, xs, ys, alone=False):
+        if alone:
+            count = np.ones(len(xs))
+            moment_x = self.moment_x + weight * np.asarray(xs, dtype=float)
+            moment_y = self.moment_y + weight * np.asarray(ys, dtype=float)
+        else:
+            count = np.arange(1, len(xs) + 1, dtype=float)
+            moment_x = self.moment_x + weight * np.cumsum(xs)
+            moment_y = self.moment_y + weight * np.cumsum(ys)
+        total = self.weight + weight * count
+        rear = (moment_y - total * self.front_axle) / (self.rear_axle - self.front_axle)
+        fits = (total - rear <= self.max_front_axle_load + 1e-9) & (rear <= self.max_rear_axle_load + 1e-9)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cog_x = moment_x / total
+            cog_y = moment_y / total
+        low, high = self.longitudinal_range
+        balanced = ((np.abs(cog_x - self.truck_width / 2) <= self.lateral_tolerance + 1e-9) &
+                    (low - 1e-9 <= cog_y) & (cog_y <= high + 1e-9))
+        return fits & (balanced | (total <= 0))
+
+    def add(self, weight, x, y):
+        self.weight += weight
+        self.moment_x += weight * x
+        self.moment_y += weight * y
+        self.count += 1
+
+    # Add rolls of `weight` at every (xs[i], ys[i])
+    def add_many(self, weight, xs, ys):
+        self.weight += weight * len(xs)
+        self.moment_x += weight * float(np.sum(xs))
+        self.moment_y += weight * float(np.sum(ys))
+        self.count += len(xs)
+
+    def remove(self, weight, x, y):
+        self.weight -= weight
+        self.moment_x -= weight * x
+        self.moment_y -= weight * y
+        self.count -= 1
+
+    # Point along the truck where the load splits in proportion to the axle limits
+    def target_y(self):
+        if math.isinf(self.max_front_axle_load) or math.isinf(self.max_rear_axle_load):
+            return sum(self.longitudinal_range) / 2
+        share = self.max_rear_axle_load / (self.max_front_axle_load + self.max_rear_axle_load)
+        target = self.front_axle + share * (self.rear_axle - self.front_axle)
+        low, high = self.longitudinal_range
+        return min(max(target, low), high)
+
+    # Order of positions (an (n, 2) or (n, 3) array) from the balance target
+    # outwards, so every prefix of the load stays close to balanced
+    def center_out(self, positions):
+        positions = np.asarray(positions, dtype=float)
+        if len(positions) == 0:
+            return np.zeros(0, dtype=np.int64)
+        dx = (positions[:, 0] - self.truck_width / 2) / self.truck_width
+        dy = (positions[:, 1] - self.target_y()) / self.truck_length
+        return np.argsort(dx * dx + dy * dy, kind="stable")
+
+    def summary(self):
+        front, rear = self.axle_loads()
+        cog_x, cog_y = self.center_of_gravity()
+        return {'front_axle_load': float(front), 'rear_axle_load': float(rear),
+                'center_of_gravity': (float(cog_x), float(cog_y)), 'rolls': self.count}
+
+
+# Load balance for a truck dict (feet) with optional axle limits:
+# 'front_axle' / 'rear_axle' positions in feet from the front of the load
+# space, 'max_front_axle_load' / 'max_rear_axle_load' in kg and
+# 'lateral_tolerance' in inches. Returns None when the truck has no limits.
+def truck_balance(truck):
+    keys = ('front_axle', 'rear_axle', 'max_front_axle_load', 'max_rear_axle_load', 'lateral_tolerance')
+    if not any(truck.get(key) is not None for key in keys):
+        return None
+    front_axle = truck.get('front_axle')
+    rear_axle = truck.get('rear_axle')
+    return LoadBalance(truck['width'] * FEET_TO_INCHES, truck['length'] * FEET_TO_INCHES,
+                       None if front_axle is None else front_axle * FEET_TO_INCHES,
+                       None if rear_axle is None else rear_axle * FEET_TO_INCHES,
+                       truck.get('max_front_axle_load') or math.inf,
+                       truck.get('max_rear_axle_load') or math.inf,
+                       truck.get('lateral_tolerance'))
+
+
+# Choose up to `quantity` positions for rolls of `weight`, center-out, adding
+# each to `balance` only when every limit still holds. Positions that would
+# break a limit are skipped and the next one is tried. Returns the indices of
+# the chosen positions, in loading order.
+#
+# Positions are checked a block at a time with NumPy: every prefix of the
+# block is accepted up to the first one that breaks a limit, then the run of
+# positions that break a limit on their own is skipped. The result is the
+# same as checking positions one by one. Blocks double while they are
+# accepted whole and start small again after a rejection.
+def place_balanced(balance, positions, weight, quantity, block=MIN_BLOCK):
+    chosen = []
+    if quantity <= 0:
+        return np.zeros(0, dtype=np.int64)
+    order = balance.center_out(positions)
+    xs = np.asarray(positions, dtype=float)[:, 0]
+    ys = np.asarray(positions, dtype=float)[:, 1]
+    start = 0
+    loaded = 0
+    size = block
+    while start < len(order) and loaded < quantity:
+        part = order[start:start + min(size, quantity - loaded)]
+        fits = balance.prefix_fits(weight, xs[part], ys[part])
+        accepted = len(part) if fits.all() else int(np.argmin(fits))
+        if accepted:
+            balance.add_many(weight, xs[part[:accepted]], ys[part[:accepted]])
+            chosen.append(part[:accepted])
+            loaded += accepted
+        start += accepted
+        if accepted == len(part):
+            size *= 2
+            continue
+        rest = part[accepted:]
+        alone = balance.prefix_fits(weight, xs[rest], ys[rest], alone=True)
+        start += len(rest) if not alone.any() else int(np.argmax(alone))
+        size = block
+    return np.concatenate(chosen) if chosen else np.zeros(0, dtype=np.int64)
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+
+from .geometry import truck_volume_inches
+from .instrument import timed
+from .loading import load_truck, load_truck_rolls, sort_by_volume
+from .placement import load_truck_3d
+from .patterns import plan_roll_loading
+
+METHODS = ("volume", "placement", "honeycomb", "selection")
+BATCH_CACHE_SIZE = 256  # Entries kept per cache table
+
+
+# Hashable key for a list of item or truck dicts
+def _key(records):
+    return tuple(tuple(sorted(record.items())) for record in records)
+
+
+# Truck key on the dimensions that drive the precomputation
+def _truck_key(truck):
+    return (truck['length'], truck['width'], truck['height'])
+
+
+# Shared caches reused across all orders of one batch. Each table keeps the
+# `maxsize` most recently used entries.
+class BatchCache:
+    def __init__(self, maxsize=BATCH_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.sorted_items = OrderedDict()
+        self.truck_volumes = OrderedDict()
+
+    # Look up `key` in `table`, or compute it and keep it (LRU eviction)
+    def _lookup(self, table, key, compute):
+        if key in table:
+            table.move_to_end(key)
+            return table[key]
+        value = table[key] = compute()
+        if len(table) > self.maxsize:
+            table.popitem(last=False)
+        return value
+
+    # Items sorted by volume, computed once per distinct item list
+    def sorted_by_volume(self, items):
+        return self._lookup(self.sorted_items, _key(items), lambda: sort_by_volume(items))
+
+    # Truck volume in cubic inches, computed once per distinct truck size
+    def truck_volume(self, truck):
+        return self._lookup(self.truck_volumes, _truck_key(truck), lambda: truck_volume_inches(truck))
+
+
+# Solve one "volume" order: {'trucks': [...], 'boxes': [...], 'rolls': [...]}
+def _solve_volume(order, cache):
+    sorted_boxes = cache.sorted_by_volume(order.get('boxes', []))
+    sorted_rolls = cache.sorted_by_volume(order.get('rolls', []))
+    return [load_truck(truck, sorted_boxes, sorted_rolls, cache.truck_volume(truck))
+            for truck in order['trucks']]
+
+
+# Solve one "placement" order: same input as "volume", with real 3D placements
+def _solve_placement(order, cache):
+    sorted_boxes = cache.sorted_by_volume(order.get('boxes', []))
+    sorted_rolls = cache.sorted_by_volume(order.get('rolls', []))
+    return [load_truck_3d(truck, sorted_boxes, sorted_rolls) for truck in order['trucks']]
+
+
+# Solve one "honeycomb" order: {'trucks': [...], 'rolls': [...]} with weights
+def _solve_honeycomb(order, cache):
+    sorted_rolls = cache.sorted_by_volume(order['rolls'])
+    return [load_truck_rolls(truck, sorted_rolls) for truck in order['trucks']]
+
+
+# Solve one "selection" order: {'trucks': [...truck_data...], 'rolls': [...roll_types...]}
+# with per-truck loading patterns, as truck_selector_feet.py does (patterns are
+# cached process-wide). None when some roll type fits in no truck.
+def _solve_selection(order, cache):
+    if not order['rolls']:
+        return []
+    return plan_roll_loading(order['trucks'], order['rolls'], geometry=True)
+
+
+_SOLVERS = {
+    "volume": _solve_volume,
+    "placement": _solve_placement,
+    "honeycomb": _solve_honeycomb,
+    "selection": _solve_selection,
+}
+
+
+# Solve many orders in one call, sharing sorted item lists and per-truck
+# precomputation across orders. Returns one result per order, in order.
+# `progress(done, total)` is called after each order.
+@timed("batch.solve")
+def solve_batch(orders, method="volume", cache=None, progress=None):
+    if method not in _SOLVERS:
+        raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+    solver = _SOLVERS[method]
+    if cache is None:
+        cache = BatchCache()
+    orders = list(orders)
+    results = []
+    for order in orders:
+        results.append(solver(order, cache))
+        if progress is not None:
+            progress(len(results), len(orders))
+    return results
@@ -0,0 +1,189 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from .catalog import ROLL
+from .instrument import register_cache, stage
+from .orientation import orientation_capacity
+
+# Truck x item capacity matrix. For every pair of a truck catalog and an item
+# catalog (load_engine.catalog arrays, inches and kg) it holds how many copies
+# of the item fit in an empty truck by volume, by weight and by geometry (the
+# best straight grid of the item in one orientation), plus the combined
+# capacity, the smallest of the three. Roll geometry comes from
+# load_engine.orientation, with the configuration kept per pair: pure
+# configurations (upright or lying honeycombs) by default, or also two-zone
+# splits with zones=True, which is slower and meant for small catalogs.
+# Everything is computed with NumPy broadcasting, a block of items at a time,
+# so 1,000 trucks x 10,000 items stays within a few hundred MB.
+#
+# Matrices are saved with np.savez under a hash of the catalog dimensions, so
+# the same catalog is only computed once, and recently used matrices are kept
+# in memory for instant lookups.
+
+CAPACITY_DTYPE = np.int32
+CAPACITY_LIMIT = np.iinfo(CAPACITY_DTYPE).max
+ITEM_BLOCK = 2048
+MEMORY_CACHE_SIZE = 8
+CACHE_DIR_ENV = "LOAD_ENGINE_CACHE_DIR"
+CACHE_VERSION = 3  # Bumped whenever a bound changes, so stale saved matrices are ignored
+
+# Axis permutations (length, width, height) of a box in the truck
+BOX_ORIENTATIONS = ((0, 1, 2), (0, 2, 1), (1, 0, 2), (1, 2, 0), (2, 0, 1), (2, 1, 0))
+
+_memory = OrderedDict()
+_hits = 0
+_misses = 0
+
+
+# Directory for saved matrices: $LOAD_ENGINE_CACHE_DIR or ~/.cache/load_engine
+def default_cache_dir():
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(os.path.expanduser("~"), ".cache", "load_engine")
+
+
+# Hash of everything capacities depend on (not names or quantities)
+def catalog_hash(trucks, items, zones=False):
+    digest = hashlib.sha256(f"capacity-v{CACHE_VERSION}-zones{int(bool(zones))}".encode())
+    for array, fields in ((trucks, ('length', 'width', 'height', 'max_weight', 'volume')),
+                          (items, ('kind', 'length', 'width', 'height', 'diameter', 'weight', 'volume'))):
+        digest.update(len(array).to_bytes(8, 'little'))
+        for field in fields:
+            digest.update(np.ascontiguousarray(array[field], dtype=float).tobytes())
+    return digest.hexdigest()
+
+
+def _clip(values):
+    values = np.where(np.isfinite(values), values, CAPACITY_LIMIT)
+    return np.clip(values, 0, CAPACITY_LIMIT).astype(CAPACITY_DTYPE)
+
+
+# Grid count of boxes (l, w, h) in a truck (L, W, H), best of all six
+# orientations. `truck` arrays are (n_trucks, 1), `box` arrays (1, n_items).
+def _box_grid(truck, box):
+    best = np.zeros(np.broadcast_shapes(truck[0].shape, box[0].shape))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for a, b, c in BOX_ORIENTATIONS:
+            fit = (np.floor(truck[0] / box[a]) * np.floor(truck[1] / box[b]) * np.floor(truck[2] / box[c]))
+            np.maximum(best, np.nan_to_num(fit, nan=0.0, posinf=0.0), out=best)
+    return best
+
+
+class CapacityMatrix:
+    def __init__(self, volume, weight, geometry, configuration=None, key=None):
+        self.volume = volume
+        self.weight = weight
+        self.geometry = geometry
+        self.capacity = np.minimum(np.minimum(volume, weight), geometry)
+        # Roll configuration of each pair (see load_engine.orientation), "" for boxes
+        self.configuration = configuration if configuration is not None else np.full(volume.shape, "")
+        self.key = key
+
+    @property
+    def shape(self):
+        return self.capacity.shape
+
+    # Combined capacity of one (truck, item) pair, or a row / block by slicing
+    def __getitem__(self, index):
+        return self.capacity[index]
+
+    # Capacities of one pair by every bound
+    def lookup(self, truck, item):
+        return {'volume': int(self.volume[truck, item]), 'weight': int(self.weight[truck, item]),
+                'geometry': int(self.geometry[truck, item]), 'capacity': int(self.capacity[truck, item]),
+                'configuration': str(self.configuration[truck, item])}
+
+    # Compute the matrices of two catalog arrays
+    @classmethod
+    def compute(cls, trucks, items, block=ITEM_BLOCK, zones=False):
+        shape = (len(trucks), len(items))
+        volume = np.empty(shape, dtype=CAPACITY_DTYPE)
+        weight = np.empty(shape, dtype=CAPACITY_DTYPE)
+        geometry = np.empty(shape, dtype=CAPACITY_DTYPE)
+        configuration = np.full(shape, "", dtype="<U32")
+        truck = tuple(trucks[field].astype(float)[:, None] for field in ('length', 'width', 'height'))
+        truck_volume = trucks['volume'].astype(float)[:, None]
+        max_weight = trucks['max_weight'].astype(float)[:, None]
+        with stage("capacity.compute"):
+            for start in range(0, len(items), block):
+                part = items[start:start + block]
+                columns = slice(start, start + len(part))
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    volume[:, columns] = _clip(np.floor(truck_volume / part['volume'].astype(float)[None, :]))
+                    weight[:, columns] = _clip(np.floor(max_weight / part['weight'].astype(float)[None, :]))
+                box = tuple(part[field].astype(float)[None, :] for field in ('length', 'width', 'height'))
+                grid = _box_grid(truck, box)
+                rolls = part['kind'] == ROLL
+                if rolls.any():
+                    counts, names = orientation_capacity(trucks, part[rolls], weight=False, zones=zones)
+                    grid[:, rolls] = counts
+                    configuration[:, np.flatnonzero(rolls) + start] = names.astype(str)
+                geometry[:, columns] = _clip(grid)
+        return cls(volume, weight, geometry, configuration)
+
+    def save(self, path):
+        np.savez(path, volume=self.volume, weight=self.weight, geometry=self.geometry,
+                 configuration=self.configuration, key=np.array(self.key or ""))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['volume'], data['weight'], data['geometry'], data['configuration'],
+                       str(data['key']) or None)
+
+    # Matrix for two catalogs from memory, then disk, computing and saving it
+    # only on a miss. cache_dir=False skips the disk cache.
+    @classmethod
+    def cached(cls, trucks, items, cache_dir=None, zones=False):
+        global _hits, _misses
+        key = catalog_hash(trucks, items, zones)
+        if key in _memory:
+            _hits += 1
+            _memory.move_to_end(key)
+            return _memory[key]
+        _misses += 1
+        path = None
+        if cache_dir is not False:
+            path = os.path.join(cache_dir or default_cache_dir(), f"capacity-{key[:32]}.npz")
+        matrix = None
+        if path is not None and os.path.exists(path):
+            try:
+                matrix = cls.load(path)
+            except (OSError, ValueError, KeyError):
+                matrix = None
+            if matrix is not None and (matrix.key != key or matrix.shape != (len(trucks), len(items))):
+                matrix = None
+        if matrix is None:
+            matrix = cls.compute(trucks, items, zones=zones)
+            matrix.key = key
+            if path is not None:
+                try:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    matrix.save(path)
+                except OSError:
+                    pass  # A read-only cache only costs the recomputation
+        _memory[key] = matrix
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+        return matrix
+
+
+# Function to get the combined truck x item capacity of two catalog arrays
+def capacity_matrix(trucks, items, cache_dir=None, zones=False):
+    return CapacityMatrix.cached(trucks, items, cache_dir, zones)
+
+
+# Hit/miss statistics of the in-memory matrix cache
+def capacity_cache_info():
+    return {'hits': _hits, 'misses': _misses, 'currsize': len(_memory), 'maxsize': MEMORY_CACHE_SIZE}
+
+
+def clear_capacity_cache():
+    global _hits, _misses
+    _memory.clear()
+    _hits = 0
+    _misses = 0
+
+
+register_cache("capacity", capacity_cache_info)
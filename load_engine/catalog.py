@@ -0,0 +1,215 @@
+import math
+import re
+
+import numpy as np
+
+from .geometry import FEET_TO_INCHES, LBS_TO_KG, METER_TO_FEET
+
+# Shared catalog model. Every length is stored in inches and every weight in
+# kilograms; values are converted once, when records are ingested. Whole
+# catalogs live in structured NumPy arrays so capacity math can be vectorized;
+# single items can use the __slots__ Item record.
+
+LENGTH_UNITS = {
+    'in': 1.0,
+    'ft': FEET_TO_INCHES,
+    'm': METER_TO_FEET * FEET_TO_INCHES,
+    'cm': METER_TO_FEET * FEET_TO_INCHES / 100,
+    'mm': METER_TO_FEET * FEET_TO_INCHES / 1000,
+}
+WEIGHT_UNITS = {'kg': 1.0, 'lb': LBS_TO_KG, 'lbs': LBS_TO_KG, 't': 1000.0}
+
+BOX = 0
+ROLL = 1
+KINDS = {'box': BOX, 'roll': ROLL}
+
+ITEM_DTYPE = np.dtype([
+    ('kind', 'u1'),
+    ('length', 'f8'),
+    ('width', 'f8'),
+    ('height', 'f8'),
+    ('diameter', 'f8'),
+    ('weight', 'f8'),
+    ('quantity', 'i4'),
+    ('volume', 'f8'),
+])
+TRUCK_DTYPE = np.dtype([
+    ('name', 'U32'),
+    ('length', 'f8'),
+    ('width', 'f8'),
+    ('height', 'f8'),
+    ('max_weight', 'f8'),
+    ('quantity', 'i4'),
+    ('volume', 'f8'),
+])
+
+# Field names used by the different scripts, mapped to catalog fields
+FIELD_ALIASES = {
+    'length': 'length',
+    'width': 'width',
+    'height': 'height',
+    'diameter': 'diameter',
+    'weight': 'weight',
+    'max weight': 'max_weight',
+    'max_weight': 'max_weight',
+    'weight capacity': 'max_weight',
+    'quantity': 'quantity',
+    'demand': 'quantity',
+    'name': 'name',
+}
+LENGTH_FIELDS = ('length', 'width', 'height', 'diameter')
+WEIGHT_FIELDS = ('weight', 'max_weight')
+
+_KEY = re.compile(r"^\s*(.*?)\s*(?:\(([^)]*)\))?\s*$")
+
+
+# Split a record key such as "Length (ft)" into (field, unit)
+def parse_key(key):
+    name, unit = _KEY.match(key).groups()
+    field = FIELD_ALIASES.get(name.lower().replace('_', ' '), FIELD_ALIASES.get(name.lower()))
+    return field, (unit.strip().lower() if unit else None)
+
+
+# Convert one record (any of the scripts' key styles) to canonical units.
+# Keys without a unit use `length_unit` / `weight_unit`; derived keys such as
+# "volume" or "Volume (m³)" are ignored and recomputed.
+def normalize_record(record, length_unit='in', weight_unit='kg'):
+    values = {}
+    for key, value in record.items():
+        field, unit = parse_key(key)
+        if field is None:
+            continue
+        if field in LENGTH_FIELDS:
+            value = float(value) * LENGTH_UNITS[unit or length_unit]
+        elif field in WEIGHT_FIELDS:
+            value = float(value) * WEIGHT_UNITS[unit or weight_unit]
+        elif field == 'quantity':
+            value = int(value)
+        values[field] = value
+    return values
+
+
+# Volume of a box or roll in cubic inches
+def item_volume(kind, length, width, height, diameter):
+    if kind == ROLL:
+        return math.pi * (diameter / 2) ** 2 * length
+    return length * width * height
+
+
+# A single item in canonical units
+class Item:
+    __slots__ = ('kind', 'length', 'width', 'height', 'diameter', 'weight', 'quantity', 'volume')
+
+    def __init__(self, kind, length, width=0.0, height=0.0, diameter=0.0, weight=0.0, quantity=1):
+        self.kind = kind
+        self.length = length
+        self.width = width
+        self.height = height
+        self.diameter = diameter
+        self.weight = weight
+        self.quantity = quantity
+        self.volume = item_volume(kind, length, width, height, diameter)
+
+    @classmethod
+    def from_record(cls, record, length_unit='in', weight_unit='kg'):
+        values = normalize_record(record, length_unit, weight_unit)
+        kind = ROLL if values.get('diameter') else BOX
+        return cls(kind, values['length'], values.get('width', 0.0), values.get('height', 0.0),
+                   values.get('diameter', 0.0), values.get('weight', 0.0), values.get('quantity', 1))
+
+    def __repr__(self):
+        name = 'roll' if self.kind == ROLL else 'box'
+        return f"Item({name}, length={self.length}, quantity={self.quantity})"
+
+
+# Build an item catalog array from box and roll records. A record with a
+# diameter is a roll, anything else a box.
+def items_from_records(records, length_unit='in', weight_unit='kg'):
+    records = list(records)
+    items = np.zeros(len(records), dtype=ITEM_DTYPE)
+    for i, record in enumerate(records):
+        values = normalize_record(record, length_unit, weight_unit)
+        kind = ROLL if values.get('diameter') else BOX
+        items[i] = (kind, values.get('length', 0.0), values.get('width', 0.0), values.get('height', 0.0),
+                    values.get('diameter', 0.0), values.get('weight', 0.0), values.get('quantity', 1), 0.0)
+    update_item_volumes(items)
+    return items
+
+
+# Recompute the volume column of an item array (vectorized)
+def update_item_volumes(items):
+    rolls = items['kind'] == ROLL
+    boxes = ~rolls
+    items['volume'][boxes] = (items['length'][boxes].astype(float) * items['width'][boxes] * items['height'][boxes])
+    items['volume'][rolls] = np.pi * (items['diameter'][rolls].astype(float) / 2) ** 2 * items['length'][rolls]
+    return items
+
+
+# Build a truck catalog array from truck records
+def trucks_from_records(records, length_unit='ft', weight_unit='kg'):
+    records = list(records)
+    trucks = np.zeros(len(records), dtype=TRUCK_DTYPE)
+    for i, record in enumerate(records):
+        values = normalize_record(record, length_unit, weight_unit)
+        trucks[i] = (values.get('name', f"Truck {i + 1}"), values['length'], values['width'], values['height'],
+                     values.get('max_weight', np.inf), values.get('quantity', 1), 0.0)
+    trucks['volume'] = trucks['length'].astype(float) * trucks['width'] * trucks['height']
+    return trucks
+
+
+# Item records in the dict format the loaders take (inches, kg)
+def items_to_records(items):
+    records = []
+    for item in items:
+        record = {'length': float(item['length']), 'weight': float(item['weight']),
+                  'quantity': int(item['quantity']), 'volume': float(item['volume'])}
+        if item['kind'] == ROLL:
+            record['diameter'] = float(item['diameter'])
+        else:
+            record['width'] = float(item['width'])
+            record['height'] = float(item['height'])
+        records.append(record)
+    return records
+
+
+# Truck records in the dict format the loaders take (feet, kg)
+def trucks_to_records(trucks):
+    return [{'name': str(truck['name']), 'length': float(truck['length']) / FEET_TO_INCHES,
+             'width': float(truck['width']) / FEET_TO_INCHES, 'height': float(truck['height']) / FEET_TO_INCHES,
+             'max_weight': float(truck['max_weight']), 'quantity': int(truck['quantity'])}
+            for truck in trucks]
+
+
+# Truck records for the loaders: a truck catalog array is converted, records
+# already in the loaders' format pass through
+def as_truck_records(trucks):
+    if isinstance(trucks, np.ndarray):
+        return trucks_to_records(trucks)
+    return trucks
+
+
+# Item records for the loaders: an item catalog array is converted, records
+# already in the loaders' format pass through
+def as_item_records(items):
+    if isinstance(items, np.ndarray):
+        return items_to_records(items)
+    return items
+
+
+# Split an item catalog array into (box records, roll records)
+def split_items(items):
+    return items_to_records(items[items['kind'] == BOX]), items_to_records(items[items['kind'] == ROLL])
+
+
+# How many of each item fit in each truck by volume: (n_trucks, n_items)
+def capacity_by_volume(trucks, items):
+    return np.floor_divide(trucks['volume'][:, None], items['volume'][None, :]).astype(np.int64)
+
+
+# How many of each item fit in each truck by weight: (n_trucks, n_items);
+# weightless items are only bounded by volume
+def capacity_by_weight(trucks, items):
+    weights = items['weight'].astype(float)
+    with np.errstate(divide='ignore'):
+        capacity = np.floor(trucks['max_weight'].astype(float)[:, None] / weights[None, :])
+    return np.where(np.isfinite(capacity), capacity, np.iinfo(np.int64).max).astype(np.int64)
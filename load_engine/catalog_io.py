@@ -0,0 +1,249 @@
+import csv
+import io
+
+import numpy as np
+
+from .catalog import (ITEM_DTYPE, LENGTH_FIELDS, LENGTH_UNITS, ROLL, TRUCK_DTYPE, WEIGHT_FIELDS, WEIGHT_UNITS,
+                      parse_key, update_item_volumes)
+
+# Bulk catalog import and report export. Catalog files (CSV, XLSX or Parquet)
+# are read in chunks of rows, and every chunk is converted column by column
+# into the catalog arrays of load_engine.catalog, with headers such as
+# "Length (ft)" or "Weight Capacity (kg)" picking the unit. Reports are
+# written row by row from generators straight into an in-memory buffer, ready
+# for st.download_button, so only the encoded file is ever held in memory.
+
+FORMATS = ("csv", "xlsx", "parquet")
+CHUNK_ROWS = 65536
+XLSX_MAX_ROWS = 1048576
+
+SUMMARY_COLUMNS = ("Truck Type", "Item", "Count", "Additional Count", "Remaining Volume (in³)")
+PLACEMENT_COLUMNS = ("Truck Type", "Item", "X (in)", "Y (in)", "Z (in)", "DX (in)", "DY (in)", "DZ (in)",
+                     "Orientation")
+
+# Parquet column types of the report columns; other columns are written as strings
+COLUMN_TYPES = {
+    "Truck Type": "string", "Item": "string", "Orientation": "string",
+    "Count": "int64", "Additional Count": "int64",
+    "Remaining Volume (in³)": "float64", "X (in)": "float64", "Y (in)": "float64", "Z (in)": "float64",
+    "DX (in)": "float64", "DY (in)": "float64", "DZ (in)": "float64",
+}
+
+
+# File format from an explicit name, or the extension of a path / uploaded file
+def file_format(source, format=None):
+    if format is not None:
+        format = format.lower()
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format {format!r}, expected one of {FORMATS}")
+        return format
+    name = str(getattr(source, 'name', source if isinstance(source, str) else "")).lower()
+    if name.endswith((".xlsx", ".xlsm")):
+        return "xlsx"
+    if name.endswith((".parquet", ".pq")):
+        return "parquet"
+    return "csv"
+
+
+# Chunks of a CSV file as {header: column array}
+def _csv_chunks(source, chunk_rows):
+    import pandas as pd
+
+    for chunk in pd.read_csv(source, chunksize=chunk_rows):
+        yield {header: chunk[header].to_numpy() for header in chunk.columns}
+
+
+# Chunks of the first sheet of an XLSX workbook, read row by row in read-only mode
+def _xlsx_chunks(source, chunk_rows):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ImportError("Reading XLSX catalogs needs openpyxl: pip install openpyxl") from e
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        # Columns without a header are skipped, keeping each header on its own column
+        headers = [(index, header) for index, header in enumerate(next(rows, ())) if header is not None]
+        block = []
+        for row in rows:
+            if any(value is not None for value in row):
+                block.append(tuple(row[index] if index < len(row) else None for index, _ in headers))
+            if len(block) == chunk_rows:
+                yield _transpose(headers, block)
+                block = []
+        if block:
+            yield _transpose(headers, block)
+    finally:
+        workbook.close()
+
+
+def _transpose(headers, block):
+    columns = list(zip(*block)) if block else [() for _ in headers]
+    return {header: np.array(column, dtype=object) for (_, header), column in zip(headers, columns)}
+
+
+# Chunks of a Parquet file, one record batch at a time
+def _parquet_chunks(source, chunk_rows):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet catalogs needs pyarrow: pip install pyarrow") from e
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+        yield {name: column.to_numpy(zero_copy_only=False) for name, column in zip(batch.schema.names, batch.columns)}
+
+
+CHUNK_READERS = {"csv": _csv_chunks, "xlsx": _xlsx_chunks, "parquet": _parquet_chunks}
+
+
+# Column as floats, NaN where a cell is empty
+def _numbers(values):
+    values = np.asarray(values)
+    if values.dtype == object:
+        values = np.array([np.nan if value is None or value == "" else value for value in values], dtype=float)
+    return values.astype(float)
+
+
+# Convert one chunk of columns into a catalog array in canonical units
+def _chunk_to_array(columns, dtype, length_unit, weight_unit, offset):
+    size = len(next(iter(columns.values()), ()))
+    array = np.zeros(size, dtype=dtype)
+    if 'quantity' in dtype.names:
+        array['quantity'] = 1
+    if 'max_weight' in dtype.names:
+        array['max_weight'] = np.inf
+    if 'name' in dtype.names:
+        array['name'] = [f"Truck {offset + i + 1}" for i in range(size)]
+    # A field may come in several columns (say "Length (ft)" and "Length (m)");
+    # empty cells never overwrite a value
+    for header, values in columns.items():
+        field, unit = parse_key(str(header))
+        if field is None or field not in dtype.names:
+            continue
+        if field == 'name':
+            names = np.asarray(values, dtype=object)
+            given = np.array([value is not None and value == value and value != "" for value in names], dtype=bool)
+            array['name'][given] = names[given].astype(str)
+            continue
+        values = _numbers(values)
+        given = ~np.isnan(values)
+        if field in LENGTH_FIELDS:
+            values = values * LENGTH_UNITS[unit or length_unit]
+        elif field in WEIGHT_FIELDS:
+            values = values * WEIGHT_UNITS[unit or weight_unit]
+        array[field][given] = values[given]
+    return array
+
+
+def _read_catalog(source, dtype, format, length_unit, weight_unit, chunk_rows):
+    chunks = []
+    offset = 0
+    for columns in CHUNK_READERS[file_format(source, format)](source, chunk_rows):
+        chunks.append(_chunk_to_array(columns, dtype, length_unit, weight_unit, offset))
+        offset += len(chunks[-1])
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=dtype)
+
+
+# Reject catalogs with rows of no volume (a missing or zero dimension), which
+# no loader can place
+def _check_volumes(array, what):
+    empty = np.flatnonzero(~(array['volume'] > 0))
+    if len(empty):
+        rows = ", ".join(str(row + 2) for row in empty[:5]) + (", ..." if len(empty) > 5 else "")
+        raise ValueError(f"{len(empty)} {what} rows have a missing or zero dimension (file rows {rows})")
+    return array
+
+
+# Function to read a box / roll catalog file into an item array. Rows with a
+# diameter are rolls, the others boxes; headers without a unit use
+# `length_unit` / `weight_unit`.
+def read_items(source, format=None, length_unit='in', weight_unit='kg', chunk_rows=CHUNK_ROWS):
+    items = _read_catalog(source, ITEM_DTYPE, format, length_unit, weight_unit, chunk_rows)
+    items['kind'] = np.where(items['diameter'] > 0, ROLL, items['kind'])
+    return _check_volumes(update_item_volumes(items), "item")
+
+
+# Function to read a truck catalog file into a truck array (feet by default)
+def read_trucks(source, format=None, length_unit='ft', weight_unit='kg', chunk_rows=CHUNK_ROWS):
+    trucks = _read_catalog(source, TRUCK_DTYPE, format, length_unit, weight_unit, chunk_rows)
+    trucks['volume'] = trucks['length'] * trucks['width'] * trucks['height']
+    return _check_volumes(trucks, "truck")
+
+
+def _write_csv(rows, columns, buffer, chunk_rows):
+    text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    text.flush()
+    text.detach()
+
+
+def _write_xlsx(rows, columns, buffer, chunk_rows):
+    try:
+        from openpyxl import Workbook
+    except ImportError as e:
+        raise ImportError("Writing XLSX reports needs openpyxl: pip install openpyxl") from e
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Report")
+    sheet.append(columns)
+    for written, row in enumerate(rows, start=2):
+        if written > XLSX_MAX_ROWS:
+            raise ValueError(f"XLSX sheets hold at most {XLSX_MAX_ROWS} rows; export as CSV or Parquet instead")
+        sheet.append(row)
+    workbook.save(buffer)
+
+
+def _write_parquet(rows, columns, buffer, chunk_rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Writing Parquet reports needs pyarrow: pip install pyarrow") from e
+    # The schema is declared up front, so a chunk starting with empty cells
+    # cannot change a column's type
+    schema = pa.schema([(name, pa.type_for_alias(COLUMN_TYPES.get(name, "string"))) for name in columns])
+    writer = pq.ParquetWriter(buffer, schema)
+    rows = iter(rows)
+    while True:
+        block = [row for _, row in zip(range(chunk_rows), rows)]
+        if block:
+            arrays = [pa.array(column, type=field.type) for field, column in zip(schema, zip(*block))]
+            writer.write_table(pa.table(arrays, schema=schema))
+        if len(block) < chunk_rows:
+            break
+    writer.close()
+
+
+WRITERS = {"csv": _write_csv, "xlsx": _write_xlsx, "parquet": _write_parquet}
+MIME_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+# Function to write rows (an iterable of tuples, consumed once) as a CSV,
+# XLSX or Parquet file; returns the file contents as bytes
+def export_rows(rows, columns, format="csv", chunk_rows=CHUNK_ROWS):
+    buffer = io.BytesIO()
+    WRITERS[file_format(None, format)](rows, list(columns), buffer, chunk_rows)
+    return buffer.getvalue()
+
+
+# Load summary rows of V8-style results: one row per truck type and item type
+def summary_rows(results):
+    for t, result in enumerate(results):
+        truck_type = f"Truck Type {t + 1}"
+        for counts, additional in ((result['box_counts'], result.get('additional_boxes', {})),
+                                   (result['roll_counts'], result.get('additional_rolls', {}))):
+            for item, count in counts.items():
+                yield truck_type, item, count, additional.get(item), result['remaining_volume']
+
+
+# Placement rows of V8-style results: one row per placed item
+def placement_rows(results):
+    for t, result in enumerate(results):
+        truck_type = f"Truck Type {t + 1}"
+        for placement in result.get('placements', ()):
+            yield (truck_type, placement['item'], placement['x'], placement['y'], placement['z'],
+                   placement['dx'], placement['dy'], placement['dz'], placement['orientation'])
@@ -0,0 +1,158 @@
+import math
+
+import numpy as np
+
+from .honeycomb import honeycomb_lattice
+from .instrument import add_count
+
+# Mixed-diameter circle packing on one truck floor (top view of upright rolls).
+# Placed circles are kept in a uniform spatial hash grid: each circle is
+# registered in every cell its bounding box touches, so a collision check only
+# looks at the few cells under the new circle's bounding box, O(1) on average.
+#
+# Circles of one diameter are placed by scanning candidate centers bottom-left
+# first (from the front of the truck, then across), on a grid stepping d/2
+# across and d * sqrt(3) / 4 along the truck. That grid contains the honeycomb
+# of diameter d, so a single diameter packs as densely as the honeycomb, and
+# smaller diameters can still drop into gaps left by larger ones. On an empty
+# floor the scan result is known in advance (load_engine.honeycomb), so the
+# first diameter, and any later pack of the same diameter, takes the cached
+# lattice; its circles enter the spatial hash only once another diameter,
+# a removal or a collision check needs them.
+#
+# Coordinates are circle centers in inches: x across the width, y along the length.
+
+EPSILON = 1e-9
+
+
+class CirclePacker:
+    # `cell_size` should be about the smallest diameter that will be packed
+    def __init__(self, width, length, cell_size):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.width = width
+        self.length = length
+        self.cell_size = cell_size
+        self.cells = {}
+        self.circles = []  # (x, y, radius), None once removed
+        self.checks = 0
+        self._lattice = None  # [diameter, centers, next center] while only the lattice is placed
+        self._pending = []  # Lattice circles not yet in the spatial hash
+
+    def _cell_range(self, x, y, radius):
+        cell = self.cell_size
+        return (range(int((x - radius) // cell), int((x + radius) // cell) + 1),
+                range(int((y - radius) // cell), int((y + radius) // cell) + 1))
+
+    # Whether a circle fits inside the floor without overlapping a placed one
+    def fits(self, x, y, radius):
+        if self._pending:
+            self._sync()
+        if (x - radius < -EPSILON or y - radius < -EPSILON or
+                x + radius > self.width + EPSILON or y + radius > self.length + EPSILON):
+            return False
+        columns, rows = self._cell_range(x, y, radius)
+        cells = self.cells
+        circles = self.circles
+        for i in columns:
+            for j in rows:
+                for index in cells.get((i, j), ()):
+                    self.checks += 1
+                    other_x, other_y, other_radius = circles[index]
+                    reach = radius + other_radius - EPSILON
+                    dx = x - other_x
+                    dy = y - other_y
+                    if dx * dx + dy * dy < reach * reach:
+                        return False
+        return True
+
+    def add(self, x, y, radius):
+        self._lattice = None
+        index = len(self.circles)
+        self.circles.append((x, y, radius))
+        self._register(index)
+        return index
+
+    def _register(self, index):
+        x, y, radius = self.circles[index]
+        columns, rows = self._cell_range(x, y, radius)
+        for i in columns:
+            for j in rows:
+                self.cells.setdefault((i, j), []).append(index)
+
+    # Put lattice circles into the spatial hash
+    def _sync(self):
+        pending, self._pending = self._pending, []
+        for index in pending:
+            self._register(index)
+
+    def remove(self, index):
+        self._lattice = None
+        self._sync()
+        x, y, radius = self.circles[index]
+        columns, rows = self._cell_range(x, y, radius)
+        for i in columns:
+            for j in rows:
+                self.cells[(i, j)].remove(index)
+        self.circles[index] = None
+
+    # Place up to `count` circles of `diameter`, bottom-left first. Returns the
+    # indices of the placed circles.
+    def pack(self, diameter, count):
+        radius = diameter / 2
+        step_x = diameter / 2
+        step_y = diameter * math.sqrt(3) / 4
+        placed = []
+        if count <= 0 or diameter > min(self.width, self.length) + EPSILON:
+            return placed
+        if not self.circles or (self._lattice is not None and self._lattice[0] == diameter):
+            return self._pack_lattice(diameter, count)
+        self._lattice = None
+        columns = int((self.width - diameter) // step_x + EPSILON) + 1
+        rows = int((self.length - diameter) // step_y + EPSILON) + 1
+        checks = self.checks
+        for row in range(rows):
+            y = radius + row * step_y
+            for column in range(columns):
+                x = radius + column * step_x
+                if self.fits(x, y, radius):
+                    placed.append(self.add(x, y, radius))
+                    if len(placed) == count:
+                        add_count("circles.collision_checks", self.checks - checks)
+                        return placed
+        add_count("circles.collision_checks", self.checks - checks)
+        return placed
+
+    # Next `count` centers of the honeycomb lattice, as the scan would place them
+    def _pack_lattice(self, diameter, count):
+        if self._lattice is None:
+            self._lattice = [diameter, honeycomb_lattice(self.width, self.length, diameter), 0]
+        _, lattice, start = self._lattice
+        end = len(lattice) if count >= len(lattice) - start else start + int(count)
+        first = len(self.circles)
+        radius = diameter / 2
+        self.circles.extend((x, y, radius) for x, y in lattice[start:end].tolist())
+        self._lattice[2] = end
+        placed = list(range(first, len(self.circles)))
+        self._pending.extend(placed)
+        add_count("circles.lattice_placed", len(placed))
+        return placed
+
+    def centers(self, indices):
+        return np.array([self.circles[index][:2] for index in indices], dtype=float).reshape(-1, 2)
+
+
+# Function to pack several roll types into one floor, larger diameters first.
+# `rolls` are (diameter, count) pairs in inches; returns one (n, 2) array of
+# centers per roll type, in input order.
+def pack_circles(width, length, rolls):
+    diameters = [diameter for diameter, count in rolls if count > 0 and diameter > 0]
+    if not diameters:
+        return [np.zeros((0, 2)) for _ in rolls]
+    packer = CirclePacker(width, length, min(diameters))
+    centers = [np.zeros((0, 2)) for _ in rolls]
+    for i in sorted(range(len(rolls)), key=lambda i: -rolls[i][0]):
+        diameter, count = rolls[i]
+        if count > 0 and diameter > 0:
+            centers[i] = packer.centers(packer.pack(diameter, count))
+    return centers
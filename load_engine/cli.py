@@ -0,0 +1,200 @@
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import solve_batch
+from .catalog import LENGTH_UNITS, items_from_records, split_items, trucks_from_records, trucks_to_records
+
+# Order files have one row per truck, box or roll type:
+#   shipment_id, record, length, width, height, diameter, weight, max_weight, quantity
+# `record` is "truck", "box" or "roll". Truck dimensions are in feet, box and
+# roll dimensions in inches, weights in kg (as in V8.py / V9.py); each shipment
+# is converted once through load_engine.catalog. Rows of one
+# shipment must be contiguous; shipments are never held in memory after they
+# have been handed to a worker. The "selection" method turns each shipment into
+# a truck table and roll types (meters) as in truck_selector_feet.py.
+
+NUMBER_FIELDS = ("length", "width", "height", "diameter", "weight", "max_weight")
+ORDER_LISTS = {"truck": "trucks", "box": "boxes", "roll": "rolls"}
+
+
+# Read rows of a CSV file one at a time
+def _read_csv(path):
+    with open(path, newline="") as f:
+        yield from csv.DictReader(f)
+
+
+# Read rows of a Parquet file in record batches
+def _read_parquet(path, batch_rows):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet order files needs pyarrow: pip install pyarrow") from e
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+        yield from batch.to_pylist()
+
+
+# Stream rows from an order file, picking the reader from the file extension
+def read_rows(path, batch_rows=65536):
+    if path.lower().endswith((".parquet", ".pq")):
+        return _read_parquet(path, batch_rows)
+    return _read_csv(path)
+
+
+# Convert one input row into a truck, box or roll record
+def _parse_row(row):
+    kind = row['record'].strip().lower()
+    if kind not in ORDER_LISTS:
+        raise ValueError(f"Unknown record type {row['record']!r} for shipment {row['shipment_id']}")
+    record = {}
+    for field in NUMBER_FIELDS:
+        value = row.get(field)
+        # A diameter is what makes an item a roll
+        if value not in (None, "") and not (kind == "box" and field == "diameter"):
+            record[field] = float(value)
+    record['quantity'] = int(float(row.get('quantity') or 1))
+    return kind, record
+
+
+# Loader records of one shipment, converted through the catalog
+def _shipment_order(shipment_id, records):
+    trucks = trucks_from_records(records['trucks'])
+    items = items_from_records(records['boxes'] + records['rolls'])
+    if not ((trucks['volume'] > 0).all() and (items['volume'] > 0).all()):
+        raise ValueError(f"Shipment {shipment_id} has a truck, box or roll with a missing or zero dimension")
+    boxes, rolls = split_items(items)
+    return {'trucks': trucks_to_records(trucks), 'boxes': boxes, 'rolls': rolls}
+
+
+# Group contiguous rows into shipments: (shipment_id, {'trucks', 'boxes', 'rolls'})
+def iter_shipments(rows):
+    current_id = None
+    order = None
+    for row in rows:
+        shipment_id = str(row['shipment_id'])
+        if shipment_id != current_id:
+            if order is not None:
+                yield current_id, _shipment_order(current_id, order)
+            current_id = shipment_id
+            order = {'trucks': [], 'boxes': [], 'rolls': []}
+        kind, record = _parse_row(row)
+        order[ORDER_LISTS[kind]].append(record)
+    if order is not None:
+        yield current_id, _shipment_order(current_id, order)
+
+
+# Group shipments into chunks handed to one worker task
+def iter_chunks(shipments, chunk_size):
+    chunk = []
+    for shipment in shipments:
+        chunk.append(shipment)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# Truck table and roll types of one shipment for the "selection" method
+def _selection_order(order):
+    trucks = [{"Name": truck['name'], "Length (ft)": truck['length'], "Width (ft)": truck['width'],
+               "Height (ft)": truck['height'], "Weight Capacity (kg)": truck['max_weight']}
+              for truck in order['trucks']]
+    inches_to_meters = 1 / LENGTH_UNITS['m']
+    rolls = [{"Diameter": roll['diameter'] * inches_to_meters, "Length": roll['length'] * inches_to_meters,
+              "Weight": roll['weight'], "Quantity": roll['quantity']} for roll in order['rolls']]
+    return {'trucks': trucks, 'rolls': rolls}
+
+
+# JSON-friendly summary of one truck result
+def _summarize(result, placements=False):
+    summary = {key: value for key, value in result.items()
+               if key not in ('truck', 'positions', 'placements', 'layout')}
+    summary['truck'] = {key: result['truck'][key] for key in ('length', 'width', 'height') if key in result['truck']}
+    if placements and 'placements' in result:
+        summary['placements'] = result['placements']
+    if placements and 'layout' in result:
+        summary['layout'] = [{'label': layer['label'], 'diameter': layer['diameter'],
+                              'positions': layer['positions'].tolist()} for layer in result['layout']]
+    return summary
+
+
+# Replace non-finite numbers (a truck without a weight limit) with None, so
+# the output stays strict JSON
+def _finite(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+# Worker task: solve a chunk of shipments
+def _solve_chunk(chunk, method, placements):
+    ids = [shipment_id for shipment_id, _ in chunk]
+    if method == "selection":
+        results = solve_batch([_selection_order(order) for _, order in chunk], method=method)
+        return [{'shipment_id': shipment_id, 'selection': selection} for shipment_id, selection in zip(ids, results)]
+    results = solve_batch([order for _, order in chunk], method=method)
+    return [{'shipment_id': shipment_id, 'trucks': [_summarize(result, placements) for result in trucks]}
+            for shipment_id, trucks in zip(ids, results)]
+
+
+# Stream shipments through a process pool and write JSON lines as chunks finish.
+# At most `max_pending` chunks are in flight, so memory is bounded by the chunk
+# size rather than the file size. Results keep the input order.
+def run_batch(rows, out, method="placement", chunk_size=256, workers=None, placements=False, max_pending=None):
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    pending = deque()
+    shipments = 0
+
+    def write(future):
+        nonlocal shipments
+        for line in future.result():
+            out.write(json.dumps(_finite(line), allow_nan=False) + "\n")
+            shipments += 1
+        out.flush()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in iter_chunks(iter_shipments(rows), chunk_size):
+            pending.append(pool.submit(_solve_chunk, chunk, method, placements))
+            if len(pending) >= max_pending:
+                write(pending.popleft())
+        while pending:
+            write(pending.popleft())
+    return shipments
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m load_engine",
+                                     description="Plan truck loads for every shipment in a CSV or Parquet order file.")
+    parser.add_argument("input", help="order file (.csv or .parquet)")
+    parser.add_argument("-o", "--output", default="-", help="JSON lines output file (default: stdout)")
+    parser.add_argument("--method", default="placement", choices=("placement", "volume", "honeycomb", "selection"),
+                        help="loading logic: 3D placement or volume fit (V8), honeycomb rolls (V9), "
+                             "truck selection for the rolls (truck_selector_feet.py)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="shipments per worker task")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-rows", type=int, default=65536, help="rows per Parquet read batch")
+    parser.add_argument("--placements", action="store_true", help="include 3D placements / roll layouts in the output")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    rows = read_rows(args.input, args.batch_rows)
+    if args.output == "-":
+        count = run_batch(rows, sys.stdout, args.method, args.chunk_size, args.workers, args.placements)
+    else:
+        with open(args.output, "w") as out:
+            count = run_batch(rows, out, args.method, args.chunk_size, args.workers, args.placements)
+    print(f"Planned {count} shipments", file=sys.stderr)
+    return 0
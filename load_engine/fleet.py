@@ -0,0 +1,301 @@
+import math
+import random
+
+from .catalog import as_item_records, as_truck_records
+from .geometry import truck_volume_inches
+from .instrument import add_count, timed
+from .loading import sort_by_volume
+from .placement import item_orientations, truck_packer
+
+# Fleet-wide allocation. Every truck type is expanded into `quantity`
+# physical trucks, and item types are assigned largest first, consuming the
+# shared inventory, so an item loaded on one truck is no longer available to
+# the next. Residual truck volumes are indexed so finding a truck for an item
+# takes a tree search instead of a scan of all m trucks, and all copies of an
+# item type that fit a truck are assigned to it in one step.
+#
+# Trucks are in feet and items in inches, as in V8.py, or load_engine.catalog
+# arrays; weights (optional 'weight' on items and 'max_weight' on trucks) are
+# in kg.
+
+EPSILON = 1e-9
+STRATEGIES = ("first_fit", "best_fit")
+
+
+# Max segment tree over residual truck volumes and weights. first_fit finds
+# the left-most truck (from `start`) that has at least `volume` and `weight`
+# left; subtrees whose best volume or best weight is too small are skipped.
+# The answer is exact, but the two maxima are kept separately, so a subtree
+# can pass both checks through different trucks without any truck fitting:
+# the search is O(log m) when weight never binds (no weight limits) and can
+# visit more of the tree when it does.
+class ResidualTree:
+    def __init__(self, volumes, weights):
+        self.n = len(volumes)
+        self.size = 1
+        while self.size < max(1, self.n):
+            self.size *= 2
+        self.volume = [-math.inf] * (2 * self.size)
+        self.weight = [-math.inf] * (2 * self.size)
+        self.volume[self.size:self.size + self.n] = volumes
+        self.weight[self.size:self.size + self.n] = weights
+        for node in range(self.size - 1, 0, -1):
+            self.volume[node] = max(self.volume[2 * node], self.volume[2 * node + 1])
+            self.weight[node] = max(self.weight[2 * node], self.weight[2 * node + 1])
+
+    # Residual (volume, weight) of one truck
+    def __getitem__(self, index):
+        return self.volume[self.size + index], self.weight[self.size + index]
+
+    def update(self, index, volume, weight):
+        node = self.size + index
+        self.volume[node] = volume
+        self.weight[node] = weight
+        node //= 2
+        while node:
+            self.volume[node] = max(self.volume[2 * node], self.volume[2 * node + 1])
+            self.weight[node] = max(self.weight[2 * node], self.weight[2 * node + 1])
+            node //= 2
+
+    def first_fit(self, volume, weight=0.0, start=0):
+        return self._find(1, 0, self.size, start, volume - EPSILON, weight - EPSILON)
+
+    def _find(self, node, lo, hi, start, volume, weight):
+        if hi <= start or self.volume[node] < volume or self.weight[node] < weight:
+            return -1
+        if hi - lo == 1:
+            return lo
+        mid = (lo + hi) // 2
+        found = self._find(2 * node, lo, mid, start, volume, weight)
+        if found == -1:
+            found = self._find(2 * node + 1, mid, hi, start, volume, weight)
+        return found
+
+    # Trucks in index order that fit, one O(log m) search each
+    def candidates(self, volume, weight=0.0):
+        b = self.first_fit(volume, weight)
+        while b != -1:
+            yield b
+            b = self.first_fit(volume, weight, b + 1)
+
+
+# Treap of trucks ordered by (residual volume, index), each subtree keeping
+# its largest residual weight. tightest_fit finds the truck with the least
+# volume of at least `volume` that also has `weight` left, in O(log m)
+# expected: subtrees wholly above the volume bound are entered only when
+# their best weight fits, and then always hold a match. Nodes are truck
+# indices; -1 is the empty tree.
+class BestFitIndex:
+    def __init__(self, volumes, weights, seed=0):
+        n = len(volumes)
+        self.volumes = list(volumes)
+        self.weights = list(weights)
+        generator = random.Random(seed)
+        self.priority = [generator.random() for _ in range(n)]
+        self.left = [-1] * n
+        self.right = [-1] * n
+        self.best = list(self.weights)
+        self.root = -1
+        for index in sorted(range(n), key=lambda index: (self.volumes[index], index)):
+            self.root = self._merge(self.root, index)
+
+    def __getitem__(self, index):
+        return self.volumes[index], self.weights[index]
+
+    def _key(self, node):
+        return self.volumes[node], node
+
+    def _pull(self, node):
+        best = self.weights[node]
+        for child in (self.left[node], self.right[node]):
+            if child != -1 and self.best[child] > best:
+                best = self.best[child]
+        self.best[node] = best
+
+    # Split into (keys < key, keys >= key)
+    def _split(self, node, key):
+        if node == -1:
+            return -1, -1
+        if self._key(node) < key:
+            self.right[node], rest = self._split(self.right[node], key)
+            self._pull(node)
+            return node, rest
+        rest, self.left[node] = self._split(self.left[node], key)
+        self._pull(node)
+        return rest, node
+
+    # Merge two treaps, every key of `a` below every key of `b`
+    def _merge(self, a, b):
+        if a == -1 or b == -1:
+            return a if b == -1 else b
+        if self.priority[a] > self.priority[b]:
+            self.right[a] = self._merge(self.right[a], b)
+            self._pull(a)
+            return a
+        self.left[b] = self._merge(a, self.left[b])
+        self._pull(b)
+        return b
+
+    # Nodes from the root down to `index`, or to where a node of this key and
+    # priority goes
+    def _path(self, index):
+        volumes, priorities = self.volumes, self.priority
+        volume = volumes[index]
+        priority = priorities[index]
+        path = []
+        node = self.root
+        while node != -1 and node != index and priorities[node] > priority:
+            path.append(node)
+            if volume < volumes[node] or (volume == volumes[node] and index < node):
+                node = self.left[node]
+            else:
+                node = self.right[node]
+        return path, node
+
+    # Link `subtree` where the key of `index` goes below the end of `path`
+    def _link(self, path, index, subtree):
+        if not path:
+            self.root = subtree
+        elif self._key(index) < self._key(path[-1]):
+            self.left[path[-1]] = subtree
+        else:
+            self.right[path[-1]] = subtree
+
+    # Move a truck to its new key: unlink it by merging its children, then
+    # relink it where its priority puts it, splitting the subtree below
+    def update(self, index, volume, weight):
+        path, _ = self._path(index)
+        self._link(path, index, self._merge(self.left[index], self.right[index]))
+        # Best weights only change up to the first ancestor they leave alone
+        for node in reversed(path):
+            best = self.best[node]
+            self._pull(node)
+            if self.best[node] == best:
+                break
+        self.volumes[index] = volume
+        self.weights[index] = weight
+        path, node = self._path(index)
+        self.left[index], self.right[index] = self._split(node, self._key(index))
+        self._pull(index)
+        self._link(path, index, index)
+        for node in reversed(path):
+            if self.best[node] >= self.best[index]:
+                break
+            self.best[node] = self.best[index]
+
+    # Smallest key >= `key` whose truck has `weight` left, or -1
+    def _first(self, node, key, weight):
+        if node == -1 or self.best[node] < weight:
+            return -1
+        if self._key(node) >= key:
+            found = self._first(self.left[node], key, weight)
+            if found != -1:
+                return found
+            if self.weights[node] >= weight:
+                return node
+        return self._first(self.right[node], key, weight)
+
+    def tightest_fit(self, volume, weight=0.0):
+        return self._first(self.root, (volume - EPSILON, -1), weight - EPSILON)
+
+    # Trucks that fit, from the tightest volume upwards, one O(log m) search
+    # each; a truck whose residual shrank after it was yielded is skipped
+    def candidates(self, volume, weight=0.0):
+        b = self.tightest_fit(volume, weight)
+        while b != -1:
+            key = (self.volumes[b], b + 1)
+            yield b
+            b = self._first(self.root, key, weight - EPSILON)
+
+
+# One physical truck during allocation
+class _FleetTruck:
+    def __init__(self, type_index, unit, truck, geometry):
+        self.type_index = type_index
+        self.unit = unit
+        self.truck = truck
+        self.volume = truck_volume_inches(truck)
+        self.max_weight = truck.get('max_weight', math.inf)
+        self.packer = truck_packer(truck) if geometry else None
+        self.counts = {}
+
+    # Load up to `quantity` copies of an item into the residual (volume,
+    # weight); returns how many were loaded
+    def load(self, key, item, quantity, volume, weight):
+        fit = min(quantity, int((volume + EPSILON) // item['volume']))
+        if item.get('weight', 0) > 0 and weight != math.inf:
+            fit = min(fit, int((weight + EPSILON) // item['weight']))
+        if fit <= 0:
+            return 0
+        if self.packer is not None:
+            fit = self.packer.place_many(key, item_orientations(item), fit, item['volume'])
+        if fit:
+            self.counts[key] = self.counts.get(key, 0) + fit
+        return fit
+
+
+# Function to allocate boxes and rolls over the whole fleet. `strategy` is
+# "first_fit" (left-most truck, trucks in input order) or "best_fit" (truck
+# with the least residual volume that still fits); `geometry=True` also checks
+# real 3D placements. Returns per-truck loads and what could not be loaded.
+@timed("fleet.allocate")
+def allocate_fleet(trucks, boxes, rolls, strategy="first_fit", geometry=False):
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+    trucks = as_truck_records(trucks)
+    boxes, rolls = as_item_records(boxes), as_item_records(rolls)
+    fleet = [_FleetTruck(t, unit, truck, geometry)
+             for t, truck in enumerate(trucks) for unit in range(int(truck.get('quantity', 1)))]
+    volumes = [truck.volume for truck in fleet]
+    weights = [truck.max_weight for truck in fleet]
+    index = ResidualTree(volumes, weights) if strategy == "first_fit" else BestFitIndex(volumes, weights)
+
+    # Largest items first across boxes and rolls; keys keep V8's per-list numbering
+    items = ([(f"box_type_{i+1}", box) for i, box in enumerate(sort_by_volume(boxes))] +
+             [(f"roll_type_{i+1}", roll) for i, roll in enumerate(sort_by_volume(rolls))])
+    items.sort(key=lambda pair: pair[1]['volume'], reverse=True)
+
+    unallocated = {}
+    for key, item in items:
+        left = int(item['quantity'])
+        if item['volume'] <= 0:
+            unallocated[key] = left
+            continue
+        item_weight = item.get('weight', 0)
+        for b in index.candidates(item['volume'], item_weight):
+            truck = fleet[b]
+            volume, weight = index[b]
+            loaded = truck.load(key, item, left, volume, weight)
+            if loaded:
+                left -= loaded
+                if geometry:
+                    volume = truck.volume - truck.packer.used_volume
+                else:
+                    volume -= loaded * item['volume']
+                index.update(b, volume, weight - loaded * item_weight)
+                add_count("fleet.assignments")
+            if left == 0:
+                break
+        unallocated[key] = left
+    return _fleet_result(fleet, index, unallocated)
+
+
+def _fleet_result(fleet, index, unallocated):
+    loads = []
+    for b, truck in enumerate(fleet):
+        loads.append({
+            'truck_type': truck.type_index + 1,
+            'unit': truck.unit + 1,
+            'truck': truck.truck,
+            'box_counts': {key: count for key, count in truck.counts.items() if key.startswith("box_type")},
+            'roll_counts': {key: count for key, count in truck.counts.items() if key.startswith("roll_type")},
+            'remaining_volume': index[b][0],
+            'remaining_weight': index[b][1],
+            'placements': truck.packer.placements if truck.packer is not None else []
+        })
+    return {
+        'trucks': loads,
+        'trucks_used': sum(1 for load in loads if load['box_counts'] or load['roll_counts']),
+        'unallocated_boxes': {key: left for key, left in unallocated.items() if key.startswith("box_type")},
+        'unallocated_rolls': {key: left for key, left in unallocated.items() if key.startswith("roll_type")},
+    }
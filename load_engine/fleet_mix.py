@@ -0,0 +1,184 @@
+import math
+import threading
+import time
+
+from .instrument import stage, timed
+
+# Truck types are {name: (length, width, height)} in feet. Cartons are dicts
+# with "Demand" and "Volume" (cubic feet), as built by v11.py.
+
+PROGRESS_INTERVAL = 0.2  # Seconds between progress reports of a running MILP
+
+
+# Truck volume in cubic feet
+def _truck_volume(dims):
+    length, width, height = dims
+    return length * width * height
+
+
+# Greedy truck count: fill the largest trucks first, then cover what is left
+# with the smallest truck type
+@timed("fleet_mix.greedy")
+def greedy_fleet_mix(truck_types, carton_data):
+    total_carton_volume = sum(carton["Demand"] * carton["Volume"] for carton in carton_data)
+    total_carton_count = sum(carton["Demand"] for carton in carton_data)
+
+    remaining_volume = total_carton_volume
+    truck_requirements = {}
+    truck_box_distribution = {}
+    total_truck_capacity = 0
+
+    for truck_type, dims in sorted(truck_types.items(), key=lambda x: -x[1][0]):
+        truck_volume = _truck_volume(dims)
+        num_trucks = int(remaining_volume // truck_volume)
+        remaining_volume %= truck_volume
+        truck_requirements[truck_type] = num_trucks
+        total_truck_capacity += num_trucks * truck_volume
+        truck_box_distribution[truck_type] = num_trucks * (truck_volume // (total_carton_volume / total_carton_count))
+
+    # Calculate utilization
+    utilization = (total_carton_volume / total_truck_capacity) * 100 if total_truck_capacity > 0 else 0
+
+    additional_truck_type = None
+    additional_trucks_needed = 0
+    remaining_boxes = {}
+    if remaining_volume > 0:
+        additional_truck_type, dims = min(truck_types.items(), key=lambda x: x[1][0])  # Smallest truck
+        additional_trucks_needed = int(math.ceil(remaining_volume / _truck_volume(dims)))
+        for i, carton in enumerate(carton_data):
+            remaining_boxes[f"Carton {i + 1}"] = int(remaining_volume // carton["Volume"])
+
+    return {
+        'truck_requirements': truck_requirements,
+        'truck_box_distribution': truck_box_distribution,
+        'utilization': utilization,
+        'remaining_volume': remaining_volume,
+        'additional_truck_type': additional_truck_type,
+        'additional_trucks_needed': additional_trucks_needed,
+        'remaining_boxes': remaining_boxes
+    }
+
+
+# Truck counts of the greedy answer, including the additional small trucks
+def greedy_truck_counts(greedy):
+    counts = dict(greedy['truck_requirements'])
+    if greedy['additional_truck_type'] is not None:
+        counts[greedy['additional_truck_type']] += greedy['additional_trucks_needed']
+    return counts
+
+
+# Spread carton demand over the given truck counts, largest cartons first
+def _assign_cartons(truck_types, carton_data, truck_counts):
+    capacity = {name: truck_counts.get(name, 0) * _truck_volume(dims) for name, dims in truck_types.items()}
+    assignment = {name: [0] * len(carton_data) for name in truck_types}
+    order = sorted(range(len(carton_data)), key=lambda i: -carton_data[i]["Volume"])
+    for i in order:
+        demand = carton_data[i]["Demand"]
+        volume = carton_data[i]["Volume"]
+        for name in truck_types:
+            if demand <= 0:
+                break
+            count = min(demand, int(capacity[name] // volume))
+            assignment[name][i] += count
+            capacity[name] -= count * volume
+            demand -= count
+    return assignment
+
+
+# Function to choose the truck mix and carton assignment with a MILP.
+#   minimize   sum_t cost[t] * trucks[t]
+#   subject to sum_t cartons[c, t] == demand[c]                 for every carton c
+#              sum_c volume[c] * cartons[c, t] <= capacity[t] * trucks[t]
+# `truck_costs` defaults to the truck volume, so the solver minimizes shipped
+# capacity. `hint` is a {truck_type: count} warm start; the greedy answer is
+# used when it is omitted. `fill_factor` derates truck capacity for stacking loss.
+# `progress(elapsed, time_limit)` is called while the solver runs; when it
+# raises (a cancelled service job), the solve is interrupted and the error re-raised.
+def solve_fleet_mix(truck_types, carton_data, time_limit=5.0, gap=0.01, hint=None,
+                    truck_costs=None, fill_factor=1.0, solver_id="SCIP", progress=None):
+    try:
+        from ortools.linear_solver import pywraplp
+    except ImportError as e:
+        raise ImportError("solve_fleet_mix needs OR-Tools: pip install ortools") from e
+
+    solver = pywraplp.Solver.CreateSolver(solver_id)
+    if solver is None:
+        raise RuntimeError(f"OR-Tools solver {solver_id!r} is not available")
+    solver.SetTimeLimit(int(time_limit * 1000))
+
+    names = list(truck_types)
+    capacities = {name: _truck_volume(truck_types[name]) * fill_factor for name in names}
+    if truck_costs is None:
+        truck_costs = {name: _truck_volume(truck_types[name]) for name in names}
+    total_volume = sum(carton["Demand"] * carton["Volume"] for carton in carton_data)
+
+    trucks = {name: solver.IntVar(0, math.ceil(total_volume / capacities[name]) + 1, f"trucks[{name}]")
+              for name in names}
+    cartons = {(i, name): solver.IntVar(0, carton["Demand"], f"cartons[{i},{name}]")
+               for i, carton in enumerate(carton_data) for name in names}
+
+    for i, carton in enumerate(carton_data):
+        solver.Add(sum(cartons[i, name] for name in names) == carton["Demand"])
+    for name in names:
+        solver.Add(sum(carton["Volume"] * cartons[i, name] for i, carton in enumerate(carton_data))
+                   <= capacities[name] * trucks[name])
+    solver.Minimize(sum(truck_costs[name] * trucks[name] for name in names))
+
+    # Warm start from the greedy answer (or the previous what-if run)
+    if hint is None:
+        hint = greedy_truck_counts(greedy_fleet_mix(truck_types, carton_data))
+    hint_assignment = _assign_cartons(truck_types, carton_data, hint)
+    hint_vars = [trucks[name] for name in names]
+    hint_values = [float(hint.get(name, 0)) for name in names]
+    for (i, name), var in cartons.items():
+        hint_vars.append(var)
+        hint_values.append(float(hint_assignment[name][i]))
+    solver.SetHint(hint_vars, hint_values)
+
+    params = pywraplp.MPSolverParameters()
+    params.SetDoubleParam(params.RELATIVE_MIP_GAP, gap)
+    start = time.perf_counter()
+    stopped = []
+    finished = threading.Event()
+
+    def report():
+        while not finished.wait(PROGRESS_INTERVAL):
+            try:
+                progress(min(time.perf_counter() - start, time_limit), time_limit)
+            except Exception as e:
+                stopped.append(e)
+                solver.InterruptSolve()
+                return
+
+    watcher = threading.Thread(target=report, name="fleet-mix-progress", daemon=True)
+    if progress is not None:
+        watcher.start()
+    try:
+        with stage("fleet_mix.milp"):
+            status = solver.Solve(params)
+    finally:
+        finished.set()
+        if progress is not None:
+            watcher.join()
+    if stopped:
+        raise stopped[0]
+    solve_time = time.perf_counter() - start
+
+    if status not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return {'status': "infeasible" if status == pywraplp.Solver.INFEASIBLE else "no solution",
+                'solve_time': solve_time}
+
+    truck_requirements = {name: int(round(trucks[name].solution_value())) for name in names}
+    carton_assignment = {name: {f"Carton {i + 1}": int(round(cartons[i, name].solution_value()))
+                                for i in range(len(carton_data))}
+                         for name in names}
+    total_truck_capacity = sum(count * _truck_volume(truck_types[name]) for name, count in truck_requirements.items())
+    return {
+        'status': "optimal" if status == pywraplp.Solver.OPTIMAL else "feasible",
+        'truck_requirements': truck_requirements,
+        'carton_assignment': carton_assignment,
+        'utilization': (total_volume / total_truck_capacity) * 100 if total_truck_capacity > 0 else 0,
+        'objective': solver.Objective().Value(),
+        'best_bound': solver.Objective().BestBound(),
+        'solve_time': solve_time
+    }
@@ -0,0 +1,234 @@
+import json
+import math
+from datetime import date, timedelta
+
+import numpy as np
+
+from .fleet_mix import greedy_fleet_mix, greedy_truck_counts
+from .instrument import add_count, timed
+
+# Daily carton demand history with incremental rolling aggregates. Days are
+# added one at a time in date order and each day only updates running state
+# (moving-average sums over a ring buffer, weekday totals for the seasonal
+# profile and an exponentially weighted level), so appending a new day costs
+# O(number of SKUs) no matter how long the history is.
+#
+# Long histories are read with pandas in chunks (ingest_csv) or from a
+# (days, skus) array such as an np.memmap / np.load(mmap_mode="r") matrix
+# (ingest_matrix).
+
+WINDOWS = (7, 28)
+EWMA_ALPHA = 0.2
+FORECAST_METHODS = ("moving_average", "ewma")
+MATRIX_BLOCK_DAYS = 512
+
+
+def _as_date(value):
+    if isinstance(value, date):
+        return value.date() if hasattr(value, 'date') and callable(value.date) else value
+    return date.fromisoformat(str(value)[:10])
+
+
+class DemandHistory:
+    def __init__(self, windows=WINDOWS, alpha=EWMA_ALPHA):
+        self.windows = tuple(windows)
+        self.alpha = alpha
+        self.skus = []
+        self.sku_index = {}
+        self.first_date = None
+        self.last_date = None
+        self.days = 0
+        self._ring = np.zeros((max(self.windows), 0))
+        self._window_sums = {window: np.zeros(0) for window in self.windows}
+        self._weekday_sums = np.zeros((7, 0))
+        self._weekday_days = np.zeros(7, dtype=np.int64)
+        self._total = np.zeros(0)
+        self._level = np.zeros(0)
+
+    # Column for a SKU, adding it (with zero history) when it is new
+    def _column(self, sku):
+        sku = str(sku)
+        if sku not in self.sku_index:
+            self.sku_index[sku] = len(self.skus)
+            self.skus.append(sku)
+            self._ring = np.pad(self._ring, ((0, 0), (0, 1)))
+            self._window_sums = {window: np.append(sums, 0.0) for window, sums in self._window_sums.items()}
+            self._weekday_sums = np.pad(self._weekday_sums, ((0, 0), (0, 1)))
+            self._total = np.append(self._total, 0.0)
+            self._level = np.append(self._level, 0.0)
+        return self.sku_index[sku]
+
+    # Fold one day's demand vector (one value per known SKU) into the aggregates
+    def _add_vector(self, day, demand):
+        size = len(self._ring)
+        position = self.days % size
+        for window, sums in self._window_sums.items():
+            if self.days >= window:
+                sums -= self._ring[(position - window) % size]
+            sums += demand
+        self._ring[position] = demand
+        weekday = day.weekday()
+        self._weekday_sums[weekday] += demand
+        self._weekday_days[weekday] += 1
+        self._total += demand
+        self._level = demand.copy() if self.days == 0 else self.alpha * demand + (1 - self.alpha) * self._level
+        self.days += 1
+        if self.first_date is None:
+            self.first_date = day
+        self.last_date = day
+        add_count("forecast.days_added")
+
+    # Add one day of demand ({sku: cartons}). Days must come in date order;
+    # skipped days are recorded as zero demand.
+    def add_day(self, day, demand_by_sku):
+        day = _as_date(day)
+        if self.last_date is not None and day <= self.last_date:
+            raise ValueError(f"Demand for {day} is not after the last ingested day {self.last_date}")
+        columns = [(self._column(sku), value) for sku, value in demand_by_sku.items()]
+        demand = np.zeros(len(self.skus))
+        for column, value in columns:
+            demand[column] += value
+        self._fill_gap(day)
+        self._add_vector(day, demand)
+
+    def _fill_gap(self, day):
+        if self.last_date is None:
+            return
+        missing = self.last_date + timedelta(days=1)
+        while missing < day:
+            self._add_vector(missing, np.zeros(len(self.skus)))
+            missing += timedelta(days=1)
+
+    # Read a long CSV (date, sku, demand rows sorted by date) in chunks. With
+    # skip_ingested=True, days up to the last ingested day are skipped, so
+    # re-reading an extended export only processes the new days.
+    @timed("forecast.ingest_csv")
+    def ingest_csv(self, source, chunksize=100_000, date_column="date", sku_column="sku", demand_column="demand",
+                   skip_ingested=False):
+        import pandas as pd
+
+        pending = None
+        reader = pd.read_csv(source, chunksize=chunksize, usecols=[date_column, sku_column, demand_column],
+                             parse_dates=[date_column])
+        for chunk in reader:
+            if skip_ingested and self.last_date is not None:
+                chunk = chunk[chunk[date_column].dt.date > self.last_date]
+                if chunk.empty:
+                    continue
+            if pending is not None:
+                chunk = pd.concat([pending, chunk])
+            # The last day may continue in the next chunk, so hold it back
+            last_day = chunk[date_column].max()
+            pending = chunk[chunk[date_column] == last_day]
+            self._ingest_frame(chunk[chunk[date_column] < last_day], date_column, sku_column, demand_column)
+        if pending is not None:
+            self._ingest_frame(pending, date_column, sku_column, demand_column)
+        return self
+
+    def _ingest_frame(self, frame, date_column, sku_column, demand_column):
+        if frame.empty:
+            return
+        daily = frame.groupby([date_column, sku_column])[demand_column].sum().unstack(fill_value=0)
+        columns = [self._column(sku) for sku in daily.columns]
+        values = daily.to_numpy(dtype=float)
+        for day, row in zip(daily.index, values):
+            day = _as_date(day)
+            if self.last_date is not None and day <= self.last_date:
+                raise ValueError(f"Demand for {day} is not after the last ingested day {self.last_date}")
+            demand = np.zeros(len(self.skus))
+            demand[columns] = row
+            self._fill_gap(day)
+            self._add_vector(day, demand)
+
+    # Read a dense (days, skus) matrix starting at `start`, block by block so a
+    # memory-mapped file is never loaded whole
+    @timed("forecast.ingest_matrix")
+    def ingest_matrix(self, start, matrix, skus, block_days=MATRIX_BLOCK_DAYS):
+        start = _as_date(start)
+        columns = [self._column(sku) for sku in skus]
+        for offset in range(0, len(matrix), block_days):
+            block = np.asarray(matrix[offset:offset + block_days], dtype=float)
+            for i, row in enumerate(block):
+                day = start + timedelta(days=offset + i)
+                if self.last_date is not None and day <= self.last_date:
+                    raise ValueError(f"Demand for {day} is not after the last ingested day {self.last_date}")
+                demand = np.zeros(len(self.skus))
+                demand[columns] = row
+                self._fill_gap(day)
+                self._add_vector(day, demand)
+        return self
+
+    def moving_average(self, window):
+        if window not in self._window_sums:
+            raise ValueError(f"No running window of {window} days, expected one of {self.windows}")
+        return self._window_sums[window] / max(1, min(self.days, window))
+
+    @property
+    def ewma(self):
+        return self._level.copy()
+
+    # Demand on each weekday relative to the overall mean: (7, skus), 1 = average
+    def seasonal_profile(self):
+        mean = self._total / max(1, self.days)
+        weekday_mean = self._weekday_sums / np.maximum(self._weekday_days, 1)[:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profile = np.where(mean > 0, weekday_mean / mean, 1.0)
+        profile[self._weekday_days == 0] = 1.0
+        return profile
+
+    # Forecast demand for the `horizon` days after the last ingested day:
+    # (dates, (horizon, skus) array); the base level is scaled by the weekday profile
+    def forecast(self, horizon, method="moving_average", window=None):
+        if method not in FORECAST_METHODS:
+            raise ValueError(f"Unknown forecast method {method!r}, expected one of {FORECAST_METHODS}")
+        if self.last_date is None:
+            raise ValueError("No demand history has been ingested")
+        base = self.ewma if method == "ewma" else self.moving_average(window or max(self.windows))
+        profile = self.seasonal_profile()
+        dates = [self.last_date + timedelta(days=day + 1) for day in range(horizon)]
+        return dates, np.array([base * profile[day.weekday()] for day in dates]).reshape(horizon, len(self.skus))
+
+    # Running state only (no raw history), so a saved history resumes with add_day
+    def save(self, path):
+        meta = {'windows': self.windows, 'alpha': self.alpha, 'skus': self.skus, 'days': self.days,
+                'first_date': self.first_date.isoformat() if self.first_date else None,
+                'last_date': self.last_date.isoformat() if self.last_date else None}
+        arrays = {f"window_{window}": sums for window, sums in self._window_sums.items()}
+        np.savez(path, meta=json.dumps(meta), ring=self._ring, weekday_sums=self._weekday_sums,
+                 weekday_days=self._weekday_days, total=self._total, level=self._level, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            history = cls(meta['windows'], meta['alpha'])
+            history.skus = meta['skus']
+            history.sku_index = {sku: i for i, sku in enumerate(history.skus)}
+            history.days = meta['days']
+            history.first_date = _as_date(meta['first_date']) if meta['first_date'] else None
+            history.last_date = _as_date(meta['last_date']) if meta['last_date'] else None
+            history._ring = data['ring']
+            history._window_sums = {window: data[f"window_{window}"] for window in history.windows}
+            history._weekday_sums = data['weekday_sums']
+            history._weekday_days = data['weekday_days']
+            history._total = data['total']
+            history._level = data['level']
+        return history
+
+
+# Function to turn a demand forecast into truck requirements per day.
+# `cartons` maps each SKU to its carton volume in cubic feet; SKUs without a
+# carton are ignored. Returns one row per day: {"Date", <truck type>: count,
+# "Cartons"}.
+def forecast_truck_requirements(history, truck_types, cartons, horizon=7, method="moving_average", window=None):
+    dates, demand = history.forecast(horizon, method, window)
+    columns = [(history.sku_index[sku], volume) for sku, volume in cartons.items() if sku in history.sku_index]
+    plan = []
+    for day, row in zip(dates, demand):
+        carton_data = [{"Demand": math.ceil(row[column] - 1e-9), "Volume": volume}
+                       for column, volume in columns if row[column] > 1e-9]
+        counts = {name: 0 for name in truck_types}
+        if carton_data:
+            counts.update(greedy_truck_counts(greedy_fleet_mix(truck_types, carton_data)))
+        plan.append({"Date": day, **counts, "Cartons": sum(carton["Demand"] for carton in carton_data)})
+    return plan
@@ -0,0 +1,32 @@
+import math
+
+# Conversion factors
+FEET_TO_INCHES = 12
+LBS_TO_KG = 0.453592
+# 1 meter = 3.28084 feet
+METER_TO_FEET = 3.28084
+
+
+# Helper function to calculate volume
+def calculate_volume(length, width, height):
+    return length * width * height
+
+
+# Helper function to calculate cylinder volume
+def calculate_cylinder_volume(diameter, height):
+    radius = diameter / 2
+    return math.pi * (radius ** 2) * height
+
+
+# Function to calculate roll volume (rejects non-positive dimensions)
+def calculate_roll_volume(diameter, length):
+    if diameter <= 0 or length <= 0:
+        raise ValueError("Diameter and Length must be greater than zero.")
+    return math.pi * (diameter / 2) ** 2 * length
+
+
+# Truck volume in cubic inches from dimensions given in feet
+def truck_volume_inches(truck):
+    return calculate_volume(truck['length'] * FEET_TO_INCHES,
+                            truck['width'] * FEET_TO_INCHES,
+                            truck['height'] * FEET_TO_INCHES)
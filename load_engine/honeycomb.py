@@ -0,0 +1,75 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+
+from .instrument import add_count, register_cache, stage
+
+# Honeycomb floor plan of one roll diameter (top view of upright rolls).
+# Centers are in inches, x across the width and y along the length, in the
+# order circles.CirclePacker scans its candidate grid (d/2 across,
+# d * sqrt(3) / 4 along): on an empty floor that scan places exactly this
+# lattice, so the packer takes it from here instead of testing every
+# candidate. Rows are two grid steps apart and alternate between even and
+# odd columns; a floor narrower than 1.5 d holds a single column every three
+# grid steps.
+
+EPSILON = 1e-9  # Same tolerance as circles.CirclePacker
+HONEYCOMB_CACHE_SIZE = 256
+
+
+# Read-only (n, 2) array of honeycomb centers, bottom-left first
+@lru_cache(maxsize=HONEYCOMB_CACHE_SIZE)
+def honeycomb_lattice(width, length, diameter):
+    radius = diameter / 2
+    step_x = diameter / 2
+    step_y = diameter * math.sqrt(3) / 4
+    if diameter > min(width, length) + EPSILON:
+        centers = np.zeros((0, 2))
+    else:
+        columns = int((width - diameter) // step_x + EPSILON) + 1
+        rows = int((length - diameter) // step_y + EPSILON) + 1
+        if columns == 1:
+            grid_rows = np.arange(0, rows, 3)
+            mask = np.ones((len(grid_rows), 1), dtype=bool)
+        else:
+            grid_rows = np.arange(0, rows, 2)
+            odd = (grid_rows // 2) % 2 == 1
+            mask = (np.arange(columns)[None, :] % 2 == 1) == odd[:, None]
+        xs = np.broadcast_to(radius + np.arange(mask.shape[1]) * step_x, mask.shape)[mask]
+        ys = np.broadcast_to((radius + grid_rows * step_y)[:, None], mask.shape)[mask]
+        centers = np.stack([xs, ys], axis=1)
+    centers.flags.writeable = False
+    return centers
+
+
+# Function to optimize roll placement using a honeycomb pattern. When the
+# truck height and roll length are given, upright rolls are stacked in layers.
+# Returns the roll count and an (n, 3) array of x, y, z center positions,
+# filled floor first.
+def optimize_honeycomb_packing(truck_width, truck_length, roll_diameter, truck_height=None, roll_length=None):
+    layers = 1
+    layer_height = 0.0
+    if truck_height is not None and roll_length:
+        layers = int(truck_height // roll_length)
+        layer_height = roll_length
+    with stage("honeycomb.pattern"):
+        centers = honeycomb_lattice(truck_width, truck_length, roll_diameter)
+        positions = np.empty((len(centers) * layers, 3))
+        positions[:, :2] = np.tile(centers, (layers, 1))
+        positions[:, 2] = np.repeat(np.arange(layers) * layer_height, len(centers))
+    add_count("honeycomb.positions", len(positions))
+    return len(positions), positions
+
+
+# Hit/miss statistics of the honeycomb lattice cache
+def honeycomb_cache_info():
+    return honeycomb_lattice.cache_info()
+
+
+# Drop all cached honeycomb lattices
+def clear_honeycomb_cache():
+    honeycomb_lattice.cache_clear()
+
+
+register_cache("honeycomb", honeycomb_cache_info)
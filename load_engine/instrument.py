@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+# Process-wide timers and counters for the solver stages. Everything is a
+# no-op until enable() is called (or LOAD_ENGINE_PROFILE=1 is set): stage()
+# then returns a shared do-nothing context manager and add_count() returns at
+# once, so instrumented hot paths cost one global lookup when profiling is off.
+#
+# Caches register a function returning their hit/miss statistics, which are
+# read whenever a snapshot is taken.
+
+_enabled = os.environ.get("LOAD_ENGINE_PROFILE", "") not in ("", "0")
+_lock = threading.Lock()
+_timers = {}    # name -> [calls, total seconds, max seconds]
+_counters = {}  # name -> value
+_caches = {}    # name -> function returning cache statistics
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        with _lock:
+            timer = _timers.get(self.name)
+            if timer is None:
+                _timers[self.name] = [1, elapsed, elapsed]
+            else:
+                timer[0] += 1
+                timer[1] += elapsed
+                if elapsed > timer[2]:
+                    timer[2] = elapsed
+        return False
+
+
+# Time a block: `with stage("honeycomb"): ...`
+def stage(name):
+    if not _enabled:
+        return _NO_STAGE
+    return _Stage(name)
+
+
+# Add `n` to a counter
+def add_count(name, n=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+# Decorator timing every call of a function as one stage
+def timed(name):
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Register a cache statistics function (an lru_cache's cache_info or a dict)
+def register_cache(name, info):
+    _caches[name] = info
+
+
+def _cache_stats(info):
+    stats = info()
+    if hasattr(stats, '_asdict'):
+        stats = stats._asdict()
+    return {key: value for key, value in stats.items() if isinstance(value, (int, float)) and value is not None}
+
+
+# Current timers, counters and cache statistics as plain dicts
+def snapshot():
+    with _lock:
+        timers = {name: {'calls': calls, 'total_seconds': total, 'max_seconds': longest,
+                         'mean_seconds': total / calls}
+                  for name, (calls, total, longest) in sorted(_timers.items())}
+        counters = dict(sorted(_counters.items()))
+    caches = {name: _cache_stats(info) for name, info in sorted(_caches.items())}
+    return {'enabled': _enabled, 'timers': timers, 'counters': counters, 'caches': caches}
+
+
+def to_json(indent=2):
+    return json.dumps(snapshot(), indent=indent)
+
+
+def _metric_name(name):
+    return "".join(char if char.isalnum() else "_" for char in name)
+
+
+# Snapshot in the Prometheus text exposition format
+def to_prometheus(prefix="load_engine"):
+    data = snapshot()
+    lines = [
+        f"# HELP {prefix}_stage_seconds_total Time spent in each solver stage.",
+        f"# TYPE {prefix}_stage_seconds_total counter",
+    ]
+    lines += [f'{prefix}_stage_seconds_total{{stage="{name}"}} {timer["total_seconds"]:.9f}'
+              for name, timer in data['timers'].items()]
+    lines += [
+        f"# HELP {prefix}_stage_calls_total Calls of each solver stage.",
+        f"# TYPE {prefix}_stage_calls_total counter",
+    ]
+    lines += [f'{prefix}_stage_calls_total{{stage="{name}"}} {timer["calls"]}'
+              for name, timer in data['timers'].items()]
+    for name, value in data['counters'].items():
+        metric = f"{prefix}_{_metric_name(name)}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    # One gauge family per cache statistic, labelled by cache
+    families = {}
+    for name, stats in data['caches'].items():
+        for key, value in stats.items():
+            families.setdefault(f"{prefix}_cache_{_metric_name(key)}", []).append((name, value))
+    for metric, samples in families.items():
+        lines.append(f"# TYPE {metric} gauge")
+        lines += [f'{metric}{{cache="{name}"}} {value}' for name, value in samples]
+    return "\n".join(lines) + "\n"
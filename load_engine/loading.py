@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+
+from .balance import place_balanced, truck_balance
+from .catalog import as_item_records, as_truck_records
+from .circles import CirclePacker
+from .geometry import FEET_TO_INCHES, truck_volume_inches
+from .instrument import add_count, stage, timed
+
+
+# Sort items by volume (descending)
+def sort_by_volume(items):
+    with stage("sort"):
+        return sorted(items, key=lambda item: item['volume'], reverse=True)
+
+
+# Fit as many of one item as the remaining volume allows
+def fit_item_by_volume(item, remaining_volume):
+    item_volume = item['volume']
+    if remaining_volume >= item_volume and item['quantity'] > 0:
+        actual_fit = min(int(remaining_volume // item_volume), item['quantity'])
+        return actual_fit, remaining_volume - actual_fit * item_volume
+    return 0, remaining_volume
+
+
+# Greedily fit sorted items into the remaining volume, largest first
+def _fit_by_volume(sorted_items, prefix, remaining_volume):
+    counts = {}
+    for i, item in enumerate(sorted_items):
+        counts[f"{prefix}_{i+1}"], remaining_volume = fit_item_by_volume(item, remaining_volume)
+    return counts, remaining_volume
+
+
+# How many more of each item would fit into the remaining volume
+def _additional_by_volume(sorted_items, prefix, remaining_volume):
+    return {f"{prefix}_{i+1}": int(remaining_volume // item['volume']) if item['volume'] > 0 else 0
+            for i, item in enumerate(sorted_items)}
+
+
+# Result dict of a volume-loaded truck
+def volume_result(truck, sorted_boxes, sorted_rolls, box_counts, roll_counts, remaining_volume):
+    return {
+        'truck': truck,
+        'box_counts': box_counts,
+        'roll_counts': roll_counts,
+        'remaining_volume': remaining_volume,
+        'additional_boxes': _additional_by_volume(sorted_boxes, "box_type", remaining_volume),
+        'additional_rolls': _additional_by_volume(sorted_rolls, "roll_type", remaining_volume)
+    }
+
+
+# Load a single truck with pre-sorted boxes and rolls (volume only)
+@timed("volume.load_truck")
+def load_truck(truck, sorted_boxes, sorted_rolls, truck_volume=None):
+    if truck_volume is None:
+        truck_volume = truck_volume_inches(truck)
+    remaining_volume = truck_volume
+
+    # Fit boxes first, then rolls
+    box_counts, remaining_volume = _fit_by_volume(sorted_boxes, "box_type", remaining_volume)
+    roll_counts, remaining_volume = _fit_by_volume(sorted_rolls, "roll_type", remaining_volume)
+    return volume_result(truck, sorted_boxes, sorted_rolls, box_counts, roll_counts, remaining_volume)
+
+
+# Function to optimize loading. Trucks, boxes and rolls are records (trucks
+# in feet, items in inches) or load_engine.catalog arrays.
+def optimize_loading(trucks, boxes, rolls):
+    trucks = as_truck_records(trucks)
+    boxes, rolls = as_item_records(boxes), as_item_records(rolls)
+    sorted_boxes = sort_by_volume(boxes)
+    sorted_rolls = sort_by_volume(rolls)
+    return [load_truck(truck, sorted_boxes, sorted_rolls) for truck in trucks]
+
+
+# Stack upright rolls on floor slots (an (n, 2) array of centers) into
+# `layers` layers: an (n * layers, 3) array, floor first
+def _stack_slots(centers, layers, layer_height):
+    positions = np.empty((len(centers) * layers, 3))
+    positions[:, :2] = np.tile(centers, (layers, 1))
+    positions[:, 2] = np.repeat(np.arange(layers) * layer_height, len(centers))
+    return positions
+
+
+# Load a single truck with pre-sorted rolls and a weight limit. All roll types
+# share one floor plan (circles.CirclePacker): larger diameters are placed
+# first and smaller ones fill the gaps. Every floor slot holds a column of
+# upright rolls of one type, as many layers as the truck height allows. When
+# the truck has axle or balance limits (see balance.truck_balance), positions
+# are filled center-out and any placement that would break a limit is skipped.
+@timed("honeycomb.load_truck")
+def load_truck_rolls(truck, sorted_rolls):
+    truck_width = truck['width'] * FEET_TO_INCHES
+    truck_length = truck['length'] * FEET_TO_INCHES
+    truck_height = truck['height'] * FEET_TO_INCHES
+    remaining_volume = truck_volume_inches(truck)
+    remaining_weight = truck.get('max_weight', math.inf)  # Already entered in kg
+
+    roll_counts = {f"roll_type_{i+1}": 0 for i in range(len(sorted_rolls))}
+    layout = [None] * len(sorted_rolls)
+    balance = truck_balance(truck)
+    diameters = [roll['diameter'] for roll in sorted_rolls if roll['quantity'] > 0 and roll['diameter'] > 0]
+    packer = CirclePacker(truck_width, truck_length, min(diameters)) if diameters else None
+
+    # Fit rolls into the shared floor, largest diameter first, within the weight limit
+    for i in sorted(range(len(sorted_rolls)), key=lambda i: -sorted_rolls[i]['diameter']):
+        roll = sorted_rolls[i]
+        used = np.empty((0, 3))
+        layers = int(truck_height // roll['length']) if roll['length'] > 0 else 0
+        wanted = roll['quantity']
+        if roll['weight'] > 0 and remaining_weight != math.inf:
+            wanted = min(wanted, int(remaining_weight // roll['weight']))
+        if packer is not None and roll['diameter'] > 0 and layers > 0 and wanted > 0:
+            # With balance limits the whole free floor is offered, so rolls can go center-out
+            slots = packer.pack(roll['diameter'], math.ceil(wanted / layers) if balance is None else math.inf)
+            positions = _stack_slots(packer.centers(slots), layers, roll['length'])
+            add_count("honeycomb.positions", len(positions))
+
+            # Positions actually used by this roll type; unused floor slots are freed
+            used = positions[:wanted]
+            if balance is not None:
+                with stage("balance.place"):
+                    chosen = place_balanced(balance, positions, roll['weight'], wanted)
+                used = positions[chosen]
+                taken = set(int(index) % len(slots) for index in chosen)
+                for k, slot in enumerate(slots):
+                    if k not in taken:
+                        packer.remove(slot)
+            remaining_weight -= len(used) * roll['weight']
+            remaining_volume -= len(used) * roll['volume']
+        roll_counts[f"roll_type_{i+1}"] = len(used)
+        add_count("honeycomb.rolls_loaded", len(used))
+        if roll['quantity'] > 0:
+            layout[i] = {'label': f"roll_type_{i+1}", 'diameter': roll['diameter'], 'positions': used}
+
+    layout = [layer for layer in layout if layer is not None]
+    result = {
+        'truck': truck,
+        'roll_counts': roll_counts,
+        'remaining_volume': remaining_volume,
+        'remaining_weight': remaining_weight,
+        'positions': np.concatenate([layer['positions'] for layer in layout]) if layout else np.empty((0, 3)),
+        'layout': layout
+    }
+    if balance is not None:
+        result['balance'] = balance.summary()
+    return result
+
+
+# Function to optimize roll loading (shared floor plan with a weight limit)
+def optimize_roll_loading(trucks, rolls):
+    trucks, rolls = as_truck_records(trucks), as_item_records(rolls)
+    sorted_rolls = sort_by_volume(rolls)
+    return [load_truck_rolls(truck, sorted_rolls) for truck in trucks]
@@ -0,0 +1,194 @@
+import math
+
+import numpy as np
+
+from .catalog import ROLL
+from .instrument import add_count, timed
+
+# Orientation search for rolls. A truck (inches) can hold one roll type in
+# several configurations:
+#   upright      - honeycomb floor plan, stacked as high as the roll length allows
+#   lying_along  - roll axis along the truck: honeycomb cross-section of
+#                  width x height, repeated every roll length
+#   lying_across - roll axis across the truck: honeycomb cross-section of
+#                  length x height, repeated every roll length over the width
+# or in two zones along the truck length, each filled with one configuration.
+#
+# Pure configurations are evaluated for every truck x roll pair at once with
+# NumPy broadcasting. Zone splits are only searched for pairs whose best pure
+# count is below an upper bound: the weight limit, and the truck volume times
+# the densest circle packing (pi / sqrt(12)) over the roll volume. Zone
+# combinations that cannot beat the best count found are skipped.
+#
+# This is the roll geometry of load_engine.capacity: callers that need
+# capacities of whole catalogs go through capacity_matrix, which caches them.
+
+CONFIGURATIONS = ("upright", "lying_along", "lying_across")
+PACKING_DENSITY = math.pi / math.sqrt(12)
+ROW_PITCH = math.sqrt(3) / 2
+SPLIT_BLOCK = 1 << 20  # Breakpoints evaluated at once
+
+
+# Most circles of `diameter` in an a x b rectangle: square grid, or honeycomb
+# rows along either side (broadcasts over arrays)
+def circles_in_rectangle(a, b, diameter):
+    a, b, diameter = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (a, b, diameter)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        best = np.floor(a / diameter) * np.floor(b / diameter)
+        for across, along in ((a, b), (b, a)):
+            rows = np.where(along >= diameter, np.floor((along - diameter) / (diameter * ROW_PITCH) + 1e-9) + 1, 0)
+            full = np.floor(across / diameter)
+            short = np.maximum(np.floor((across - diameter / 2) / diameter), 0)
+            best = np.maximum(best, np.ceil(rows / 2) * full + np.floor(rows / 2) * short)
+    return np.nan_to_num(best, nan=0.0, posinf=0.0)
+
+
+# Rolls in a zone of `zone` inches of truck length for one configuration
+def zone_count(configuration, zone, width, height, diameter, length):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if configuration == "upright":
+            count = circles_in_rectangle(width, zone, diameter) * np.floor(height / length)
+        elif configuration == "lying_along":
+            count = circles_in_rectangle(width, height, diameter) * np.floor(zone / length)
+        else:
+            count = circles_in_rectangle(zone, height, diameter) * np.floor(width / length)
+    return np.nan_to_num(count, nan=0.0, posinf=0.0)
+
+
+# Zone lengths where a configuration's count steps up, for many pairs at
+# once: (n, k) array padded with inf, k the most any of the pairs needs
+def _breakpoints(configuration, truck_length, diameter, length):
+    if configuration == "lying_along":
+        steps = np.floor(truck_length / length).astype(np.int64)
+        points = length[:, None] * np.arange(1, steps.max() + 1)[None, :]
+    else:
+        rows = np.floor(np.maximum(truck_length - diameter, 0) / (diameter * ROW_PITCH)).astype(np.int64) + 1
+        columns = np.floor(truck_length / diameter).astype(np.int64)
+        # Honeycomb rows along the zone, and full or offset columns across it
+        points = np.concatenate([diameter[:, None] * (1 + np.arange(rows.max())[None, :] * ROW_PITCH),
+                                 diameter[:, None] * np.arange(1, columns.max() + 1)[None, :],
+                                 diameter[:, None] * (np.arange(1, columns.max() + 1)[None, :] + 0.5)], axis=1)
+    return np.where(points < truck_length[:, None], points, np.inf)
+
+
+# Best split of the truck length into a front zone (`front`) and a rear zone
+# (`rear`) for many pairs (1-D arrays): (counts, front zone lengths). Pairs
+# are handled in blocks of similar breakpoint counts to bound memory.
+def _best_splits(front, rear, truck_length, width, height, diameter, length, block=SPLIT_BLOCK):
+    counts = np.zeros(len(truck_length), dtype=np.int64)
+    zones = np.zeros(len(truck_length))
+    if front == "lying_along":
+        steps = truck_length / length
+    else:
+        steps = truck_length / diameter
+    order = np.argsort(steps, kind="stable")
+    start = 0
+    while start < len(order):
+        # Pairs are sorted, so the last pair of a block has the most breakpoints
+        end = start + 1
+        while end < len(order) and (end - start + 1) * (3.5 * steps[order[end]] + 2) <= block:
+            end += 1
+        part = order[start:end]
+        points = _breakpoints(front, truck_length[part], diameter[part], length[part])
+        if points.shape[1]:
+            args = (width[part, None], height[part, None], diameter[part, None], length[part, None])
+            rest = np.where(np.isfinite(points), truck_length[part, None] - points, 0.0)
+            total = zone_count(front, np.where(np.isfinite(points), points, 0.0), *args) + zone_count(rear, rest, *args)
+            total[~np.isfinite(points)] = -1
+            best = total.argmax(axis=1)
+            counts[part] = np.maximum(total[np.arange(len(part)), best], 0)
+            zones[part] = np.where(np.isfinite(points[np.arange(len(part)), best]),
+                                   points[np.arange(len(part)), best], 0.0)
+        start = end
+    return counts, zones
+
+
+# Upper bound on the rolls any configuration can hold: the densest circle
+# packing of the truck volume, and the weight limit
+def roll_bound(truck_length, truck_width, truck_height, diameter, length, weight=0.0, max_weight=math.inf):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roll_volume = np.pi * (np.asarray(diameter, dtype=float) / 2) ** 2 * length
+        bound = np.floor(PACKING_DENSITY * truck_length * truck_width * truck_height / roll_volume + 1e-9)
+        weight_bound = np.floor(np.asarray(max_weight, dtype=float) / weight)
+    return np.minimum(bound, np.where(np.isfinite(weight_bound), weight_bound, np.inf))
+
+
+# Search configurations for many pairs (1-D arrays in inches and kg):
+# (counts, configuration names, front zone lengths). Pure configurations are
+# evaluated for all pairs; zone splits only where they might beat the best
+# count so far and the bound is not yet reached (and zones=True).
+def _search(truck_length, width, height, diameter, length, bound, zones=True):
+    full = {configuration: zone_count(configuration, truck_length, width, height, diameter, length).astype(np.int64)
+            for configuration in CONFIGURATIONS}
+    stacked = np.stack([full[configuration] for configuration in CONFIGURATIONS])
+    counts = stacked.max(axis=0)
+    names = np.array(CONFIGURATIONS, dtype=object)[stacked.argmax(axis=0)]
+    front_zones = truck_length.astype(float).copy()
+    for front in CONFIGURATIONS:
+        for rear in CONFIGURATIONS:
+            if front == rear or not zones:
+                continue
+            # Each zone holds at most what its configuration holds in the whole truck
+            search = (counts < bound) & (full[front] + full[rear] > counts)
+            add_count("orientation.splits_pruned", int(len(counts) - search.sum()))
+            if not search.any():
+                continue
+            add_count("orientation.splits_evaluated", int(search.sum()))
+            index = np.flatnonzero(search)
+            split_counts, split_zones = _best_splits(front, rear, truck_length[index], width[index], height[index],
+                                                     diameter[index], length[index])
+            better = split_counts > counts[index]
+            index = index[better]
+            counts[index] = split_counts[better]
+            names[index] = f"{front}+{rear}"
+            front_zones[index] = split_zones[better]
+    return counts, names, front_zones
+
+
+# Function to find the best configuration of one roll type in one truck.
+# Returns {'count', 'configuration', 'zones': [(configuration, zone length,
+# count), ...]}; the count is capped by the weight limit.
+def best_roll_configuration(truck_length, truck_width, truck_height, diameter, length, weight=0.0,
+                            max_weight=math.inf):
+    values = [np.array([value], dtype=float) for value in (truck_length, truck_width, truck_height, diameter, length)]
+    bound = roll_bound(*values, weight, max_weight)
+    counts, names, zones = _search(*values, bound)
+    count, configuration, zone = int(counts[0]), names[0], float(zones[0])
+    if "+" in configuration:
+        front, rear = configuration.split("+")
+        front_count = int(zone_count(front, zone, truck_width, truck_height, diameter, length))
+        parts = [(front, zone, front_count), (rear, truck_length - zone, count - front_count)]
+    else:
+        parts = [(configuration, truck_length, count)]
+    return {'count': int(min(count, bound[0])), 'configuration': configuration, 'zones': parts}
+
+
+# Orientation-aware capacity of every truck x roll pair of two catalog
+# arrays (load_engine.catalog, inches and kg), the roll geometry of
+# load_engine.capacity; use capacity_matrix for cached results. Boxes get
+# 0. With weight=False the weight limit is ignored, with zones=False only
+# pure configurations are tried. Returns (counts (n_trucks, n_items) int64,
+# configuration names).
+@timed("orientation.capacity")
+def orientation_capacity(trucks, items, weight=True, zones=True):
+    shape = (len(trucks), len(items))
+    truck_length, width, height = (np.broadcast_to(trucks[field].astype(float)[:, None], shape).ravel()
+                                   for field in ('length', 'width', 'height'))
+    diameter, length = (np.broadcast_to(items[field].astype(float)[None, :], shape).ravel()
+                        for field in ('diameter', 'length'))
+    rolls = (np.broadcast_to((items['kind'] == ROLL)[None, :], shape).ravel() & (diameter > 0) & (length > 0))
+    if weight:
+        bound = roll_bound(truck_length, width, height, diameter, length,
+                           np.broadcast_to(items['weight'].astype(float)[None, :], shape).ravel(),
+                           np.broadcast_to(trucks['max_weight'].astype(float)[:, None], shape).ravel())
+    else:
+        bound = roll_bound(truck_length, width, height, diameter, length)
+
+    counts = np.zeros(rolls.size, dtype=np.int64)
+    names = np.full(rolls.size, "", dtype=object)
+    index = np.flatnonzero(rolls)
+    found, found_names, _ = _search(truck_length[index], width[index], height[index], diameter[index], length[index],
+                                    bound[index], zones)
+    counts[index] = np.minimum(found, bound[index])
+    names[index] = found_names
+    return counts.reshape(shape), names.reshape(shape)
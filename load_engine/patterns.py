@@ -0,0 +1,237 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .capacity import capacity_matrix
+from .catalog import LENGTH_UNITS, items_from_records, trucks_from_records
+from .instrument import add_count, register_cache, stage, timed
+
+# Multi-roll-type truck selection. Trucks and rolls are load_engine.catalog
+# arrays, or records converted once on the way in: truck rows in the
+# truck_selector_feet.py format ("Name", "Length/Width/Height (ft)",
+# "Weight Capacity (kg)", optional "Cost") and roll types
+# {'Diameter', 'Length', 'Weight', 'Quantity'} in meters / kg. Volumes are
+# reported in m³.
+#
+# A loading pattern is a vector of roll counts (one per roll type) that fits a
+# truck by volume and weight. Patterns depend only on the catalog, so they are
+# enumerated once and cached; each quote only solves the cover problem.
+#
+# With geometry=True a roll takes up the truck volume divided by how many of
+# that roll fit the truck in its best orientation (the geometry of
+# load_engine.capacity),
+# so a pattern is a mix of per-type loads that shares the truck in proportion
+# instead of a pure volume split.
+
+PATTERN_LEVELS = 6
+MAX_PATTERNS_PER_TRUCK = 2000
+PATTERN_CACHE_SIZE = 64
+CUBIC_INCHES_PER_M3 = LENGTH_UNITS['m'] ** 3
+
+
+# Counts to try for one roll type: evenly spaced levels up to its own maximum
+def _levels(max_count, levels):
+    if max_count <= levels:
+        return list(range(max_count, -1, -1))
+    return sorted({int(round(max_count * step / levels)) for step in range(levels + 1)}, reverse=True)
+
+
+# Maximal patterns for one truck, as an (n, k) int array. A depth-first search
+# picks a count level per roll type, pruning levels that no longer fit.
+def _truck_patterns(volume, weight_capacity, roll_volumes, roll_weights, levels, max_patterns):
+    k = len(roll_volumes)
+    order = sorted(range(k), key=lambda i: -roll_volumes[i])
+    max_counts = [int(min(volume // roll_volumes[i], weight_capacity // roll_weights[i])) for i in range(k)]
+    level_counts = [_levels(max_counts[i], levels) for i in range(k)]
+
+    patterns = set()
+    stack = [(0, [], 0.0, 0.0)]
+    while stack and len(patterns) < max_patterns:
+        depth, counts, used_volume, used_weight = stack.pop()
+        if depth == k:
+            # Top up largest rolls first so every pattern is maximal
+            counts = list(counts)
+            for i in order:
+                extra = int(min((volume - used_volume) // roll_volumes[i],
+                                (weight_capacity - used_weight) // roll_weights[i]))
+                if extra > 0:
+                    counts[i] += extra
+                    used_volume += extra * roll_volumes[i]
+                    used_weight += extra * roll_weights[i]
+            patterns.add(tuple(counts))
+            continue
+        # Push small counts first so large counts are explored first
+        for count in reversed(level_counts[depth]):
+            next_volume = used_volume + count * roll_volumes[depth]
+            next_weight = used_weight + count * roll_weights[depth]
+            if next_volume <= volume + 1e-9 and next_weight <= weight_capacity + 1e-9:
+                stack.append((depth + 1, counts + [count], next_volume, next_weight))
+    patterns.discard((0,) * k)
+    return np.array(sorted(patterns), dtype=np.int64).reshape(-1, k)
+
+
+# All patterns of a catalog: (patterns (n, k), truck index per pattern).
+# Trucks are (volume, weight capacity, roll footprints or None). Keyed on the
+# catalog only, so repeated quotes reuse it.
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _catalog_patterns(trucks, rolls, levels, max_patterns):
+    roll_volumes = [volume for volume, _ in rolls]
+    roll_weights = [weight for _, weight in rolls]
+    blocks = []
+    owners = []
+    for t, (volume, weight_capacity, footprints) in enumerate(trucks):
+        with stage("patterns.enumerate"):
+            block = _truck_patterns(volume, weight_capacity, list(footprints or roll_volumes), roll_weights,
+                                    levels, max_patterns)
+        add_count("patterns.generated", len(block))
+        blocks.append(block)
+        owners.append(np.full(len(block), t))
+    patterns = np.vstack(blocks) if blocks else np.zeros((0, len(rolls)), dtype=np.int64)
+    owner = np.concatenate(owners) if owners else np.zeros(0, dtype=np.int64)
+    patterns.flags.writeable = False
+    owner.flags.writeable = False
+    return patterns, owner
+
+
+def pattern_cache_info():
+    return _catalog_patterns.cache_info()
+
+
+def clear_pattern_cache():
+    _catalog_patterns.cache_clear()
+
+
+register_cache("patterns", pattern_cache_info)
+
+
+# Truck and roll catalog arrays of a quote: arrays pass through, a truck
+# table and roll types (meters) are converted
+def _catalogs(truck_data, roll_types):
+    trucks = truck_data if isinstance(truck_data, np.ndarray) else trucks_from_records(truck_data)
+    rolls = roll_types if isinstance(roll_types, np.ndarray) else items_from_records(roll_types, length_unit='m')
+    if ((rolls['diameter'] <= 0) | (rolls['length'] <= 0)).any():
+        raise ValueError("Diameter and Length must be greater than zero.")
+    return trucks, rolls
+
+
+# Volume (m³) each roll type takes up in each truck in its best orientation.
+# Roll types that do not fit take more than the whole truck.
+def _roll_footprints(trucks, rolls):
+    volumes = trucks['volume'] / CUBIC_INCHES_PER_M3
+    geometry = capacity_matrix(trucks, rolls, zones=True).geometry
+    return tuple(tuple(volume / count if count > 0 else 2 * volume for count in row)
+                 for volume, row in zip(volumes.tolist(), geometry.tolist()))
+
+
+# Enumerate (or fetch cached) loading patterns for a truck table and roll types
+def enumerate_patterns(truck_data, roll_types, levels=PATTERN_LEVELS, max_patterns=MAX_PATTERNS_PER_TRUCK,
+                       geometry=False):
+    trucks, rolls = _catalogs(truck_data, roll_types)
+    footprints = _roll_footprints(trucks, rolls) if geometry else (None,) * len(trucks)
+    trucks = tuple(zip((trucks['volume'] / CUBIC_INCHES_PER_M3).tolist(), trucks['max_weight'].tolist(), footprints))
+    rolls = tuple(zip((rolls['volume'] / CUBIC_INCHES_PER_M3).tolist(), rolls['weight'].tolist()))
+    return _catalog_patterns(trucks, rolls, levels, max_patterns)
+
+
+# Greedy cover: repeatedly take the pattern loading the most residual volume
+# per unit cost, and finish with the cheapest pattern that takes all the rest
+@timed("patterns.greedy_cover")
+def _greedy_cover(patterns, owner, costs, roll_volumes, demand):
+    residual = demand.copy()
+    pattern_costs = costs[owner]
+    chosen = []
+    while residual.sum() > 0:
+        covered = np.minimum(patterns, residual)
+        covers_all = (covered == residual).all(axis=1)
+        if covers_all.any():
+            finish = np.flatnonzero(covers_all)[np.argmin(pattern_costs[covers_all])]
+        else:
+            finish = None
+
+        score = (covered @ roll_volumes) / pattern_costs
+        best = int(np.argmax(score))
+        if score[best] <= 0:
+            return None  # Some roll type fits no truck
+        if finish is not None and pattern_costs[finish] <= pattern_costs[best]:
+            chosen.append((int(finish), 1, covered[finish]))
+            break
+
+        # Apply the pattern as many times as it fits the residual demand in full
+        used = patterns[best] > 0
+        repeats = max(1, int((residual[used] // patterns[best][used]).min()))
+        load = np.minimum(patterns[best] * repeats, residual)
+        chosen.append((best, repeats, patterns[best] if repeats > 1 else covered[best]))
+        residual -= load
+    return chosen
+
+
+# Exact cover with OR-Tools: minimize truck cost so the chosen patterns carry all demand
+@timed("patterns.milp_cover")
+def _milp_cover(patterns, owner, costs, demand, time_limit):
+    try:
+        from ortools.linear_solver import pywraplp
+    except ImportError as e:
+        raise ImportError("exact pattern cover needs OR-Tools: pip install ortools") from e
+
+    solver = pywraplp.Solver.CreateSolver("SCIP")
+    solver.SetTimeLimit(int(time_limit * 1000))
+    upper = int(demand.sum())
+    uses = [solver.IntVar(0, upper, f"pattern[{p}]") for p in range(len(patterns))]
+    for i in range(patterns.shape[1]):
+        column = patterns[:, i]
+        solver.Add(sum(int(column[p]) * uses[p] for p in np.flatnonzero(column)) >= int(demand[i]))
+    solver.Minimize(sum(float(costs[owner[p]]) * uses[p] for p in range(len(patterns))))
+    if solver.Solve() not in (pywraplp.Solver.OPTIMAL, pywraplp.Solver.FEASIBLE):
+        return None
+
+    # Trim over-coverage so each truck only carries what is still needed
+    residual = demand.copy()
+    chosen = []
+    for p in sorted(range(len(patterns)), key=lambda p: -costs[owner[p]]):
+        for _ in range(int(round(uses[p].solution_value()))):
+            load = np.minimum(patterns[p], residual)
+            residual -= load
+            chosen.append((p, 1, load))
+    return chosen
+
+
+# Function to choose trucks for a mixed roll order using cached loading patterns.
+# Returns one entry per truck (like optimize_truck_selection) or None when some
+# roll type fits in no truck. `exact` solves the cover with OR-Tools;
+# `geometry` accounts for roll orientations. Trucks cost their volume unless
+# a truck row has a "Cost".
+def plan_roll_loading(truck_data, roll_types, exact=False, time_limit=5.0,
+                      levels=PATTERN_LEVELS, max_patterns=MAX_PATTERNS_PER_TRUCK, geometry=False):
+    trucks, rolls = _catalogs(truck_data, roll_types)
+    patterns, owner = enumerate_patterns(trucks, rolls, levels, max_patterns, geometry)
+    if len(patterns) == 0:
+        return None
+    truck_volumes = trucks['volume'] / CUBIC_INCHES_PER_M3
+    roll_volumes = rolls['volume'] / CUBIC_INCHES_PER_M3
+    roll_weights = rolls['weight'].astype(float)
+    demand = rolls['quantity'].astype(np.int64)
+    costs = truck_volumes.copy()
+    if not isinstance(truck_data, np.ndarray):
+        costs = np.array([truck.get("Cost", volume) for truck, volume in zip(truck_data, costs)], dtype=float)
+
+    if exact:
+        chosen = _milp_cover(patterns, owner, costs, demand, time_limit)
+    else:
+        chosen = _greedy_cover(patterns, owner, costs, roll_volumes, demand)
+    if chosen is None:
+        return None
+
+    plan = []
+    for p, repeats, load in chosen:
+        if not load.any():
+            continue
+        t = owner[p]
+        for _ in range(repeats):
+            plan.append({
+                "Name": str(trucks['name'][t]),
+                "Rolls": {f"Type {i + 1}": int(count) for i, count in enumerate(load)},
+                "Rolls Accommodated": int(load.sum()),
+                "Volume (m³) Remaining": float(truck_volumes[t]) - float(load @ roll_volumes),
+                "Weight (kg) Remaining": float(trucks['max_weight'][t]) - float(load @ roll_weights)
+            })
+    return plan
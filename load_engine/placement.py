@@ -0,0 +1,293 @@
+from itertools import permutations
+
+from .catalog import as_item_records, as_truck_records
+from .geometry import FEET_TO_INCHES
+from .instrument import add_count, timed
+from .loading import sort_by_volume
+
+# Coordinates are in inches: x across the truck width, y along the truck
+# length (from the cab) and z up from the floor.
+
+
+# Distinct (label, (dx, dy, dz)) orientations of a box. The label names the
+# box dimension lying along x, y and z, e.g. "WLH".
+def box_orientations(length, width, height):
+    orientations = []
+    seen = set()
+    for labels in permutations((("L", length), ("W", width), ("H", height))):
+        dims = tuple(dim for _, dim in labels)
+        if dims not in seen:
+            seen.add(dims)
+            orientations.append(("".join(label for label, _ in labels), dims))
+    return orientations
+
+
+# Orientations of a roll, using its bounding box
+def roll_orientations(diameter, length):
+    return [
+        ("upright", (diameter, diameter, length)),
+        ("lying_length", (diameter, length, diameter)),
+        ("lying_width", (length, diameter, diameter)),
+    ]
+
+
+# 2D skyline over the truck width; each segment is [x, width, top_z]
+class Skyline:
+    def __init__(self, width):
+        self.width = width
+        self.segments = [[0.0, width, 0.0]]
+
+    def copy(self):
+        skyline = Skyline.__new__(Skyline)
+        skyline.width = self.width
+        skyline.segments = [list(segment) for segment in self.segments]
+        return skyline
+
+    # Lowest, then left-most, position for a footprint of dx by dz
+    def find(self, dx, dz, max_z):
+        best = None
+        segments = self.segments
+        for i in range(len(segments)):
+            x = segments[i][0]
+            if x + dx > self.width + 1e-9:
+                break
+            top = 0.0
+            j = i
+            while j < len(segments) and segments[j][0] < x + dx - 1e-9:
+                top = max(top, segments[j][2])
+                j += 1
+            if top + dz <= max_z + 1e-9 and (best is None or top < best[1]):
+                best = (x, top)
+        return best
+
+    # Raise the skyline to `z` over [x, x + dx)
+    def raise_to(self, x, dx, z):
+        end = x + dx
+        merged = []
+        for seg_x, seg_w, seg_z in self.segments:
+            seg_end = seg_x + seg_w
+            if seg_end <= x + 1e-9 or seg_x >= end - 1e-9:
+                merged.append([seg_x, seg_w, seg_z])
+                continue
+            if seg_x < x:
+                merged.append([seg_x, x - seg_x, seg_z])
+            if seg_end > end:
+                merged.append([end, seg_end - end, seg_z])
+        merged.append([x, dx, z])
+        merged.sort(key=lambda segment: segment[0])
+
+        segments = [merged[0]]
+        for segment in merged[1:]:
+            if abs(segment[2] - segments[-1][2]) < 1e-9:
+                segments[-1][1] += segment[1]
+            else:
+                segments.append(segment)
+        self.segments = segments
+
+
+# A slice of the truck from y0 to y0 + depth, filled face-first with a skyline.
+# Boxes shallower than the wall are stacked behind each other in columns.
+class Wall:
+    def __init__(self, y0, depth, width, height):
+        self.y0 = y0
+        self.depth = depth
+        self.height = height
+        self.skyline = Skyline(width)
+        self.columns = {}
+
+    def copy(self):
+        wall = Wall.__new__(Wall)
+        wall.y0 = self.y0
+        wall.depth = self.depth
+        wall.height = self.height
+        wall.skyline = self.skyline.copy()
+        wall.columns = {dims: [list(column) for column in columns] for dims, columns in self.columns.items()}
+        return wall
+
+    # Place one item in this wall, returning (label, x, y, z, dims) or None
+    def place(self, orientations):
+        # Continue an open column first
+        for label, dims in orientations:
+            columns = self.columns.get(dims)
+            if columns:
+                column = columns[-1]
+                x, z, y = column
+                column[2] = y + dims[1]
+                if column[2] + dims[1] > self.y0 + self.depth + 1e-9:
+                    columns.pop()
+                return label, x, y, z, dims
+
+        best = None
+        for label, (dx, dy, dz) in orientations:
+            if dy > self.depth + 1e-9:
+                continue
+            spot = self.skyline.find(dx, dz, self.height)
+            if spot is None:
+                continue
+            fill = (self.depth // dy) * dy
+            score = (spot[1], -fill, spot[0])
+            if best is None or score < best[0]:
+                best = (score, label, spot, (dx, dy, dz))
+        if best is None:
+            return None
+
+        _, label, (x, z), dims = best
+        dx, dy, dz = dims
+        self.skyline.raise_to(x, dx, z + dz)
+        if self.y0 + 2 * dy <= self.y0 + self.depth + 1e-9:
+            self.columns.setdefault(dims, []).append([x, z, self.y0 + dy])
+        return label, x, self.y0, z, dims
+
+    # Empty cuboids above the skyline, as (width, height, depth)
+    def free_regions(self):
+        return [(seg_w, self.height - seg_z, self.depth) for _, seg_w, seg_z in self.skyline.segments
+                if seg_z < self.height]
+
+
+# Extreme-point style 3D packer built from walls along the truck length
+class Packer:
+    def __init__(self, length, width, height):
+        self.length = length
+        self.width = width
+        self.height = height
+        self.walls = []
+        self.used_length = 0.0
+        self.used_volume = 0.0
+        self.placements = []
+        # First wall that may still accept a given set of orientations
+        self._first_wall = {}
+
+    # Independent copy; with placements=False the copy starts an empty placement list
+    def copy(self, placements=True):
+        packer = Packer(self.length, self.width, self.height)
+        packer.walls = [wall.copy() for wall in self.walls]
+        packer.used_length = self.used_length
+        packer.used_volume = self.used_volume
+        packer.placements = list(self.placements) if placements else []
+        packer._first_wall = dict(self._first_wall)
+        return packer
+
+    # Open a new wall for an item, sized by its best face fill
+    def _open_wall(self, orientations):
+        remaining = self.length - self.used_length
+        best = None
+        for label, (dx, dy, dz) in orientations:
+            if dx > self.width or dz > self.height or dy > remaining + 1e-9:
+                continue
+            face_fill = (self.width // dx) * dx * (self.height // dz) * dz
+            score = (-face_fill, dy)
+            if best is None or score < best[0]:
+                best = (score, dy)
+        if best is None:
+            return None
+        wall = Wall(self.used_length, best[1], self.width, self.height)
+        self.walls.append(wall)
+        self.used_length += best[1]
+        return wall
+
+    # Place one item; returns its placement dict or None when it does not fit
+    def place(self, item_id, orientations, volume=None):
+        key = tuple(orientations)
+        start = self._first_wall.get(key, 0)
+        spot = None
+        for index in range(start, len(self.walls)):
+            spot = self.walls[index].place(orientations)
+            if spot is not None:
+                break
+            # Walls only fill up, so this one will never take these orientations again
+            self._first_wall[key] = index + 1
+        if spot is None:
+            wall = self._open_wall(orientations)
+            if wall is None:
+                return None
+            spot = wall.place(orientations)
+            if spot is None:
+                return None
+
+        label, x, y, z, (dx, dy, dz) = spot
+        self.used_volume += volume if volume is not None else dx * dy * dz
+        placement = {'item': item_id, 'x': x, 'y': y, 'z': z, 'dx': dx, 'dy': dy, 'dz': dz,
+                     'orientation': label}
+        self.placements.append(placement)
+        return placement
+
+    # Place up to `quantity` copies of an item, returning how many were placed
+    def place_many(self, item_id, orientations, quantity, volume=None):
+        placed = 0
+        while placed < quantity and self.place(item_id, orientations, volume) is not None:
+            placed += 1
+        add_count("placement.items_placed", placed)
+        return placed
+
+    # How many more of an item fit in the empty cuboids left in the truck
+    def additional_capacity(self, orientations):
+        regions = [region for wall in self.walls for region in wall.free_regions()]
+        regions.append((self.width, self.height, self.length - self.used_length))
+        total = 0
+        for width, height, depth in regions:
+            total += max((int(width // dx) * int(height // dz) * int(depth // dy)
+                          for _, (dx, dy, dz) in orientations), default=0)
+        return total
+
+
+# Orientations of a box or roll dict
+def item_orientations(item):
+    if 'diameter' in item:
+        return roll_orientations(item['diameter'], item['length'])
+    return box_orientations(item['length'], item['width'], item['height'])
+
+
+# Empty packer for a truck given in feet
+def truck_packer(truck):
+    return Packer(truck['length'] * FEET_TO_INCHES,
+                  truck['width'] * FEET_TO_INCHES,
+                  truck['height'] * FEET_TO_INCHES)
+
+
+# Result dict of a packed truck
+def placement_result(truck, packer, sorted_boxes, sorted_rolls, box_counts, roll_counts):
+    truck_volume = packer.length * packer.width * packer.height
+    return {
+        'truck': truck,
+        'box_counts': box_counts,
+        'roll_counts': roll_counts,
+        'remaining_volume': truck_volume - packer.used_volume,
+        'additional_boxes': {f"box_type_{i+1}": packer.additional_capacity(item_orientations(box))
+                             for i, box in enumerate(sorted_boxes)},
+        'additional_rolls': {f"roll_type_{i+1}": packer.additional_capacity(item_orientations(roll))
+                             for i, roll in enumerate(sorted_rolls)},
+        'placements': packer.placements
+    }
+
+
+# Load one truck with real 3D placements: boxes first, then rolls, largest first
+@timed("placement.load_truck")
+def load_truck_3d(truck, sorted_boxes, sorted_rolls):
+    packer = truck_packer(truck)
+
+    box_counts = {}
+    for i, box in enumerate(sorted_boxes):
+        box_counts[f"box_type_{i+1}"] = packer.place_many(f"box_type_{i+1}", item_orientations(box),
+                                                          box['quantity'], box['volume'])
+
+    roll_counts = {}
+    for i, roll in enumerate(sorted_rolls):
+        roll_counts[f"roll_type_{i+1}"] = packer.place_many(f"roll_type_{i+1}", item_orientations(roll),
+                                                            roll['quantity'], roll['volume'])
+
+    return placement_result(truck, packer, sorted_boxes, sorted_rolls, box_counts, roll_counts)
+
+
+# Function to optimize loading with real box placement (x, y, z, orientation).
+# `progress(done, total)` is called after each truck.
+def optimize_loading_3d(trucks, boxes, rolls, progress=None):
+    trucks = as_truck_records(trucks)
+    boxes, rolls = as_item_records(boxes), as_item_records(rolls)
+    sorted_boxes = sort_by_volume(boxes)
+    sorted_rolls = sort_by_volume(rolls)
+    results = []
+    for truck in trucks:
+        results.append(load_truck_3d(truck, sorted_boxes, sorted_rolls))
+        if progress is not None:
+            progress(len(results), len(trucks))
+    return results
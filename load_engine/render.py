@@ -0,0 +1,153 @@
+import hashlib
+import io
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .instrument import register_cache, stage
+
+# Rendering helpers for load layouts. Figures are drawn with the object
+# oriented matplotlib API (no pyplot state) and returned as PNG bytes, which
+# are cached by a hash of the layout so unchanged plots are never redrawn.
+# matplotlib is only imported when something is actually drawn.
+
+RENDER_CACHE_SIZE = 64
+MAX_DRAWN_POSITIONS = 5000
+COLORS = ['tab:blue', 'tab:orange', 'tab:green', 'tab:red', 'tab:purple',
+          'tab:brown', 'tab:pink', 'tab:gray', 'tab:olive', 'tab:cyan']
+
+_cache = OrderedDict()
+_cache_stats = {'hits': 0, 'misses': 0}
+_cache_lock = threading.Lock()
+
+
+# Stable hash of arrays and parameters describing one plot
+def layout_hash(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(str(part.shape).encode())
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(repr(part).encode())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+
+# Look up a rendered PNG, or draw it with `draw()` and keep it (LRU eviction)
+def _cached(key, draw):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _cache_stats['hits'] += 1
+            return _cache[key]
+        _cache_stats['misses'] += 1
+    with stage("render.draw"):
+        png = draw()
+    with _cache_lock:
+        _cache[key] = png
+        if len(_cache) > RENDER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return png
+
+
+def render_cache_info():
+    return dict(_cache_stats, size=len(_cache), maxsize=RENDER_CACHE_SIZE)
+
+
+def clear_render_cache():
+    with _cache_lock:
+        _cache.clear()
+        _cache_stats['hits'] = _cache_stats['misses'] = 0
+
+
+register_cache("render", render_cache_info)
+
+
+def _new_axes(figsize):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=figsize)
+    return fig, fig.add_subplot()
+
+
+def _to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+
+# Level of detail: keep every n-th position so at most `budget` are drawn
+def _downsample(positions, budget):
+    if len(positions) <= budget:
+        return positions
+    return positions[::math.ceil(len(positions) / budget)]
+
+
+# Top view of roll positions. `layers` is a list of {'label', 'diameter',
+# 'positions'} with (n, 2) or (n, 3) arrays in inches; only the floor layer
+# is drawn. Each roll type is drawn with one batched EllipseCollection.
+def render_roll_layout(layers, truck_width, truck_length, title="Honeycomb Roll Placement",
+                       max_positions=MAX_DRAWN_POSITIONS):
+    floors = []
+    for layer in layers:
+        positions = np.asarray(layer['positions'], dtype=float)
+        if positions.ndim != 2:
+            positions = positions.reshape(-1, 2)
+        if positions.shape[1] == 3:
+            positions = positions[positions[:, 2] == 0]
+        floors.append((layer['label'], float(layer['diameter']), positions[:, :2]))
+    total = sum(len(positions) for _, _, positions in floors)
+    key = layout_hash("rolls", truck_width, truck_length, title, max_positions,
+                      *[part for label, diameter, positions in floors for part in (label, diameter, positions)])
+
+    def draw():
+        from matplotlib.collections import EllipseCollection
+        from matplotlib.patches import Patch
+
+        fig, ax = _new_axes((8, 6))
+        drawn = 0
+        handles = []
+        for i, (label, diameter, positions) in enumerate(floors):
+            budget = max(1, int(max_positions * len(positions) / total)) if total else 0
+            sample = _downsample(positions, budget)
+            drawn += len(sample)
+            if len(sample) == 0:
+                continue
+            sizes = np.full(len(sample), diameter)
+            ax.add_collection(EllipseCollection(sizes, sizes, np.zeros(len(sample)), units='xy',
+                                                offsets=sample, offset_transform=ax.transData,
+                                                facecolors=COLORS[i % len(COLORS)], alpha=0.5))
+            handles.append(Patch(facecolor=COLORS[i % len(COLORS)], alpha=0.5, label=label))
+        ax.set_xlim(0, truck_width)
+        ax.set_ylim(0, truck_length)
+        ax.set_aspect('equal')
+        ax.set_title(title if drawn == total else f"{title} (showing {drawn} of {total} rolls)")
+        if len(handles) > 1:
+            ax.legend(handles=handles, loc='upper right')
+        return _to_png(fig)
+
+    return _cached(key, draw)
+
+
+# Hexagon grid (as drawn by v11.py) with a single PolyCollection
+def render_hex_grid(rows, cols):
+    def draw():
+        from matplotlib.collections import PolyCollection
+
+        i, j = np.meshgrid(np.arange(rows), np.arange(cols), indexing='ij')
+        x = (j + 0.5 * (i % 2)).ravel()
+        y = (i * 0.87).ravel()  # Adjust for hexagonal stacking
+        shape = np.array([[0, 0], [0.5, 0.25], [0.5, 0.75], [0, 1], [-0.5, 0.75], [-0.5, 0.25]])
+        hexagons = shape[None, :, :] + np.stack([x, y], axis=1)[:, None, :]
+
+        fig, ax = _new_axes((6, 6))
+        ax.add_collection(PolyCollection(hexagons, edgecolors='black', facecolors='lightblue'))
+        ax.set_xlim(-1, cols + 1)
+        ax.set_ylim(-1, rows + 1)
+        ax.set_aspect('equal')
+        ax.axis('off')
+        return _to_png(fig)
+
+    return _cached(layout_hash("hex", rows, cols), draw)
@@ -0,0 +1,45 @@
+from .geometry import METER_TO_FEET
+
+
+# Convert truck dimensions from feet to cubic meters
+def add_truck_volumes(truck_data):
+    for truck in truck_data:
+        truck["Volume (m³)"] = (truck["Length (ft)"] / METER_TO_FEET) * \
+                               (truck["Width (ft)"] / METER_TO_FEET) * \
+                               (truck["Height (ft)"] / METER_TO_FEET)
+    return truck_data
+
+
+# Function to optimize truck selection and determine how many rolls can fit.
+# Missing keys or bad values raise KeyError/TypeError for the caller to report.
+def optimize_truck_selection(truck_data, total_volume_required, total_weight_required, roll_volume, roll_weight):
+    rolls_accommodated = []
+
+    # Sort trucks by volume and weight capacity
+    truck_data = sorted(truck_data, key=lambda x: (x["Volume (m³)"], x["Weight Capacity (kg)"]))
+
+    for truck in truck_data:
+        truck_volume_remaining = truck["Volume (m³)"]
+        truck_weight_remaining = truck["Weight Capacity (kg)"]
+
+        # Calculate how many rolls this truck can carry based on volume and weight
+        rolls_by_volume = truck_volume_remaining // roll_volume
+        rolls_by_weight = truck_weight_remaining // roll_weight
+        rolls_in_truck = min(rolls_by_volume, rolls_by_weight)
+
+        rolls_accommodated.append({
+            "Name": truck["Name"],
+            "Rolls Accommodated": rolls_in_truck,
+            "Volume (m³) Remaining": truck_volume_remaining - rolls_in_truck * roll_volume,
+            "Weight (kg) Remaining": truck_weight_remaining - rolls_in_truck * roll_weight
+        })
+
+        total_volume_required -= rolls_in_truck * roll_volume
+        total_weight_required -= rolls_in_truck * roll_weight
+
+        if total_volume_required <= 0 and total_weight_required <= 0:
+            break
+
+    if total_volume_required > 0 or total_weight_required > 0:
+        return None  # Not all rolls can be accommodated
+    return rolls_accommodated
@@ -0,0 +1,296 @@
+import asyncio
+import hashlib
+import inspect
+import itertools
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .anytime import improve_loading
+from .batch import solve_batch
+from .fleet import allocate_fleet
+from .fleet_mix import solve_fleet_mix
+from .loading import optimize_loading, optimize_roll_loading
+from .placement import optimize_loading_3d
+
+# Local solve service. Jobs go into a bounded asyncio queue and are run by a
+# fixed number of workers on an executor, so the Streamlit script thread only
+# submits and polls. Identical requests (same kind and inputs) that are still
+# queued or running share one job instead of solving again.
+#
+# SolveService runs inside an event loop; BackgroundSolveService owns a loop
+# in a daemon thread and exposes the same operations synchronously.
+
+JOB_KINDS = {
+    "fleet_mix": solve_fleet_mix,
+    "placement": optimize_loading_3d,
+    "volume": optimize_loading,
+    "honeycomb": optimize_roll_loading,
+    "batch": solve_batch,
+    "improve": improve_loading,
+    "fleet": allocate_fleet,
+}
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+MAX_FINISHED_JOBS = 256
+
+
+# Raised inside a job (at its next progress report) once it is cancelled
+class JobCancelled(Exception):
+    pass
+
+
+# Stand-in for inputs json cannot encode: NumPy arrays by their full content
+# (their repr elides rows of large arrays), anything else by repr
+def _encode(value):
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            return value.tolist()
+        digest = hashlib.sha256(f"{value.dtype.descr}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+        return {'ndarray': digest.hexdigest()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return repr(value)
+
+
+# Hash of a job's kind and inputs, used to spot identical requests
+def input_hash(kind, args, kwargs):
+    payload = json.dumps([kind, args, kwargs], sort_keys=True, default=_encode, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# Function to check whether a job function reports progress
+def _takes_progress(fn):
+    try:
+        return "progress" in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+class Job:
+    def __init__(self, job_id, kind, key, args, kwargs):
+        self.id = job_id
+        self.kind = kind
+        self.key = key
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.done_event = asyncio.Event()
+
+    # Progress callback handed to the job function: (done, total)
+    def report(self, done, total):
+        if self.cancel_requested:
+            raise JobCancelled(self.id)
+        self.progress = done / total if total else 1.0
+
+    # Plain dict view for polling from the UI
+    def snapshot(self):
+        end = self.finished or time.time()
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'elapsed': end - self.started if self.started else 0.0,
+            'error': self.error,
+        }
+
+
+class SolveService:
+    # `executor` defaults to a thread pool with one thread per worker; pass a
+    # ProcessPoolExecutor for pure-Python solves (progress is then only 0 or 1)
+    def __init__(self, workers=2, max_queue=32, executor=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers)
+        self.jobs = OrderedDict()
+        self.in_flight = {}
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+        self._ids = itertools.count(1)
+        self._queue = None
+        self._tasks = []
+        self._progress_in_process = not isinstance(self.executor, ThreadPoolExecutor)
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Queue a job and return its id. An identical queued or running job is
+    # reused. Raises RuntimeError when the queue is full.
+    async def submit(self, kind, *args, **kwargs):
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind {kind!r}, expected one of {tuple(JOB_KINDS)}")
+        await self.start()
+        key = input_hash(kind, args, kwargs)
+        if key in self.in_flight:
+            self.stats['deduplicated'] += 1
+            return self.in_flight[key].id
+
+        job = Job(next(self._ids), kind, key, args, kwargs)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise RuntimeError(f"Solve queue is full ({self.max_queue} jobs waiting)") from None
+        self.jobs[job.id] = job
+        self.in_flight[key] = job
+        self.stats['submitted'] += 1
+        return job.id
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == QUEUED:
+                    await self._run(loop, job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, loop, job):
+        fn = JOB_KINDS[job.kind]
+        kwargs = dict(job.kwargs)
+        if _takes_progress(fn) and not self._progress_in_process:
+            kwargs['progress'] = job.report
+        job.status = RUNNING
+        job.started = time.time()
+        try:
+            result = await loop.run_in_executor(self.executor, _call, fn, job.args, kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            self._finish(job, FAILED)
+        else:
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)  # Finished anyway; the result is dropped
+            else:
+                job.result = result
+                job.progress = 1.0
+                self._finish(job, DONE)
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished = time.time()
+        if self.in_flight.get(job.key) is job:
+            del self.in_flight[job.key]
+        self.stats[{DONE: 'completed', FAILED: 'failed', CANCELLED: 'cancelled'}[status]] += 1
+        job.done_event.set()
+        self._forget_old_jobs()
+
+    # Keep only the most recent finished jobs
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    # Cancel a job. Queued jobs never start; running jobs stop at their next
+    # progress report (or have their result dropped if they do not report).
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED:
+            return False
+        job.cancel_requested = True
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED)
+        return True
+
+    def status(self, job_id):
+        job = self.jobs.get(job_id)
+        return job.snapshot() if job else None
+
+    # Wait for a job and return its result (None if it failed or was cancelled)
+    async def wait(self, job_id, timeout=None):
+        job = self.jobs[job_id]
+        await asyncio.wait_for(job.done_event.wait(), timeout)
+        return job.result
+
+    # Yield status snapshots every `interval` seconds until the job finishes
+    async def stream(self, job_id, interval=0.25):
+        job = self.jobs[job_id]
+        while True:
+            yield job.snapshot()
+            if job.status in FINISHED:
+                return
+            try:
+                await asyncio.wait_for(job.done_event.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def result(self, job_id):
+        job = self.jobs.get(job_id)
+        return job.result if job else None
+
+
+def _call(fn, args, kwargs):
+    return fn(*args, **kwargs)
+
+
+# Synchronous facade: one event loop in a daemon thread, shared by every
+# caller (e.g. every Streamlit session via st.cache_resource)
+class BackgroundSolveService:
+    def __init__(self, workers=2, max_queue=32, executor=None):
+        self.service = SolveService(workers, max_queue, executor)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="solve-service", daemon=True)
+        self._thread.start()
+
+    def _call(self, coroutine, timeout=None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    # Run a plain method of the service on the loop thread
+    def _call_soon(self, fn, *args):
+        async def call():
+            return fn(*args)
+        return self._call(call())
+
+    def submit(self, kind, *args, **kwargs):
+        return self._call(self.service.submit(kind, *args, **kwargs))
+
+    def cancel(self, job_id):
+        return self._call_soon(self.service.cancel, job_id)
+
+    def status(self, job_id):
+        return self._call_soon(self.service.status, job_id)
+
+    def result(self, job_id):
+        return self._call_soon(self.service.result, job_id)
+
+    # Block until the job finishes (or `timeout` seconds pass, raising TimeoutError)
+    def wait(self, job_id, timeout=None):
+        return self._call(self.service.wait(job_id, timeout))
+
+    @property
+    def stats(self):
+        return dict(self.service.stats)
+
+    def close(self):
+        self._call(self.service.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
@@ -0,0 +1,145 @@
+from .catalog import as_item_records, as_truck_records
+from .geometry import truck_volume_inches
+from .instrument import add_count, timed
+from .loading import fit_item_by_volume, sort_by_volume, volume_result
+from .placement import item_orientations, placement_result, truck_packer
+
+# Incremental re-optimization. A session keeps the sorted item sequence of the
+# previous solve and, for every truck, a checkpoint of the loader state before
+# each item of that sequence. On update, every truck resumes from the
+# checkpoint before the first item that changed; a truck whose own inputs
+# changed is reloaded from scratch, and nothing is reloaded when only other
+# trucks changed. Results are identical to a full optimize_loading(_3d) run.
+
+
+# Per-truck state: the loader state before each item of the sorted sequence,
+# the count loaded for each item, and the finished result
+class _TruckState:
+    def __init__(self, truck):
+        self.truck = truck
+        self.checkpoints = []
+        self.counts = []
+        self.result = None
+
+
+class LoadingSession:
+    # geometry=True uses the 3D placement loader (V8), otherwise the volume loader
+    def __init__(self, geometry=True):
+        self.geometry = geometry
+        self.sorted_boxes = []
+        self.sorted_rolls = []
+        self._sequence = []
+        self._trucks = []
+        self.stats = {'solves': 0, 'trucks_reloaded': 0, 'items_reloaded': 0}
+
+    # Boxes first, then rolls, each largest first (as optimize_loading does)
+    def _build_sequence(self, boxes, rolls):
+        self.sorted_boxes = sort_by_volume([dict(box) for box in boxes])
+        self.sorted_rolls = sort_by_volume([dict(roll) for roll in rolls])
+        return ([("box_type", i, box) for i, box in enumerate(self.sorted_boxes)] +
+                [("roll_type", i, roll) for i, roll in enumerate(self.sorted_rolls)])
+
+    def _initial_state(self, truck):
+        if self.geometry:
+            return truck_packer(truck)
+        return truck_volume_inches(truck)
+
+    # Load one item on top of `state`, returning (count, new state)
+    def _fit(self, state, prefix, index, item):
+        if self.geometry:
+            count = state.place_many(f"{prefix}_{index+1}", item_orientations(item), item['quantity'], item['volume'])
+            return count, state
+        return fit_item_by_volume(item, state)
+
+    # Snapshot of a loader state, kept as a checkpoint
+    def _snapshot(self, state):
+        if self.geometry:
+            return state.copy(placements=False), len(state.placements)
+        return state, None
+
+    # Live state from a checkpoint (the checkpoint itself is consumed)
+    def _restore(self, truck_state, checkpoint):
+        state, placement_count = checkpoint
+        if self.geometry:
+            state.placements = truck_state.result['placements'][:placement_count]
+        return state
+
+    # Reload one truck from rank `start` of the sequence. checkpoints[r] is the
+    # state before rank r; the last checkpoint is the state after all items.
+    def _resume(self, truck_state, start):
+        if start < len(truck_state.checkpoints):
+            state = self._restore(truck_state, truck_state.checkpoints[start])
+        else:
+            start = 0
+            state = self._initial_state(truck_state.truck)
+        del truck_state.checkpoints[start:]
+        del truck_state.counts[start:]
+
+        for rank in range(start, len(self._sequence)):
+            prefix, index, item = self._sequence[rank]
+            truck_state.checkpoints.append(self._snapshot(state))
+            count, state = self._fit(state, prefix, index, item)
+            truck_state.counts.append(count)
+        truck_state.checkpoints.append(self._snapshot(state))
+
+        self.stats['trucks_reloaded'] += 1
+        self.stats['items_reloaded'] += len(self._sequence) - start
+        add_count("session.items_reloaded", len(self._sequence) - start)
+        truck_state.result = self._result(truck_state, state)
+
+    def _result(self, truck_state, state):
+        box_counts = {}
+        roll_counts = {}
+        for (prefix, index, _), count in zip(self._sequence, truck_state.counts):
+            (box_counts if prefix == "box_type" else roll_counts)[f"{prefix}_{index+1}"] = count
+        if self.geometry:
+            return placement_result(truck_state.truck, state, self.sorted_boxes, self.sorted_rolls,
+                                    box_counts, roll_counts)
+        return volume_result(truck_state.truck, self.sorted_boxes, self.sorted_rolls,
+                             box_counts, roll_counts, state)
+
+    # Solve for new inputs, reusing whatever the previous solve left valid.
+    # Returns the same list of per-truck results as optimize_loading(_3d).
+    @timed("session.update")
+    def update(self, trucks, boxes, rolls):
+        trucks = as_truck_records(trucks)
+        boxes, rolls = as_item_records(boxes), as_item_records(rolls)
+        old_sequence = self._sequence
+        self._sequence = self._build_sequence(boxes, rolls)
+
+        # First rank whose item (or its position in the sequence) changed
+        first_changed = 0
+        while (first_changed < min(len(old_sequence), len(self._sequence)) and
+               old_sequence[first_changed] == self._sequence[first_changed]):
+            first_changed += 1
+
+        unchanged_items = first_changed == len(old_sequence) == len(self._sequence)
+        del self._trucks[len(trucks):]
+        for t, truck in enumerate(trucks):
+            if t < len(self._trucks) and self._trucks[t].truck == truck:
+                if not unchanged_items:
+                    self._resume(self._trucks[t], first_changed)
+                continue
+            truck_state = _TruckState(dict(truck))
+            if t < len(self._trucks):
+                self._trucks[t] = truck_state
+            else:
+                self._trucks.append(truck_state)
+            self._resume(truck_state, 0)
+        self.stats['solves'] += 1
+        return self.results
+
+    @property
+    def results(self):
+        return [truck_state.result for truck_state in self._trucks]
+
+    # (checkpoints, counts, placements) of one truck of a 3D session, for
+    # AnytimeLoader to start from; None for the volume loader or when the
+    # session holds a different truck at `index`
+    def truck_state(self, index, truck=None):
+        if not self.geometry or index >= len(self._trucks):
+            return None
+        if truck is not None and self._trucks[index].truck != truck:
+            return None
+        truck_state = self._trucks[index]
+        return truck_state.checkpoints, truck_state.counts, truck_state.result['placements']
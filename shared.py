@@ -0,0 +1,41 @@
+import streamlit as st
+
+from load_engine import trucks_from_records
+
+# Truck catalogs and engine objects shared by every page (see app.py) and
+# every session. Cached resources live once per process, so they are built on
+# the first rerun that needs them and never again.
+
+# Truck models for roll selection (truck_selector_feet.py)
+ROLL_TRUCKS = (
+    {"Name": "Small Truck", "Length (ft)": 19.7, "Width (ft)": 8.2, "Height (ft)": 8.2, "Weight Capacity (kg)": 5000},
+    {"Name": "Medium Truck", "Length (ft)": 26.2, "Width (ft)": 8.2, "Height (ft)": 9.8, "Weight Capacity (kg)": 10000},
+    {"Name": "Large Truck", "Length (ft)": 39.4, "Width (ft)": 8.2, "Height (ft)": 11.5, "Weight Capacity (kg)": 15000},
+)
+
+# Truck models for carton forecasting (v11.py): name -> (length, width, height) in feet
+CARTON_TRUCKS = {
+    "Small (20ft)": (20, 8, 8),
+    "Medium (40ft)": (40, 8, 8),
+    "Large (53ft)": (53, 8.5, 9.5)
+}
+
+
+# Catalog array of the roll trucks, shared read-only
+@st.cache_resource
+def roll_truck_catalog():
+    catalog = trucks_from_records(ROLL_TRUCKS)
+    catalog.flags.writeable = False
+    return catalog
+
+
+def carton_trucks():
+    return dict(CARTON_TRUCKS)
+
+
+# One solve service for the whole process
+@st.cache_resource
+def solve_service():
+    from load_engine.service import BackgroundSolveService
+
+    return BackgroundSolveService(workers=2)
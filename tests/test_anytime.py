@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from load_engine import AnytimeLoader, LoadingSession, improve_loading, optimize_loading_3d
+
+
+def box(length, width, height, quantity):
+    return {'length': length, 'width': width, 'height': height, 'quantity': quantity,
+            'volume': length * width * height}
+
+
+def roll(diameter, length, quantity):
+    return {'diameter': diameter, 'length': length, 'quantity': quantity, 'volume': 3.14159 * diameter ** 2 / 4 * length}
+
+
+def random_order(seed):
+    rng = random.Random(seed)
+    boxes = [box(rng.randint(8, 60), rng.randint(8, 50), rng.randint(8, 40), rng.randint(5, 80)) for _ in range(4)]
+    rolls = [roll(rng.randint(10, 30), rng.randint(20, 60), rng.randint(5, 40)) for _ in range(2)]
+    truck = {'length': rng.choice([10, 20]), 'width': 8, 'height': 8}
+    return truck, boxes, rolls
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_screening_bound_is_never_beaten(seed):
+    truck, boxes, rolls = random_order(seed)
+    loader = AnytimeLoader(truck, boxes, rolls, seed=seed)
+    for _ in range(10):
+        candidates = [loader._neighbor() for _ in range(loader.batch_size)]
+        for candidate, bound in zip(candidates, loader._bounds(candidates)):
+            value = loader._evaluate(candidate)[0]
+            assert value <= bound * (1 + 1e-9)
+        loader.step()
+
+
+# One dominant box type: forcing one orientation caps it well below the greedy load
+@pytest.mark.parametrize("seed", range(3))
+def test_screened_candidates_never_beat_the_incumbent(seed):
+    truck = {'length': 10, 'width': 8, 'height': 8}
+    boxes = [box(50, 50, 30, 200), box(20, 20, 20, 5), box(30, 20, 10, 5)]
+    loader = AnytimeLoader(truck, boxes, [], seed=seed, temperature=0.0)
+    batches = []
+    bounds = loader._bounds
+    loader._bounds = lambda candidates: batches.append((candidates, bounds(candidates))) or batches[-1][1]
+    screened = 0
+    for _ in range(20):
+        value = loader.value
+        loader.step()
+        candidates, candidate_bounds = batches[-1]
+        for candidate, bound in zip(candidates, candidate_bounds):
+            if bound < value:
+                candidate.start = 0
+                assert loader._evaluate(candidate)[0] <= value * (1 + 1e-9)
+                screened += 1
+    assert screened == loader.stats['screened'] > 0
+
+
+def test_improvement_never_loses_volume():
+    truck, boxes, rolls = random_order(7)
+    greedy = optimize_loading_3d([truck], boxes, rolls)[0]
+    improved = improve_loading([truck], boxes, rolls, budget=0.3)[0]
+    assert improved['remaining_volume'] <= greedy['remaining_volume'] + 1e-6
+
+
+def test_improvement_starts_from_the_session():
+    truck, boxes, rolls = random_order(3)
+    session = LoadingSession()
+    session.update([truck], boxes, rolls)
+    loader = AnytimeLoader(truck, boxes, rolls, greedy=session.truck_state(0, truck))
+    assert loader.stats['evaluated'] == 0
+    assert loader.greedy_value == pytest.approx(AnytimeLoader(truck, boxes, rolls).greedy_value)
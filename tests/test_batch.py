@@ -0,0 +1,41 @@
+from load_engine import BatchCache, solve_batch
+
+TRUCKS = [{"Name": "Small Truck", "Length (ft)": 20, "Width (ft)": 8, "Height (ft)": 8, "Weight Capacity (kg)": 10000},
+          {"Name": "Large Truck", "Length (ft)": 40, "Width (ft)": 8, "Height (ft)": 8.5, "Weight Capacity (kg)": 25000}]
+
+
+def test_selection_covers_a_mixed_roll_order():
+    rolls = [{'Diameter': 1.0, 'Length': 1.0, 'Weight': 500, 'Quantity': 30},
+             {'Diameter': 0.5, 'Length': 1.0, 'Weight': 100, 'Quantity': 10}]
+    plan, = solve_batch([{'trucks': TRUCKS, 'rolls': rolls}], method="selection")
+    # 16,000 kg: two small trucks cost less truck volume than one large one
+    assert [truck['Name'] for truck in plan] == ["Small Truck", "Small Truck"]
+    assert sum(truck['Rolls']['Type 1'] for truck in plan) == 30
+    assert sum(truck['Rolls']['Type 2'] for truck in plan) == 10
+
+
+def test_selection_of_an_order_without_rolls_is_empty():
+    assert solve_batch([{'trucks': TRUCKS, 'rolls': []}], method="selection") == [[]]
+
+
+def test_volume_orders_share_the_sorted_items():
+    boxes = [{'length': 10, 'width': 10, 'height': 10, 'quantity': 5, 'volume': 1000},
+             {'length': 20, 'width': 20, 'height': 20, 'quantity': 2, 'volume': 8000}]
+    trucks = [{'length': 1, 'width': 1, 'height': 1}]
+    first, second = solve_batch([{'trucks': trucks, 'boxes': boxes}] * 2, method="volume")
+    assert first == second
+    assert first[0]['box_counts'] == {'box_type_1': 0, 'box_type_2': 1}
+
+
+def test_batch_cache_keeps_the_most_recent_entries():
+    cache = BatchCache(maxsize=2)
+    trucks = [{'length': length, 'width': 8, 'height': 8} for length in (10, 20, 30)]
+    for truck in trucks:
+        cache.truck_volume(truck)
+    cache.truck_volume(trucks[1])
+    cache.truck_volume({'length': 40, 'width': 8, 'height': 8})
+    assert list(cache.truck_volumes) == [(20, 8, 8), (40, 8, 8)]
+    orders = [{'trucks': trucks, 'boxes': [{'length': 1, 'width': 1, 'height': 1, 'quantity': n, 'volume': 1}]}
+              for n in range(5)]
+    solve_batch(orders, cache=cache)
+    assert len(cache.sorted_items) == 2
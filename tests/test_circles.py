@@ -0,0 +1,59 @@
+import math
+
+import numpy as np
+import pytest
+
+from load_engine import CirclePacker
+
+
+# Bottom-left scan over the packer's candidate grid, checking every placed circle
+def reference_scan(width, length, diameter):
+    radius = diameter / 2
+    placed = []
+    for row in range(int((length - diameter) // (diameter * math.sqrt(3) / 4) + 1e-9) + 1):
+        y = radius + row * diameter * math.sqrt(3) / 4
+        for column in range(int((width - diameter) // (diameter / 2) + 1e-9) + 1):
+            x = radius + column * diameter / 2
+            if all((x - a) ** 2 + (y - b) ** 2 >= (diameter - 1e-9) ** 2 for a, b in placed):
+                placed.append((x, y))
+    return np.array(placed).reshape(-1, 2)
+
+
+def no_overlap(centers, radii):
+    distance = np.hypot(*(centers[:, None, :] - centers[None, :, :]).transpose(2, 0, 1))
+    reach = radii[:, None] + radii[None, :] - 1e-6
+    np.fill_diagonal(distance, np.inf)
+    return bool((distance >= reach).all())
+
+
+@pytest.mark.parametrize("width, length, diameter", [(100, 200, 20), (29, 150, 20), (45, 90, 30), (98.4, 236.4, 7.5)])
+def test_empty_floor_matches_the_scan(width, length, diameter):
+    packer = CirclePacker(width, length, diameter)
+    centers = packer.centers(packer.pack(diameter, math.inf))
+    np.testing.assert_allclose(centers, reference_scan(width, length, diameter))
+
+
+def test_same_diameter_in_parts_equals_one_pack():
+    whole = CirclePacker(98.4, 236.4, 12)
+    expected = whole.centers(whole.pack(12, math.inf))
+    parts = CirclePacker(98.4, 236.4, 12)
+    centers = np.concatenate([parts.centers(parts.pack(12, count)) for count in (5, 40, math.inf)])
+    np.testing.assert_array_equal(centers, expected)
+
+
+def test_smaller_rolls_fill_gaps_without_overlap():
+    packer = CirclePacker(98.4, 236.4, 6)
+    large = packer.pack(30, math.inf)
+    small = packer.pack(6, math.inf)
+    assert large and small
+    centers = packer.centers(large + small)
+    radii = np.array([15.0] * len(large) + [3.0] * len(small))
+    assert no_overlap(centers, radii)
+
+
+def test_removed_lattice_slots_are_reused():
+    packer = CirclePacker(100, 100, 20)
+    slots = packer.pack(20, math.inf)
+    packer.remove(slots[0])
+    again = packer.pack(20, math.inf)
+    np.testing.assert_array_equal(packer.centers(again), [[10.0, 10.0]])
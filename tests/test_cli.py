@@ -0,0 +1,53 @@
+import io
+import json
+
+import pytest
+
+from load_engine.cli import iter_shipments, run_batch
+
+HEADER = "shipment_id,record,length,width,height,diameter,weight,max_weight,quantity"
+
+
+# Order rows as the CSV reader yields them
+def rows(text):
+    names = HEADER.split(",")
+    return [dict(zip(names, line.split(","))) for line in text.strip().splitlines()]
+
+
+def strict_json(line):
+    def reject(token):
+        raise AssertionError(f"non-standard JSON token {token}")
+    return json.loads(line, parse_constant=reject)
+
+
+def test_truck_without_weight_limit_writes_strict_json():
+    out = io.StringIO()
+    assert run_batch(rows("0,truck,53,8.5,9.5,,,,1\n0,roll,40,,,20,5,,3"), out, method="honeycomb", workers=1) == 1
+    truck = strict_json(out.getvalue())['trucks'][0]
+    assert truck['roll_counts'] == {'roll_type_1': 3}
+    assert truck['remaining_weight'] is None
+
+
+@pytest.mark.parametrize("method", ["placement", "volume", "honeycomb", "selection"])
+def test_every_method_writes_one_line_per_shipment(method):
+    order = rows("a,truck,20,8,8,,,5000,1\na,box,20,20,20,,5,,10\na,roll,40,,,20,50,,4\n"
+                 "b,truck,53,8.5,9.5,,,20000,1\nb,roll,48,,,30,100,,6")
+    out = io.StringIO()
+    assert run_batch(order, out, method=method, workers=1, placements=True) == 2
+    assert [strict_json(line)['shipment_id'] for line in out.getvalue().splitlines()] == ["a", "b"]
+
+
+def test_missing_dimension_is_rejected():
+    with pytest.raises(ValueError, match="missing or zero dimension"):
+        list(iter_shipments(rows("0,truck,53,8.5,9.5,,,,1\n0,roll,40,,,,5,,3")))
+
+
+def test_selection_plans_trucks_from_loading_patterns():
+    # 15,000 kg of large rolls and 1,000 kg of small ones, 10,000 kg per truck
+    order = rows("s,truck,20,8,8,,,10000,1\ns,roll,39.37,,,39.37,500,,30\ns,roll,39.37,,,19.685,100,,10")
+    out = io.StringIO()
+    run_batch(order, out, method="selection", workers=1)
+    plan = strict_json(out.getvalue())['selection']
+    assert len(plan) == 2
+    assert sum(truck['Rolls']['Type 1'] for truck in plan) == 30
+    assert sum(truck['Rolls']['Type 2'] for truck in plan) == 10
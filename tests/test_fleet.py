@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from load_engine import ResidualTree, allocate_fleet
+
+
+def box(length, width, height, quantity, weight=0):
+    return {'length': length, 'width': width, 'height': height, 'quantity': quantity,
+            'volume': length * width * height, 'weight': weight}
+
+
+def random_fleet(seed):
+    rng = random.Random(seed)
+    trucks = [{'length': rng.choice([2, 4, 6]), 'width': 2, 'height': 2, 'quantity': rng.randint(1, 3),
+               'max_weight': rng.choice([200, 500])} for _ in range(3)]
+    boxes = [box(rng.randint(6, 20), rng.randint(6, 20), rng.randint(6, 20), rng.randint(1, 25), rng.randint(1, 30))
+             for _ in range(5)]
+    return trucks, boxes
+
+
+@pytest.mark.parametrize("strategy", ["first_fit", "best_fit"])
+@pytest.mark.parametrize("seed", range(4))
+def test_allocation_respects_inventory_and_capacity(strategy, seed):
+    trucks, boxes = random_fleet(seed)
+    result = allocate_fleet(trucks, boxes, [], strategy=strategy)
+    assert len(result['trucks']) == sum(truck['quantity'] for truck in trucks)
+    ordered = sorted(boxes, key=lambda item: item['volume'], reverse=True)
+    for i, item in enumerate(ordered):
+        key = f"box_type_{i+1}"
+        loaded = sum(load['box_counts'].get(key, 0) for load in result['trucks'])
+        assert loaded + result['unallocated_boxes'][key] == item['quantity']
+    for load in result['trucks']:
+        truck = load['truck']
+        counts = [load['box_counts'].get(f"box_type_{i+1}", 0) for i in range(len(ordered))]
+        volume = sum(count * item['volume'] for count, item in zip(counts, ordered))
+        weight = sum(count * item['weight'] for count, item in zip(counts, ordered))
+        assert volume <= truck['length'] * truck['width'] * truck['height'] * 1728 + 1e-6
+        assert weight <= truck['max_weight'] + 1e-6
+
+
+def test_first_fit_fills_trucks_in_input_order():
+    trucks = [{'length': 1, 'width': 1, 'height': 1, 'quantity': 3}]
+    result = allocate_fleet(trucks, [box(12, 12, 6, 5)], [])
+    assert [load['box_counts'] for load in result['trucks']] == [{'box_type_1': 2}, {'box_type_1': 2},
+                                                                 {'box_type_1': 1}]
+    assert result['trucks_used'] == 3
+    assert result['unallocated_boxes'] == {'box_type_1': 0}
+
+
+def test_best_fit_picks_the_tightest_truck():
+    trucks = [{'length': 2, 'width': 1, 'height': 1, 'quantity': 1},
+              {'length': 1, 'width': 1, 'height': 1, 'quantity': 1}]
+    result = allocate_fleet(trucks, [box(12, 12, 12, 1)], [], strategy="best_fit")
+    assert [load['box_counts'] for load in result['trucks']] == [{}, {'box_type_1': 1}]
+
+
+def test_residual_tree_finds_the_leftmost_fit():
+    tree = ResidualTree([5, 1, 8, 3], [10, 10, 1, 10])
+    assert tree.first_fit(4) == 0
+    assert tree.first_fit(4, weight=5, start=1) == -1
+    tree.update(3, 6, 10)
+    assert tree.first_fit(4, weight=5, start=1) == 3
+
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        allocate_fleet([], [], [], strategy="worst_fit")
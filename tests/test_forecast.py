@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from load_engine import DemandHistory
+
+
+def demand(day):
+    return {'A': 10 + day % 7, 'B': 3 * (day % 2)}
+
+
+def history_of(days, start=date(2024, 1, 1)):
+    history = DemandHistory()
+    for day in range(days):
+        history.add_day(start + timedelta(days=day), demand(day))
+    return history
+
+
+def test_saved_history_resumes_like_the_original(tmp_path):
+    history = history_of(40)
+    history.save(tmp_path / "history.npz")
+    loaded = DemandHistory.load(tmp_path / "history.npz")
+    assert (loaded.skus, loaded.days, loaded.first_date, loaded.last_date) == \
+        (history.skus, history.days, history.first_date, history.last_date)
+    for method in ("moving_average", "ewma"):
+        assert np.allclose(loaded.forecast(7, method)[1], history.forecast(7, method)[1])
+
+    # Adding the next days to the loaded copy matches one uninterrupted history
+    for day in range(40, 50):
+        loaded.add_day(date(2024, 1, 1) + timedelta(days=day), demand(day))
+    full = history_of(50)
+    assert np.allclose(loaded.moving_average(7), full.moving_average(7))
+    assert np.allclose(loaded.ewma, full.ewma)
+    assert np.allclose(loaded.seasonal_profile(), full.seasonal_profile())
+
+
+def test_moving_average_and_gaps():
+    history = DemandHistory(windows=(2,))
+    history.add_day("2024-01-01", {'A': 4})
+    history.add_day("2024-01-03", {'A': 2})  # 2024-01-02 is recorded as zero demand
+    assert history.days == 3
+    assert history.moving_average(2) == pytest.approx([1.0])
+    with pytest.raises(ValueError):
+        history.add_day("2024-01-03", {'A': 1})
@@ -0,0 +1,26 @@
+import numpy as np
+
+from load_engine import clear_honeycomb_cache, honeycomb_cache_info, optimize_honeycomb_packing
+from load_engine.honeycomb import honeycomb_lattice
+
+
+def test_lattice_rows_alternate_and_do_not_overlap():
+    centers = honeycomb_lattice(100.0, 200.0, 20.0)
+    rows = sorted(set(centers[:, 1].tolist()))
+    np.testing.assert_allclose(np.diff(rows), 20 * np.sqrt(3) / 2)
+    assert centers[centers[:, 1] == rows[0], 0].tolist() == [10.0, 30.0, 50.0, 70.0, 90.0]
+    assert centers[centers[:, 1] == rows[1], 0].tolist() == [20.0, 40.0, 60.0, 80.0]
+    distance = np.hypot(*(centers[:, None, :] - centers[None, :, :]).transpose(2, 0, 1))
+    np.fill_diagonal(distance, np.inf)
+    assert distance.min() >= 20 - 1e-6
+
+
+def test_honeycomb_is_memoized_and_stacked():
+    clear_honeycomb_cache()
+    count, positions = optimize_honeycomb_packing(98.4, 236.4, 20, truck_height=110, roll_length=50)
+    optimize_honeycomb_packing(98.4, 236.4, 20, truck_height=110, roll_length=50)
+    assert honeycomb_cache_info().hits == 1
+    assert count == len(positions) and count % 2 == 0
+    floor = positions[:count // 2]
+    np.testing.assert_array_equal(positions[count // 2:, :2], floor[:, :2])
+    assert set(positions[:, 2]) == {0.0, 50.0}
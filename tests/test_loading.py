@@ -0,0 +1,38 @@
+import math
+
+from load_engine import items_from_records, optimize_loading, optimize_roll_loading, split_items, trucks_from_records
+
+
+def test_roll_loading_without_weight_limit():
+    trucks = trucks_from_records([{'Length (ft)': 20, 'Width (ft)': 8, 'Height (ft)': 8}])
+    _, rolls = split_items(items_from_records([{'Diameter (in)': 20, 'Length (in)': 40, 'Weight (kg)': 50,
+                                                'Quantity': 10}]))
+    assert trucks['max_weight'][0] == math.inf
+    result = optimize_roll_loading(trucks, rolls)[0]
+    assert result['roll_counts'] == {'roll_type_1': 10}
+    assert result['remaining_weight'] == math.inf
+
+
+def test_roll_loading_weight_limit():
+    trucks = [{'length': 20, 'width': 8, 'height': 8, 'max_weight': 120}]
+    rolls = [{'diameter': 20, 'length': 40, 'weight': 50, 'quantity': 10, 'volume': math.pi * 100 * 40}]
+    result = optimize_roll_loading(trucks, rolls)[0]
+    assert result['roll_counts'] == {'roll_type_1': 2}
+    assert result['remaining_weight'] == 20
+
+
+def test_volume_loading_fills_largest_boxes_first():
+    trucks = [{'length': 1, 'width': 1, 'height': 1}]  # 1728 cubic inches
+    boxes = [{'length': 10, 'width': 10, 'height': 10, 'quantity': 5, 'volume': 1000},
+             {'length': 5, 'width': 5, 'height': 5, 'quantity': 10, 'volume': 125}]
+    result = optimize_loading(trucks, boxes, [])[0]
+    assert result['box_counts'] == {'box_type_1': 1, 'box_type_2': 5}
+    assert result['remaining_volume'] == 1728 - 1000 - 625
+    assert result['additional_boxes'] == {'box_type_1': 0, 'box_type_2': 0}
+
+
+def test_volume_loading_reads_catalog_arrays():
+    records = [{'Length (in)': 12, 'Width (in)': 12, 'Height (in)': 12, 'Quantity': 4}]
+    trucks = trucks_from_records([{'Length (ft)': 2, 'Width (ft)': 1, 'Height (ft)': 1}])
+    boxes, _ = split_items(items_from_records(records))
+    assert optimize_loading(trucks, boxes, [])[0]['box_counts'] == {'box_type_1': 2}
@@ -0,0 +1,60 @@
+import itertools
+import random
+
+import pytest
+
+from load_engine import FEET_TO_INCHES, LoadingSession, optimize_loading, optimize_loading_3d
+
+
+def box(length, width, height, quantity):
+    return {'length': length, 'width': width, 'height': height, 'quantity': quantity,
+            'volume': length * width * height}
+
+
+def random_order(seed):
+    rng = random.Random(seed)
+    boxes = [box(rng.randint(10, 50), rng.randint(10, 40), rng.randint(10, 40), rng.randint(1, 30)) for _ in range(4)]
+    rolls = [{'diameter': d, 'length': length, 'quantity': rng.randint(1, 10), 'volume': 3.14159 * d * d / 4 * length}
+             for d, length in [(rng.randint(10, 30), rng.randint(20, 50))]]
+    trucks = [{'length': rng.choice([8, 12, 20]), 'width': 8, 'height': 8} for _ in range(2)]
+    return trucks, boxes, rolls
+
+
+def overlap(a, b):
+    return all(a[axis] < b[axis] + b[size] - 1e-6 and b[axis] < a[axis] + a[size] - 1e-6
+               for axis, size in (('x', 'dx'), ('y', 'dy'), ('z', 'dz')))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_placements_stay_inside_the_truck_without_overlap(seed):
+    trucks, boxes, rolls = random_order(seed)
+    for truck, result in zip(trucks, optimize_loading_3d(trucks, boxes, rolls)):
+        placements = result['placements']
+        loaded = sum(result['box_counts'].values()) + sum(result['roll_counts'].values())
+        assert len(placements) == loaded > 0
+        for p in placements:
+            assert min(p['x'], p['y'], p['z']) >= 0
+            assert p['x'] + p['dx'] <= truck['width'] * FEET_TO_INCHES + 1e-6
+            assert p['y'] + p['dy'] <= truck['length'] * FEET_TO_INCHES + 1e-6
+            assert p['z'] + p['dz'] <= truck['height'] * FEET_TO_INCHES + 1e-6
+        assert not any(overlap(a, b) for a, b in itertools.combinations(placements, 2))
+
+
+# Results of a session after each edit equal a full solve of the edited inputs
+def test_session_updates_match_full_solves():
+    trucks, boxes, rolls = random_order(11)
+    edits = [
+        lambda t, b, r: (t, b, r),
+        lambda t, b, r: (t, [dict(b[0], quantity=b[0]['quantity'] + 3)] + b[1:], r),
+        lambda t, b, r: (t, b[:-1], r),
+        lambda t, b, r: ([dict(t[0], length=t[0]['length'] + 4)] + t[1:], b, r),
+        lambda t, b, r: (t, b + [box(12, 12, 12, 6)], []),
+    ]
+    for geometry, solve in ((True, optimize_loading_3d), (False, optimize_loading)):
+        session = LoadingSession(geometry=geometry)
+        inputs = (trucks, boxes, rolls)
+        for edit in edits:
+            inputs = edit(*inputs)
+            assert session.update(*inputs) == solve(*inputs)
+        assert session.stats['solves'] == len(edits)
+        assert session.stats['items_reloaded'] > 0
@@ -0,0 +1,87 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from load_engine import BackgroundSolveService, items_from_records, optimize_loading
+from load_engine import service as service_module
+from load_engine.service import input_hash
+
+
+# A job that reports progress until `release` is set
+def hold(release, value, progress=None):
+    while not release.wait(0.01):
+        progress(0, 1)
+    return value
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()  # Never leave a held job running past the test
+
+
+@pytest.fixture
+def service(monkeypatch, release):
+    monkeypatch.setitem(service_module.JOB_KINDS, "hold", hold)
+    background = BackgroundSolveService(workers=1)
+    yield background
+    release.set()
+    background.close()
+
+
+def large_catalog():
+    return items_from_records([{'Length (in)': 10 + i % 7, 'Width (in)': 5, 'Height (in)': 5, 'Quantity': 1 + i % 3}
+                               for i in range(2000)])
+
+
+def test_input_hash_sees_every_row_of_large_arrays():
+    items = large_catalog()
+    changed = items.copy()
+    changed['quantity'][1000] += 1
+    assert input_hash("volume", (items,), {}) == input_hash("volume", (items.copy(),), {})
+    assert input_hash("volume", (items,), {}) != input_hash("volume", (changed,), {})
+
+
+def test_identical_requests_share_a_job(service, release):
+    items = large_catalog()
+    changed = items.copy()
+    changed['quantity'][1000] += 1
+    first = service.submit("hold", release, items)
+    assert service.submit("hold", release, items.copy()) == first
+    second = service.submit("hold", release, changed)
+    assert second != first
+    release.set()
+    assert service.wait(first, timeout=10) is items
+    assert service.wait(second, timeout=10) is changed
+    assert service.stats['deduplicated'] == 1
+
+
+def wait_for_status(service, job_id, status):
+    deadline = time.time() + 10
+    while service.status(job_id)['status'] != status:
+        assert time.time() < deadline, f"job {job_id} never became {status}"
+        time.sleep(0.01)
+
+
+def test_cancel_stops_running_and_queued_jobs(service, release):
+    running = service.submit("hold", release, 1)
+    queued = service.submit("hold", release, 2)
+    wait_for_status(service, running, "running")
+    assert service.status(queued)['status'] == "queued"
+    assert service.cancel(queued) and service.cancel(running)
+    assert service.wait(running, timeout=10) is None
+    assert service.wait(queued, timeout=10) is None
+    assert [service.status(job)['status'] for job in (running, queued)] == ["cancelled", "cancelled"]
+    assert service.stats['cancelled'] == 2
+    assert not service.cancel(running)
+
+
+def test_jobs_return_the_solver_result(service):
+    trucks = [{'length': 2, 'width': 1, 'height': 1}]
+    boxes = [{'length': 12, 'width': 12, 'height': 12, 'quantity': 3, 'volume': 1728}]
+    job = service.submit("volume", trucks, boxes, [])
+    assert service.wait(job, timeout=10) == optimize_loading(trucks, boxes, [])
+    assert service.status(job)['status'] == "done"
@@ -1,19 +1,21 @@
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from ortools.linear_solver import pywraplp
+
+from load_engine.fleet_mix import greedy_fleet_mix, greedy_truck_counts
+from load_engine.forecast import DemandHistory, forecast_truck_requirements
+from load_engine.render import render_hex_grid
+from diagnostics import diagnostics_panel, diagnostics_sidebar
+from shared import carton_trucks, solve_service
+
 
 # Streamlit App Title
 st.title("Truck Forecasting & Space Optimization")
+diagnostics_sidebar()
 
 # User Input: Truck Dimensions
 st.sidebar.header("Truck Dimensions (in feet)")
-truck_types = {
-    "Small (20ft)": (20, 8, 8),
-    "Medium (40ft)": (40, 8, 8),
-    "Large (53ft)": (53, 8.5, 9.5)
-}
+truck_types = carton_trucks()
 num_trucks = {}
 
 # User Input: Carton Details
@@ -34,23 +36,88 @@ for i in range(num_carton_types):
     total_carton_count += carton_demand
     carton_data.append({"Length": carton_length, "Width": carton_width, "Height": carton_height, "Demand": carton_demand, "Volume": carton_volume})
 
+# Solver settings
+st.sidebar.header("Solver")
+solver_mode = st.sidebar.selectbox("Solver Mode", ["Greedy", "MILP (OR-Tools)"])
+if solver_mode == "MILP (OR-Tools)":
+    time_limit = st.sidebar.number_input("Time Limit (s)", min_value=0.1, value=5.0, step=0.5)
+    optimality_gap = st.sidebar.number_input("Optimality Gap (%)", min_value=0.0, value=1.0, step=0.5)
+
+# Demand history: daily carton demand per SKU; SKUs are matched to carton types in sorted order
+st.sidebar.header("Demand History")
+history_file = st.sidebar.file_uploader("Daily Demand CSV (date, sku, demand)", type="csv")
+forecast_days = st.sidebar.number_input("Forecast Days", min_value=1, value=7)
+forecast_method = st.sidebar.selectbox("Forecast Method", ["moving_average", "ewma"])
+if history_file is not None and st.session_state.get("demand_history_file") != history_file.file_id:
+    # Only days after the last ingested one are processed when an extended export is uploaded
+    history = st.session_state.get("demand_history") or DemandHistory()
+    try:
+        history.ingest_csv(history_file, skip_ingested=True)
+        st.session_state["demand_history"] = history
+        st.session_state["demand_history_file"] = history_file.file_id
+    except (KeyError, ValueError) as e:
+        st.sidebar.error(f"Could not read the demand history: {e}")
+
+# Poll a running MILP solve from a fragment that reruns on its own, so the
+# page stays responsive and the solve can be cancelled (the solver is
+# interrupted). When the job finishes the whole page reruns to show it.
+@st.fragment(run_every=0.5)
+def milp_progress(run):
+    job_id = st.session_state.get("fleet_mix_job")
+    if job_id is None:
+        return
+    service = solve_service()
+    status = service.status(job_id)
+    if status is None or status['status'] not in ("queued", "running"):
+        st.session_state.pop("fleet_mix_job", None)
+        run['milp'] = service.result(job_id) or {'status': status['error'] or status['status'] if status else "lost"}
+        st.rerun()
+    st.progress(min(status['elapsed'] / run['time_limit'], 1.0),
+                text=f"Solving the MILP ({status['status']}, {status['elapsed']:.1f} s)...")
+    if st.button("Cancel MILP Solve"):
+        service.cancel(job_id)
+
+
 if st.button("Run Forecasting"):
-    remaining_volume = total_carton_volume
-    truck_requirements = {}
-    truck_box_distribution = {}
-    total_truck_capacity = 0
-    
-    for truck_type, (length, width, height) in sorted(truck_types.items(), key=lambda x: -x[1][0]):
-        truck_volume = length * width * height
-        num_trucks = int(remaining_volume // truck_volume)
-        remaining_volume %= truck_volume
-        truck_requirements[truck_type] = num_trucks
-        total_truck_capacity += num_trucks * truck_volume
-        truck_box_distribution[truck_type] = num_trucks * (truck_volume // (total_carton_volume / total_carton_count))
-    
-    # Calculate utilization
-    utilization = (total_carton_volume / total_truck_capacity) * 100 if total_truck_capacity > 0 else 0
-    
+    run = {'greedy': greedy_fleet_mix(truck_types, carton_data), 'carton_data': carton_data, 'milp': None}
+    st.session_state.pop("fleet_mix_job", None)
+    if solver_mode == "MILP (OR-Tools)":
+        run['time_limit'] = time_limit
+        # Warm start from the previous what-if run when there is one, else from the greedy answer
+        hint = st.session_state.get("fleet_mix_hint") or greedy_truck_counts(run['greedy'])
+        # Solve on the shared service: a repeated click joins the running job
+        try:
+            st.session_state["fleet_mix_job"] = solve_service().submit(
+                "fleet_mix", truck_types, carton_data, time_limit=time_limit, gap=optimality_gap / 100, hint=hint)
+        except RuntimeError as e:
+            run['milp'] = {'status': str(e)}
+    st.session_state["forecast_run"] = run
+
+run = st.session_state.get("forecast_run")
+if run is not None:
+    greedy = run['greedy']
+    carton_data = run['carton_data']
+    remaining_volume = greedy['remaining_volume']
+    truck_requirements = greedy['truck_requirements']
+    truck_box_distribution = greedy['truck_box_distribution']
+    utilization = greedy['utilization']
+
+    milp = run['milp']
+    if st.session_state.get("fleet_mix_job"):
+        milp_progress(run)
+    elif milp is not None:
+        if 'truck_requirements' in milp:
+            st.session_state["fleet_mix_hint"] = milp['truck_requirements']
+            st.write(f"### MILP Solution ({milp['status']}, {milp['solve_time']:.2f} s)")
+            for truck_type, count in milp['truck_requirements'].items():
+                st.write(f"- {truck_type}: {count} trucks")
+            st.write(f"### Capacity Utilization: {milp['utilization']:.2f}%")
+            st.write("### Cartons Assigned to Each Truck Type:")
+            st.table(pd.DataFrame(milp['carton_assignment']))
+            st.write("### Greedy Answer (warm start):")
+        else:
+            st.error(f"MILP solver returned {milp['status']}; showing the greedy answer.")
+
     st.write("### Truck Requirements to Fulfill Demand:")
     for truck_type, count in truck_requirements.items():
         st.write(f"- {truck_type}: {count} trucks")
@@ -65,46 +132,34 @@ if st.button("Run Forecasting"):
     for i, carton in enumerate(carton_data):
         st.write(f"- Carton {i+1}: {carton['Demand']} boxes")
     
-    remaining_boxes = {}
     if remaining_volume > 0:
         st.write("### Note: Some volume remains unallocated. Consider using additional trucks or different configurations.")
-        additional_truck = min(truck_types.items(), key=lambda x: x[1][0])  # Smallest truck
-        additional_truck_type, (length, width, height) = additional_truck
-        additional_truck_volume = length * width * height
-        additional_trucks_needed = int(np.ceil(remaining_volume / additional_truck_volume))
         
         st.write(f"### Recommended Allocation for Remaining Volume:")
-        st.write(f"- Use {additional_trucks_needed} additional {additional_truck_type} truck(s) to accommodate remaining volume.")
+        st.write(f"- Use {greedy['additional_trucks_needed']} additional {greedy['additional_truck_type']} truck(s) to accommodate remaining volume.")
         st.write(f"- Consider repacking or optimizing stacking methods for better space utilization.")
         
-        for carton in carton_data:
-            remaining_count = int((remaining_volume // carton["Volume"]))
-            remaining_boxes[f"Carton {carton_data.index(carton) + 1}"] = remaining_count
-        
         st.write("### Remaining Boxes by Type:")
-        for carton_type, count in remaining_boxes.items():
+        for carton_type, count in greedy['remaining_boxes'].items():
             st.write(f"- {carton_type}: {count} boxes")
     
+    # Trucks needed per day for the forecast demand
+    history = st.session_state.get("demand_history")
+    if history is not None and history.days:
+        st.write(f"### Demand Forecast ({history.first_date} to {history.last_date}, {history.days} days of history)")
+        skus = sorted(history.skus)
+        cartons = {sku: carton['Volume'] for sku, carton in zip(skus, carton_data)}
+        st.write(", ".join(f"{sku} = Carton {i + 1}" for i, sku in enumerate(skus[:len(carton_data)])))
+        plan = forecast_truck_requirements(history, truck_types, cartons, horizon=forecast_days, method=forecast_method)
+        st.table(pd.DataFrame(plan))
+
     # Honeycomb pattern simulation visualization
     st.write("### Space Optimization Using Honeycomb Pattern")
-    rows = int(np.sqrt(num_carton_types)) + 1
-    cols = (num_carton_types // rows) + 1
+    rows = int(np.sqrt(len(carton_data))) + 1
+    cols = (len(carton_data) // rows) + 1
     
-    fig, ax = plt.subplots(figsize=(6, 6))
-    for i in range(rows):
-        for j in range(cols):
-            x = j + (0.5 * (i % 2))
-            y = i * 0.87  # Adjust for hexagonal stacking
-            hexagon = plt.Polygon(
-                [[x, y], [x+0.5, y+0.25], [x+0.5, y+0.75], [x, y+1], [x-0.5, y+0.75], [x-0.5, y+0.25]],
-                edgecolor='black', facecolor='lightblue'
-            )
-            ax.add_patch(hexagon)
-    
-    ax.set_xlim(-1, cols + 1)
-    ax.set_ylim(-1, rows + 1)
-    ax.set_aspect('equal')
-    ax.axis('off')
-    st.pyplot(fig)
+    st.image(render_hex_grid(rows, cols))
     
     st.write("### Space Optimization Visualization Completed!")
+
+diagnostics_panel()